@@ -0,0 +1,34 @@
+-- Cloudflare D1 读路径索引
+-- 覆盖 API 路由和同步任务的实际查询模式；效果和写入代价见 scripts/benchmark-queries.py
+-- worker-cron.ts 的 ensureTables() 为它创建的表建立同样的索引
+
+-- ========================================
+-- 1. /api/history/[modelId]：排行榜历史
+--    WHERE model_id = ? AND timestamp >= ? ORDER BY timestamp DESC
+--    包含所有查询列，窗口内的行无需回表
+-- ========================================
+CREATE INDEX IF NOT EXISTS idx_leaderboard_history_model_time
+  ON leaderboard_history(model_id, timestamp, rank, equity, return_pct, sharpe, num_trades, win_rate, cached_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_history_rollup_model_time
+  ON leaderboard_history_rollup(model_id, last_ts);
+
+-- ========================================
+-- 2. /api/history/[modelId]：净值曲线和每日快照
+--    WHERE model_id = ? AND timestamp >= ? ORDER BY timestamp LIMIT ?
+--    WHERE model_id = ? ORDER BY snapshot_date DESC LIMIT ?
+-- ========================================
+CREATE INDEX IF NOT EXISTS idx_account_totals_model_time ON account_totals(model_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_daily_snapshots_model_date ON daily_snapshots(model_id, snapshot_date);
+
+-- ========================================
+-- 3. 单模型交易和对话（按时间范围）
+-- ========================================
+CREATE INDEX IF NOT EXISTS idx_trades_detailed_model_exit ON trades_detailed(model_id, exit_time);
+CREATE INDEX IF NOT EXISTS idx_ai_conversations_model_time ON ai_conversations(model_id, conversation_time);
+
+-- ========================================
+-- 4. worker-cron.ts：写入新快照前清空账户旧持仓
+--    DELETE FROM account_positions WHERE account_total_id = ?
+-- ========================================
+CREATE INDEX IF NOT EXISTS idx_account_positions_account ON account_positions(account_total_id);
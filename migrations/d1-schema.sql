@@ -72,6 +72,7 @@ CREATE TABLE IF NOT EXISTS model_performance_cache (
   total_pnl REAL DEFAULT 0,
   overall_win_rate REAL,
   sharpe_ratio REAL,
+  max_drawdown REAL, -- 累计已实现盈亏的最大回撤（美元）
   cached_at INTEGER NOT NULL
 );
 
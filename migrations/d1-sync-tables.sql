@@ -0,0 +1,418 @@
+-- Cloudflare D1 同步表 Schema
+-- 与 worker-cron.ts 的 ensureTables() 保持一致，供 Python 同步脚本和本地 SQLite 使用
+
+-- ========================================
+-- 1. 同步任务运行记录
+-- ========================================
+CREATE TABLE IF NOT EXISTS sync_runs (
+  job TEXT PRIMARY KEY,
+  last_run INTEGER NOT NULL
+);
+
+-- ========================================
+-- 2. 完整交易明细
+-- ========================================
+CREATE TABLE IF NOT EXISTS trades_detailed (
+  id TEXT PRIMARY KEY,
+  model_id TEXT,
+  symbol TEXT,
+  side TEXT,
+  trade_type TEXT,
+  leverage REAL,
+  quantity REAL,
+  confidence REAL,
+  entry_time INTEGER,
+  entry_human_time TEXT,
+  entry_price REAL,
+  entry_sz REAL,
+  entry_oid TEXT,
+  entry_tid TEXT,
+  entry_commission_dollars REAL,
+  entry_closed_pnl REAL,
+  entry_crossed INTEGER,
+  exit_time INTEGER,
+  exit_human_time TEXT,
+  exit_price REAL,
+  exit_sz REAL,
+  exit_oid TEXT,
+  exit_tid TEXT,
+  exit_commission_dollars REAL,
+  exit_closed_pnl REAL,
+  exit_crossed INTEGER,
+  exit_plan TEXT,
+  realized_net_pnl REAL,
+  realized_gross_pnl REAL,
+  total_commission_dollars REAL,
+  trade_id TEXT,
+  trade_json TEXT,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 3. 模型分析汇总
+-- ========================================
+CREATE TABLE IF NOT EXISTS model_analytics (
+  model_id TEXT PRIMARY KEY,
+  updated_at INTEGER,
+  last_trade_exit_time INTEGER,
+  last_convo_timestamp INTEGER,
+  overall_pnl_with_fees REAL,
+  overall_pnl_without_fees REAL,
+  total_fees_paid REAL,
+  total_fees_as_pct_of_pnl REAL,
+  avg_net_pnl REAL,
+  avg_gross_pnl REAL,
+  std_net_pnl REAL,
+  std_gross_pnl REAL,
+  biggest_net_gain REAL,
+  biggest_net_loss REAL,
+  win_rate REAL,
+  avg_winners_net_pnl REAL,
+  avg_losers_net_pnl REAL,
+  std_winners_net_pnl REAL,
+  std_losers_net_pnl REAL,
+  total_trades INTEGER,
+  num_long_trades INTEGER,
+  num_short_trades INTEGER,
+  long_short_trades_ratio REAL,
+  avg_holding_period_mins REAL,
+  median_holding_period_mins REAL,
+  std_holding_period_mins REAL,
+  avg_longs_holding_period REAL,
+  avg_shorts_holding_period REAL,
+  avg_size_of_trade_notional REAL,
+  median_size_of_trade_notional REAL,
+  std_size_of_trade_notional REAL,
+  total_signals INTEGER,
+  num_long_signals INTEGER,
+  num_short_signals INTEGER,
+  num_close_signals INTEGER,
+  num_hold_signals INTEGER,
+  long_signal_pct REAL,
+  short_signal_pct REAL,
+  close_signal_pct REAL,
+  hold_signal_pct REAL,
+  avg_confidence REAL,
+  median_confidence REAL,
+  std_confidence REAL,
+  avg_confidence_long REAL,
+  avg_confidence_short REAL,
+  avg_confidence_close REAL,
+  avg_leverage REAL,
+  median_leverage REAL,
+  avg_convo_leverage REAL,
+  sharpe_ratio REAL,
+  mins_long_combined REAL,
+  mins_short_combined REAL,
+  mins_flat_combined REAL,
+  pct_mins_long_combined REAL,
+  pct_mins_short_combined REAL,
+  pct_mins_flat_combined REAL,
+  num_invocations INTEGER,
+  avg_invocation_break_mins REAL,
+  min_invocation_break_mins REAL,
+  max_invocation_break_mins REAL,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 4. 模型分析原始数据
+-- ========================================
+CREATE TABLE IF NOT EXISTS model_analytics_details (
+  model_id TEXT PRIMARY KEY,
+  raw_data TEXT NOT NULL,
+  updated_at INTEGER NOT NULL
+);
+
+-- ========================================
+-- 5. AI 对话记录
+-- ========================================
+CREATE TABLE IF NOT EXISTS ai_conversations (
+  id TEXT PRIMARY KEY,
+  model_id TEXT,
+  conversation_time INTEGER,
+  decision TEXT,
+  confidence REAL,
+  symbol TEXT,
+  action_taken TEXT,
+  raw_data TEXT,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 6. 账户快照
+-- ========================================
+CREATE TABLE IF NOT EXISTS account_totals (
+  id TEXT PRIMARY KEY,
+  model_id TEXT,
+  timestamp INTEGER,
+  realized_pnl REAL,
+  unrealized_pnl REAL,
+  total_equity REAL,
+  positions_data TEXT,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 7. 账户持仓快照
+-- ========================================
+CREATE TABLE IF NOT EXISTS account_positions (
+  id TEXT PRIMARY KEY,
+  account_total_id TEXT,
+  model_id TEXT,
+  symbol TEXT,
+  quantity REAL,
+  entry_price REAL,
+  current_price REAL,
+  unrealized_pnl REAL,
+  closed_pnl REAL,
+  leverage REAL,
+  margin REAL,
+  liquidation_price REAL,
+  entry_time INTEGER,
+  confidence REAL,
+  risk_usd REAL,
+  exit_plan TEXT,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 8. 成立以来净值
+-- ========================================
+CREATE TABLE IF NOT EXISTS since_inception_values (
+  id TEXT PRIMARY KEY,
+  model_id TEXT,
+  nav_since_inception REAL,
+  inception_date INTEGER,
+  num_invocations INTEGER,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 9. 实时价格
+-- ========================================
+CREATE TABLE IF NOT EXISTS crypto_prices_realtime (
+  symbol TEXT PRIMARY KEY,
+  price REAL,
+  timestamp INTEGER,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 10. 排行榜历史快照（每次同步写入）
+-- ========================================
+CREATE TABLE IF NOT EXISTS leaderboard_history (
+  id TEXT PRIMARY KEY,
+  model_id TEXT,
+  timestamp INTEGER,
+  rank INTEGER,
+  equity REAL,
+  return_pct REAL,
+  sharpe REAL,
+  num_trades INTEGER,
+  win_rate REAL,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 11. 每日快照（history API 读取）
+-- ========================================
+CREATE TABLE IF NOT EXISTS daily_snapshots (
+  id TEXT PRIMARY KEY,
+  model_id TEXT,
+  snapshot_date TEXT, -- YYYY-MM-DD格式
+  trades_count INTEGER,
+  total_pnl REAL,
+  total_fees REAL,
+  win_rate REAL,
+  best_trade_pnl REAL,
+  worst_trade_pnl REAL,
+  equity_eod REAL,
+  positions_open INTEGER,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 12. 排行榜历史降采样（小时/日聚合，由 retention 压缩写入）
+-- ========================================
+CREATE TABLE IF NOT EXISTS leaderboard_history_rollup (
+  model_id TEXT NOT NULL,
+  resolution TEXT NOT NULL, -- 'hour' 或 'day'
+  bucket INTEGER NOT NULL, -- 桶起始时间（秒）
+  samples INTEGER NOT NULL,
+  first_ts INTEGER,
+  last_ts INTEGER,
+  equity_last REAL,
+  equity_min REAL,
+  equity_max REAL,
+  return_pct_last REAL,
+  return_pct_min REAL,
+  return_pct_max REAL,
+  sharpe_last REAL,
+  sharpe_min REAL,
+  sharpe_max REAL,
+  rank_last INTEGER,
+  num_trades_last INTEGER,
+  win_rate_last REAL,
+  cached_at INTEGER,
+  PRIMARY KEY (model_id, resolution, bucket)
+);
+
+-- ========================================
+-- 13. 持仓快照降采样（小时/日聚合）
+-- ========================================
+CREATE TABLE IF NOT EXISTS account_positions_rollup (
+  model_id TEXT NOT NULL,
+  symbol TEXT NOT NULL,
+  resolution TEXT NOT NULL,
+  bucket INTEGER NOT NULL,
+  samples INTEGER NOT NULL,
+  first_ts INTEGER,
+  last_ts INTEGER,
+  quantity_last REAL,
+  current_price_last REAL,
+  current_price_min REAL,
+  current_price_max REAL,
+  unrealized_pnl_last REAL,
+  unrealized_pnl_min REAL,
+  unrealized_pnl_max REAL,
+  leverage_last REAL,
+  cached_at INTEGER,
+  PRIMARY KEY (model_id, symbol, resolution, bucket)
+);
+
+-- 压缩按时间范围扫描和分批删除
+CREATE INDEX IF NOT EXISTS idx_leaderboard_history_time ON leaderboard_history(timestamp);
+CREATE INDEX IF NOT EXISTS idx_account_positions_cached ON account_positions(cached_at);
+
+-- ========================================
+-- 14. 持仓标记价格（仅价格变化的持仓，每次同步一行）
+-- ========================================
+CREATE TABLE IF NOT EXISTS position_marks (
+  model_id TEXT NOT NULL,
+  symbol TEXT NOT NULL,
+  timestamp INTEGER NOT NULL,
+  current_price REAL,
+  unrealized_pnl REAL,
+  margin REAL,
+  PRIMARY KEY (model_id, symbol, timestamp)
+);
+
+CREATE INDEX IF NOT EXISTS idx_position_marks_time ON position_marks(timestamp);
+
+-- 压缩时保留每个持仓的最新一行（account_positions 只在持仓变化时写入）
+CREATE INDEX IF NOT EXISTS idx_account_positions_symbol_cached ON account_positions(model_id, symbol, cached_at);
+
+CREATE TABLE IF NOT EXISTS position_marks_rollup (
+  model_id TEXT NOT NULL,
+  symbol TEXT NOT NULL,
+  resolution TEXT NOT NULL,
+  bucket INTEGER NOT NULL,
+  samples INTEGER NOT NULL,
+  first_ts INTEGER,
+  last_ts INTEGER,
+  current_price_last REAL,
+  current_price_min REAL,
+  current_price_max REAL,
+  unrealized_pnl_last REAL,
+  unrealized_pnl_min REAL,
+  unrealized_pnl_max REAL,
+  margin_last REAL,
+  cached_at INTEGER,
+  PRIMARY KEY (model_id, symbol, resolution, bucket)
+);
+
+-- ========================================
+-- 15. 读模型：降采样净值曲线（每个模型每种分辨率一行，按主键读取）
+-- ========================================
+CREATE TABLE IF NOT EXISTS model_equity_curves (
+  model_id TEXT NOT NULL,
+  resolution TEXT NOT NULL, -- '5m'、'1h' 或 '1d'
+  points TEXT, -- JSON [[桶起始时间, 净值], ...]，按时间升序
+  num_points INTEGER,
+  first_ts INTEGER,
+  last_ts INTEGER, -- 最后一个样本的时间
+  last_equity REAL,
+  cached_at INTEGER,
+  PRIMARY KEY (model_id, resolution)
+);
+
+-- ========================================
+-- 16. 读模型：排行榜变化（相对上一次排行榜快照）
+-- ========================================
+CREATE TABLE IF NOT EXISTS leaderboard_deltas (
+  model_id TEXT PRIMARY KEY,
+  timestamp INTEGER,
+  rank INTEGER,
+  previous_rank INTEGER,
+  rank_change INTEGER, -- 正数表示排名上升，首次出现为 NULL
+  equity REAL,
+  equity_change REAL,
+  return_pct REAL,
+  return_pct_change REAL,
+  previous_timestamp INTEGER,
+  cached_at INTEGER
+);
+
+-- ========================================
+-- 17. 读模型：每个模型按币种的已实现盈亏
+-- ========================================
+CREATE TABLE IF NOT EXISTS model_symbol_pnl (
+  model_id TEXT NOT NULL,
+  symbol TEXT NOT NULL,
+  trades INTEGER,
+  wins INTEGER,
+  losses INTEGER,
+  win_rate REAL,
+  realized_net_pnl REAL,
+  realized_gross_pnl REAL,
+  total_commission REAL,
+  best_trade_pnl REAL,
+  worst_trade_pnl REAL,
+  last_exit_time INTEGER,
+  cached_at INTEGER,
+  PRIMARY KEY (model_id, symbol)
+);
+
+-- ========================================
+-- 18. 加密货币价格 K 线（每个币种每种分辨率一个环形缓冲区）
+-- ========================================
+-- slot = (bucket / 分辨率秒数) % 槽位数，新的桶覆盖同一槽位里更早的 K 线，
+-- 因此保留量固定，无需清理：'1m' 1440 槽（1 天）、'5m' 2016 槽（7 天）、
+-- '1h' 2160 槽（90 天）、'1d' 1825 槽（5 年）。写入用 ON CONFLICT DO UPDATE
+-- 在数据库内合并 tick（见 scripts/d1sync/candles.py）
+CREATE TABLE IF NOT EXISTS crypto_price_candles (
+  symbol TEXT NOT NULL,
+  resolution TEXT NOT NULL, -- '1m'、'5m'、'1h' 或 '1d'
+  slot INTEGER NOT NULL,
+  bucket INTEGER NOT NULL, -- 桶起始时间
+  open REAL,
+  high REAL,
+  low REAL,
+  close REAL,
+  ticks INTEGER,
+  first_ts INTEGER,
+  last_ts INTEGER,
+  cached_at INTEGER,
+  PRIMARY KEY (symbol, resolution, slot)
+);
+
+CREATE INDEX IF NOT EXISTS idx_crypto_price_candles_range ON crypto_price_candles(symbol, resolution, bucket);
+
+-- ========================================
+-- 19. 模型注册表（从排行榜和账户总额中发现的模型）
+-- ========================================
+-- 只为自上次同步后有新平仓交易（last_trade_exit_time 变化）或净值变动超过 $100
+-- 的模型请求 /analytics/{model}；超过 3 天未出现的模型不再请求（见 scripts/d1sync/models.py）。
+-- 同步脚本和 worker-cron.ts 都用 ON CONFLICT DO UPDATE 写入
+CREATE TABLE IF NOT EXISTS model_registry (
+  model_id TEXT PRIMARY KEY,
+  first_seen INTEGER NOT NULL,
+  last_seen INTEGER NOT NULL,
+  last_trade_exit_time INTEGER,
+  equity REAL,
+  analytics_exit_time INTEGER, -- 上次同步 /analytics/{model} 时的 last_trade_exit_time
+  analytics_equity REAL, -- 上次同步 /analytics/{model} 时的净值
+  analytics_synced_at INTEGER,
+  cached_at INTEGER
+);
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Measure the stored size of trade_data and positions_data per encoding
+
+For the recent_trades_cache and account_totals rows of one payload, reports
+bytes per row of the JSON column and of the whole rendered row (what a sync
+uploads), plus encode/decode time, for:
+
+    json       json.dumps() of the payload item, the encoding before d1sync.blobs
+    compact    d1sync.blobs without compression (the default)
+    deflate    d1sync.blobs with SYNC_BLOB_COMPRESS_BYTES=--compress-bytes
+
+Every encoded document is decoded again and compared with the item.
+
+  python scripts/benchmark-blobs.py                         # synthetic 10k trades, 36 positions
+  python scripts/benchmark-blobs.py --fixture recorded.json # from complete-sync-all.py --record
+  python scripts/benchmark-blobs.py --compress-bytes 256 --output blobs.json
+"""
+
+import argparse
+import json
+import time
+
+from d1sync import blobs
+from d1sync.schema import extract_rows
+from d1sync.sqlwriter import TABLES, render_rows
+from d1sync.synthetic import START_TIME, synthetic_payload
+
+DEFAULT_TRADES = 10000
+DEFAULT_POSITIONS = 36
+DEFAULT_COMPRESS_BYTES = 512
+
+# Rows recent_trades_cache keeps per sync
+RECENT_TRADES = 50
+
+
+def encodings(compress_bytes):
+    """name -> (trade_data(item, *columns), positions_data(positions))"""
+    return {
+        'json': (lambda item, *columns: json.dumps(item), json.dumps),
+        'compact': (blobs.trade_data, blobs.positions_data),
+        'deflate': (
+            lambda item, *columns: blobs.compact_json(json.loads(blobs.trade_data(item, *columns)), compress_bytes),
+            lambda positions: blobs.compact_json(json.loads(blobs.positions_data(positions)), compress_bytes)
+        )
+    }
+
+
+def measure(table, items, rows, encode, decode):
+    """Bytes per row and encode/decode time of one blob column over items"""
+    column = TABLES[table].index({'recent_trades_cache': 'trade_data', 'account_totals': 'positions_data'}[table])
+
+    started = time.perf_counter()
+    documents = [encode(item, row) for item, row in zip(items, rows)]
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    decoded = [decode(document, row) for document, row in zip(documents, rows)]
+    decode_seconds = time.perf_counter() - started
+    if decoded != items:
+        raise AssertionError(f'{table}: decoded documents differ from the payload')
+
+    rendered = render_rows(table, (row[:column] + (document,) + row[column + 1:] for row, document in zip(rows, documents)))
+    count = max(1, len(documents))
+    return {
+        'rows': len(documents),
+        'column_bytes_per_row': sum(len(document.encode('utf-8')) for document in documents) / count,
+        'row_bytes_per_row': sum(size for _, size in rendered) / count,
+        'encode_us_per_row': encode_seconds / count * 1e6,
+        'decode_us_per_row': decode_seconds / count * 1e6
+    }
+
+
+def bench(data, compress_bytes):
+    timestamp = START_TIME
+    trades = data['trades'].get('trades', [])[:RECENT_TRADES]
+    trade_rows = list(extract_rows('recent_trades', trades, timestamp=timestamp))
+    trade_columns = [TABLES['recent_trades_cache'].index(name) for name in blobs.TRADE_DATA_COLUMNS]
+
+    accounts = data['account_totals'].get('accountTotals', [])
+    positions = [account.get('positions', {}) for account in accounts]
+    account_rows = list(extract_rows('account_totals', accounts, timestamp=timestamp, structure_changed=True))
+
+    results = {}
+    for name, (encode_trade, encode_positions) in encodings(compress_bytes).items():
+        results[name] = {
+            'trade_data': measure(
+                'recent_trades_cache', trades, trade_rows,
+                lambda item, row: encode_trade(item, *(row[i] for i in trade_columns)),
+                lambda document, row: blobs.decode_blob(
+                    document, {key: row[i] for key, i in zip(blobs.TRADE_DATA_COLUMNS, trade_columns)}
+                )
+            ),
+            'positions_data': measure(
+                'account_totals', positions, account_rows,
+                lambda item, row: encode_positions(item),
+                lambda document, row: blobs.decode_positions(document)
+            )
+        }
+    return results
+
+
+def print_report(results):
+    for column in ('trade_data', 'positions_data'):
+        baseline = results['json'][column]
+        print(f'\n  {column} ({baseline["rows"]} rows)')
+        print(f'    {"encoding":<10}{"column B/row":>14}{"row B/row":>12}{"saved":>8}{"encode µs":>12}{"decode µs":>12}')
+        for name, result in results.items():
+            measured = result[column]
+            saved = 1 - measured['row_bytes_per_row'] / baseline['row_bytes_per_row'] if baseline['rows'] else 0
+            print(f'    {name:<10}{measured["column_bytes_per_row"]:>14.0f}{measured["row_bytes_per_row"]:>12.0f}'
+                  f'{saved:>8.0%}{measured["encode_us_per_row"]:>12.1f}{measured["decode_us_per_row"]:>12.1f}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Measure bytes per row of the trade_data and positions_data encodings')
+    parser.add_argument('--fixture', help='recorded API data (complete-sync-all.py --record)')
+    parser.add_argument('--trades', type=int, default=DEFAULT_TRADES, help='synthetic trades')
+    parser.add_argument('--positions', type=int, default=DEFAULT_POSITIONS, help='synthetic open positions')
+    parser.add_argument('--compress-bytes', type=int, default=DEFAULT_COMPRESS_BYTES,
+                        help=f'SYNC_BLOB_COMPRESS_BYTES for the deflate encoding (default: {DEFAULT_COMPRESS_BYTES})')
+    parser.add_argument('--output', help='write results as JSON')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.fixture:
+        with open(args.fixture, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        source = args.fixture
+    else:
+        data = synthetic_payload(args.trades, args.positions)
+        source = f'synthetic {args.trades:,} trades, {args.positions} positions'
+
+    print(f'🏁 Measuring JSON column encodings ({source})...')
+    results = bench(data, args.compress_bytes)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'source': source, 'compress_bytes': args.compress_bytes, 'results': results}, f, indent=2)
+        print(f'\n✅ Results saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
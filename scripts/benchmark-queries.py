@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Benchmark the D1 read paths against a local SQLite copy of the schema
+
+Builds two databases holding the same synthetic history, one with the
+schema alone and one with migrations/d1-read-indexes.sql applied on top,
+then runs the queries the app and the worker actually issue against both:
+median latency, the query plan (full SCAN vs index SEARCH) and the cost
+the indexes add to every sync (time and bytes written per sync batch, size
+of each index).
+
+  python scripts/benchmark-queries.py                       # 30 days at a 5 minute interval
+  python scripts/benchmark-queries.py --days 90 --trades 200000 --conversations 100000
+  python scripts/benchmark-queries.py --repeat 200 --output queries.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from d1sync.backends import SCHEMA_FILES, SqliteBackend
+from d1sync.synthetic import MODELS, START_TIME
+
+INDEX_FILE = SCHEMA_FILES[-1]
+
+DEFAULT_DAYS = 30
+DEFAULT_INTERVAL = 300
+DEFAULT_TRADES = 50000
+DEFAULT_CONVERSATIONS = 50000
+DEFAULT_POSITIONS = 6
+DEFAULT_REPEAT = 50
+DEFAULT_BATCHES = 20
+
+# Request parameters of the history route (?days=7&limit=100)
+HISTORY_DAYS = 7
+HISTORY_LIMIT = 100
+
+# Columns holding JSON documents get payloads of roughly this size
+JSON_COLUMNS = {'trade_data', 'positions_data', 'raw_data', 'exit_plan'}
+JSON_BYTES = 400
+
+# name -> (description, SQL, parameters from the benchmark context)
+QUERIES = {
+    'history.leaderboard': (
+        '/api/history/[modelId] ranking history',
+        '''
+        SELECT * FROM (
+          SELECT id, model_id, timestamp, rank, equity, return_pct, sharpe, num_trades, win_rate, cached_at
+          FROM leaderboard_history
+          WHERE model_id = ? AND timestamp >= ?
+          UNION ALL
+          SELECT model_id || '-' || resolution || '-' || bucket AS id, model_id, last_ts AS timestamp,
+                 rank_last AS rank, equity_last AS equity, return_pct_last AS return_pct,
+                 sharpe_last AS sharpe, num_trades_last AS num_trades, win_rate_last AS win_rate, cached_at
+          FROM leaderboard_history_rollup
+          WHERE model_id = ? AND last_ts >= ?
+        )
+        ORDER BY timestamp DESC
+        LIMIT ?
+        ''',
+        lambda c: (c['model'], c['since'], c['model'], c['since'], HISTORY_LIMIT)
+    ),
+    'history.daily_snapshots': (
+        '/api/history/[modelId] daily snapshots',
+        '''
+        SELECT id, model_id, snapshot_date, trades_count, total_pnl, total_fees, win_rate,
+               best_trade_pnl, worst_trade_pnl, equity_eod, positions_open, cached_at
+        FROM daily_snapshots
+        WHERE model_id = ?
+        ORDER BY snapshot_date DESC
+        LIMIT ?
+        ''',
+        lambda c: (c['model'], HISTORY_DAYS)
+    ),
+    'history.account_totals': (
+        '/api/history/[modelId] equity curve',
+        '''
+        SELECT id, model_id, timestamp, realized_pnl, unrealized_pnl, total_equity, cached_at
+        FROM account_totals
+        WHERE model_id = ? AND timestamp >= ?
+        ORDER BY timestamp ASC
+        LIMIT ?
+        ''',
+        lambda c: (c['model'], c['since'], HISTORY_LIMIT * 10)
+    ),
+    'worker.delete_positions': (
+        'worker-cron.ts position refresh (rolled back)',
+        'DELETE FROM account_positions WHERE account_total_id = ?',
+        lambda c: (c['account'],)
+    ),
+    'model.trades_by_exit': (
+        'trades of one model closed in a time range',
+        '''
+        SELECT * FROM trades_detailed
+        WHERE model_id = ? AND exit_time >= ? AND exit_time < ?
+        ORDER BY exit_time DESC
+        ''',
+        lambda c: (c['model'], c['since'], c['now'])
+    ),
+    'model.conversations_by_time': (
+        'latest conversations of one model',
+        '''
+        SELECT id, model_id, conversation_time, decision, confidence, symbol, action_taken
+        FROM ai_conversations
+        WHERE model_id = ? AND conversation_time >= ?
+        ORDER BY conversation_time DESC
+        LIMIT ?
+        ''',
+        lambda c: (c['model'], c['since'], HISTORY_LIMIT)
+    )
+}
+
+
+def table_columns(conn, table):
+    """(name, declared type) of every column of table"""
+    return [(row[1], row[2].upper()) for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def filler(rng, name, declared):
+    if name in JSON_COLUMNS:
+        return json.dumps({'pad': 'x' * rng.randint(JSON_BYTES // 2, JSON_BYTES * 3 // 2)})
+    if 'INT' in declared:
+        return rng.randint(0, 1000)
+    if 'REAL' in declared:
+        return round(rng.uniform(-10000, 10000), 4)
+    if name.endswith('symbol'):
+        return rng.choice(('BTC', 'ETH', 'SOL', 'BNB', 'DOGE', 'XRP'))
+    return f'{name}-{rng.randint(0, 99999)}'
+
+
+class RowFactory:
+    """Synthetic rows for the columns the schema declares, with the keys given"""
+
+    def __init__(self, conn, seed):
+        self.conn = conn
+        self.rng = random.Random(seed)
+        self.columns = {}
+
+    def insert(self, table, rows):
+        """Insert dicts of key columns; every other column gets a synthetic value"""
+        columns = self.columns.get(table)
+        if columns is None:
+            columns = self.columns[table] = table_columns(self.conn, table)
+        sql = f'INSERT OR REPLACE INTO {table} ({",".join(name for name, _ in columns)}) VALUES ({",".join("?" * len(columns))})'
+        self.conn.executemany(sql, (
+            tuple(row[name] if name in row else filler(self.rng, name, declared) for name, declared in columns)
+            for row in rows
+        ))
+
+
+def history_rows(models, ticks, interval, positions):
+    """Rows of one sync tick for every model: leaderboard, account totals and positions"""
+    for ts in ticks:
+        for model in models:
+            account = f'{model}_{ts}'
+            yield 'leaderboard_history', {'id': f'{model}-{ts}', 'model_id': model, 'timestamp': ts, 'cached_at': ts}
+            yield 'account_totals', {'id': account, 'model_id': model, 'timestamp': ts, 'cached_at': ts}
+            for i in range(positions):
+                yield 'account_positions', {
+                    'id': f'{account}_{i}', 'account_total_id': account, 'model_id': model, 'cached_at': ts
+                }
+
+
+def event_rows(rng, models, table, count, start, end, seq):
+    time_column = 'exit_time' if table == 'trades_detailed' else 'conversation_time'
+    for i in range(count):
+        ts = rng.randint(start, end - 1)
+        yield table, {'id': f'{table}-{seq + i}', 'model_id': rng.choice(models), time_column: ts, 'cached_at': ts}
+
+
+def build_database(path, args, indexed):
+    """Schema (plus the read indexes when indexed) and the synthetic history"""
+    schema = SCHEMA_FILES if indexed else SCHEMA_FILES[:-1]
+    backend = SqliteBackend(path, schema_files=schema)
+    conn = backend.conn
+
+    rng = random.Random(1)
+    factory = RowFactory(conn, seed=2)
+    now = START_TIME + args.days * 86400
+    ticks = range(START_TIME, now, args.interval)
+
+    conn.execute('BEGIN')
+    groups = {}
+    rows = [
+        history_rows(MODELS, ticks, args.interval, args.positions),
+        event_rows(rng, MODELS, 'trades_detailed', args.trades, START_TIME, now, 0),
+        event_rows(rng, MODELS, 'ai_conversations', args.conversations, START_TIME, now, 0)
+    ]
+    for source in rows:
+        for table, row in source:
+            groups.setdefault(table, []).append(row)
+            if len(groups[table]) >= 5000:
+                factory.insert(table, groups.pop(table))
+    for table, pending in groups.items():
+        factory.insert(table, pending)
+
+    rollup = []
+    for model in MODELS:
+        for bucket in range(START_TIME, now, 3600):
+            rollup.append({'model_id': model, 'resolution': 'hour', 'bucket': bucket,
+                           'first_ts': bucket, 'last_ts': bucket + 3600 - args.interval, 'cached_at': bucket})
+    factory.insert('leaderboard_history_rollup', rollup)
+
+    snapshots = []
+    for model in MODELS:
+        for day in range(args.days):
+            date = time.strftime('%Y-%m-%d', time.gmtime(START_TIME + day * 86400))
+            snapshots.append({'id': f'{model}_{date}', 'model_id': model, 'snapshot_date': date})
+    factory.insert('daily_snapshots', snapshots)
+    conn.execute('COMMIT')
+
+    backend.close()
+    return now
+
+
+def index_sizes(conn):
+    """Bytes of each index created by the read-index migration (None without dbstat)"""
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+    )]
+    with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+        migration = f.read()
+    names = [name for name in names if name in migration]
+    try:
+        sizes = dict(conn.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name'))
+    except sqlite3.OperationalError:
+        return {name: None for name in names}
+    return {name: sizes.get(name, 0) for name in names}
+
+
+def query_plan(conn, sql, params):
+    return '; '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+
+
+def time_query(conn, sql, params, repeat, write):
+    timings = []
+    for _ in range(repeat):
+        if write:
+            conn.execute('SAVEPOINT bench')
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - started)
+        if write:
+            conn.execute('ROLLBACK TO bench')
+            conn.execute('RELEASE bench')
+    return statistics.median(timings) * 1000
+
+
+def bench_queries(path, context, repeat):
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        results = {}
+        for name, (description, sql, params) in QUERIES.items():
+            values = params(context)
+            write = sql.lstrip().upper().startswith('DELETE')
+            rows = len(conn.execute(sql, values).fetchall()) if not write else None
+            results[name] = {
+                'description': description,
+                'ms': time_query(conn, sql, values, repeat, write),
+                'rows': rows,
+                'plan': query_plan(conn, sql, values)
+            }
+        return results, index_sizes(conn)
+    finally:
+        conn.close()
+
+
+def bench_writes(path, args, now, batches):
+    """
+    Apply batches sync ticks after the existing history, each in one
+    transaction like a sync run: new leaderboard, account and position rows
+    for every model, the worker's position refresh and a slice of new trades
+    and conversations. Returns the median ms per batch, the part of it spent
+    inserting (the index maintenance cost, without the DELETE the indexes
+    speed up) and bytes of database growth per batch.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    factory = RowFactory(conn, seed=3)
+    rng = random.Random(4)
+    per_tick = max(1, args.trades // max(1, args.days * 86400 // args.interval))
+    chats_per_tick = max(1, args.conversations // max(1, args.days * 86400 // args.interval))
+
+    def size():
+        return conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
+
+    try:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        before = size()
+        timings, inserts = [], []
+        for batch in range(batches):
+            ts = now + batch * args.interval
+            started = time.perf_counter()
+            conn.execute('BEGIN')
+            for model in MODELS:
+                conn.execute('DELETE FROM account_positions WHERE account_total_id = ?', (f'{model}_{ts - args.interval}',))
+            deleted = time.perf_counter()
+            groups = {}
+            sources = [
+                history_rows(MODELS, [ts], args.interval, args.positions),
+                event_rows(rng, MODELS, 'trades_detailed', per_tick, ts - args.interval, ts, args.trades + batch * per_tick),
+                event_rows(rng, MODELS, 'ai_conversations', chats_per_tick, ts - args.interval, ts,
+                           args.conversations + batch * chats_per_tick)
+            ]
+            for source in sources:
+                for table, row in source:
+                    groups.setdefault(table, []).append(row)
+            for table, rows in groups.items():
+                factory.insert(table, rows)
+            inserts.append(time.perf_counter() - deleted)
+            conn.execute('COMMIT')
+            timings.append(time.perf_counter() - started)
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return {
+            'ms_per_batch': statistics.median(timings) * 1000,
+            'insert_ms_per_batch': statistics.median(inserts) * 1000,
+            'bytes_per_batch': (size() - before) / batches
+        }
+    finally:
+        conn.close()
+
+
+def print_report(report):
+    before, after = report['before'], report['after']
+    print(f'\n📊 Read queries (median of {report["repeat"]}, model {report["model"]}, last {HISTORY_DAYS} days)')
+    print(f'  {"query":<30} {"rows":>6} {"before ms":>10} {"after ms":>10} {"speedup":>9}')
+    for name, base in before['queries'].items():
+        new = after['queries'][name]
+        rows = '' if new['rows'] is None else f'{new["rows"]:,}'
+        speedup = base['ms'] / new['ms'] if new['ms'] else float('inf')
+        print(f'  {name:<30} {rows:>6} {base["ms"]:>10.3f} {new["ms"]:>10.3f} {speedup:>8.1f}x')
+        print(f'    before: {base["plan"]}')
+        print(f'    after:  {new["plan"]}')
+
+    print('\n✍️  Sync write cost')
+    print(f'  {"":<30} {"before":>12} {"after":>12} {"change":>9}')
+    for key, label in (
+        ('ms_per_batch', 'ms per sync batch'),
+        ('insert_ms_per_batch', '  of which inserts'),
+        ('bytes_per_batch', 'bytes written per batch')
+    ):
+        old, new = before['writes'][key], after['writes'][key]
+        change = (new - old) / old if old else 0.0
+        print(f'  {label:<30} {old:>12,.2f} {new:>12,.2f} {change:>+8.0%}')
+    print(f'  {"database size":<30} {before["db_bytes"]:>12,} {after["db_bytes"]:>12,} '
+          f'{(after["db_bytes"] - before["db_bytes"]) / before["db_bytes"]:>+8.0%}')
+
+    print('\n🗂️  Index sizes')
+    for name, size in after['indexes'].items():
+        print(f'  {name:<46} {"n/a (no dbstat)" if size is None else f"{size:,} bytes":>18}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the D1 read queries with and without the read indexes')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help='days of synthetic history')
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL, help='seconds between sync ticks')
+    parser.add_argument('--trades', type=int, default=DEFAULT_TRADES)
+    parser.add_argument('--conversations', type=int, default=DEFAULT_CONVERSATIONS)
+    parser.add_argument('--positions', type=int, default=DEFAULT_POSITIONS, help='open positions per account snapshot')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='runs per query (the median is reported)')
+    parser.add_argument('--batches', type=int, default=DEFAULT_BATCHES, help='sync batches for the write cost')
+    parser.add_argument('--output', help='write results as JSON')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print('🏁 Benchmarking D1 read queries...')
+    print(f'  {len(MODELS)} models, {args.days} days every {args.interval}s, '
+          f'{args.trades:,} trades, {args.conversations:,} conversations')
+
+    workdir = tempfile.mkdtemp(prefix='alphaarena-queries-')
+    try:
+        report = {'repeat': args.repeat, 'model': MODELS[0], 'args': vars(args)}
+        for label, indexed in (('before', False), ('after', True)):
+            path = os.path.join(workdir, f'{label}.db')
+            started = time.perf_counter()
+            now = build_database(path, args, indexed)
+            print(f'  built {label} database in {time.perf_counter() - started:.1f}s')
+
+            since = now - HISTORY_DAYS * 86400
+            last_tick = START_TIME + (args.days * 86400 - 1) // args.interval * args.interval
+            context = {'model': MODELS[0], 'since': since, 'now': now, 'account': f'{MODELS[0]}_{last_tick}'}
+            queries, indexes = bench_queries(path, context, args.repeat)
+            report[label] = {
+                'queries': queries,
+                'indexes': indexes,
+                'db_bytes': os.path.getsize(path),
+                'writes': bench_writes(path, args, now, args.batches)
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f'\n✅ Results saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
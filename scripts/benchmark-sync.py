@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the NOF1 -> D1 sync pipeline
+
+Times fetch_all_data() (replayed from disk over a local HTTP server), every
+section of generate_sql() and execution against a local SQLite target, and
+reports throughput, peak RSS and output bytes. Each case runs in its own
+interpreter so peak RSS is not polluted by earlier cases.
+
+  python scripts/benchmark-sync.py                          # synthetic 10k / 100k trades
+  python scripts/benchmark-sync.py --scales 10000,100000,1000000 --positions 5000
+  python scripts/benchmark-sync.py --fixture recorded.json  # from complete-sync-all.py --record
+  python scripts/benchmark-sync.py --repeat 3 --output bench.json --compare baseline.json
+  python scripts/benchmark-sync.py --workers 1,2,4,8                # generate_sql() on a process pool
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import d1sync.fetch
+from d1sync.backends import SqliteBackend
+from d1sync.fetch import ENDPOINTS, analytics_path
+from d1sync.sqlwriter import WRITE_BUFFER_BYTES, insert_statements, write_statements
+from d1sync.synthetic import synthetic_payload
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SCALES = '10000,100000'
+DEFAULT_POSITIONS = 2000
+
+# A case is a regression when it is this much slower than the baseline
+DEFAULT_TOLERANCE = 0.2
+
+
+def load_sync_module():
+    """Import complete-sync-all.py (its file name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location(
+        'complete_sync_all', os.path.join(SCRIPTS_DIR, 'complete-sync-all.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextlib.contextmanager
+def serve_payloads(data, models):
+    """Serve recorded payloads on localhost under the NOF1 endpoint paths"""
+    routes = {path: json.dumps(data.get(name, {})).encode('utf-8') for name, path in ENDPOINTS.items()}
+    for model in models:
+        routes[analytics_path(model)] = json.dumps(data['model_analytics'].get(model, {})).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = routes.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_fetch(sync, data):
+    with serve_payloads(data, data['model_analytics']) as base_url:
+        original = d1sync.fetch.NOF1_BASE
+        d1sync.fetch.NOF1_BASE = base_url
+        try:
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                fetched = sync.fetch_all_data()
+            seconds = time.perf_counter() - started
+        finally:
+            d1sync.fetch.NOF1_BASE = original
+
+    payload_bytes = sum(len(json.dumps(value, default=list)) for value in fetched.values())
+    return {'seconds': seconds, 'bytes': payload_bytes}
+
+
+def _counted(rows, counter):
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def bench_generate(sync, data, sql_file):
+    sections = []
+    with open(sql_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f:
+        with contextlib.redirect_stdout(io.StringIO()):
+            section_list = sync.sql_sections(data)
+
+        for label, table, rows in section_list:
+            counter = [0]
+            started = time.perf_counter()
+            statements, size = write_statements(f, insert_statements(table, _counted(rows, counter)))
+            seconds = time.perf_counter() - started
+            sections.append({
+                'section': label.split(' (')[0],
+                'table': table,
+                'rows': counter[0],
+                'statements': statements,
+                'bytes': size,
+                'seconds': seconds,
+                'rows_per_s': counter[0] / seconds if seconds else 0
+            })
+    return sections
+
+
+def bench_workers(sync, data, workers):
+    """
+    Time the whole generate_sql() with each worker count; every output must be
+    byte-identical to the single-process one.
+    """
+    timestamp = int(time.time())
+    results = []
+    reference = None
+    for count in workers:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            digest = hashlib.sha256()
+            for statement in sync.generate_sql(data, timestamp=timestamp, workers=count):
+                digest.update(statement.encode('utf-8'))
+        seconds = time.perf_counter() - started
+        if reference is None:
+            reference = (seconds, digest.hexdigest())
+        results.append({
+            'workers': count,
+            'seconds': seconds,
+            'speedup': reference[0] / seconds if seconds else 0,
+            'identical': digest.hexdigest() == reference[1]
+        })
+    return results
+
+
+def bench_execute(sql_file, rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SqliteBackend(os.path.join(tmp, 'bench.db'))
+        try:
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                ok = backend.execute_file(sql_file)
+            seconds = time.perf_counter() - started
+        finally:
+            backend.close()
+
+    if not ok:
+        raise RuntimeError('SQLite execution failed')
+    return {'seconds': seconds, 'rows_per_s': rows / seconds if seconds else 0}
+
+
+def run_case(case, positions, workers=()):
+    """Run one benchmark case in this process and return its results"""
+    sync = load_sync_module()
+
+    started = time.perf_counter()
+    if case.startswith('synthetic:'):
+        data = synthetic_payload(int(case.split(':', 1)[1]), positions)
+    else:
+        with open(case, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    load_seconds = time.perf_counter() - started
+    payload_rss = peak_rss_mb()
+
+    fetch = bench_fetch(sync, data)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_file = os.path.join(tmp, 'bench.sql')
+        sections = bench_generate(sync, data, sql_file)
+        rows = sum(section['rows'] for section in sections)
+        execute = bench_execute(sql_file, rows)
+
+    generate_seconds = sum(section['seconds'] for section in sections)
+    # The reference run for the speedups is always single-process
+    worker_counts = [1] + [count for count in workers if count != 1] if workers else []
+    return {
+        'case': case,
+        'trades': len(data['trades'].get('trades', [])),
+        'load_seconds': load_seconds,
+        'fetch': fetch,
+        'sections': sections,
+        'generate': {
+            'seconds': generate_seconds,
+            'rows': rows,
+            'bytes': sum(section['bytes'] for section in sections),
+            'rows_per_s': rows / generate_seconds if generate_seconds else 0
+        },
+        'execute': execute,
+        'workers': bench_workers(sync, data, worker_counts),
+        'payload_rss_mb': payload_rss,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_case_subprocess(case, positions, workers=()):
+    cmd = [sys.executable, os.path.abspath(__file__), '--case', case, '--positions', str(positions)]
+    if workers:
+        cmd += ['--workers', ','.join(map(str, workers))]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'{case} failed:\n{result.stderr}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_result(result):
+    print(f'\n📊 {result["case"]} ({result["trades"]:,} trades)')
+    print(f'  {"stage":<34} {"rows":>10} {"bytes":>14} {"seconds":>9} {"rows/s":>12}')
+
+    fetch = result['fetch']
+    print(f'  {"fetch_all_data (local replay)":<34} {"":>10} {fetch["bytes"]:>14,} {fetch["seconds"]:>9.3f} {"":>12}')
+    for section in result['sections']:
+        print(f'  {section["section"]:<34} {section["rows"]:>10,} {section["bytes"]:>14,} '
+              f'{section["seconds"]:>9.3f} {section["rows_per_s"]:>12,.0f}')
+
+    generate = result['generate']
+    execute = result['execute']
+    print(f'  {"generate_sql total":<34} {generate["rows"]:>10,} {generate["bytes"]:>14,} '
+          f'{generate["seconds"]:>9.3f} {generate["rows_per_s"]:>12,.0f}')
+    print(f'  {"execute (local SQLite)":<34} {generate["rows"]:>10,} {"":>14} '
+          f'{execute["seconds"]:>9.3f} {execute["rows_per_s"]:>12,.0f}')
+    for run in result.get('workers', []):
+        mark = '✓' if run['identical'] else '❌ output differs'
+        print(f'  {"generate_sql, " + str(run["workers"]) + " workers":<34} {"":>10} {"":>14} '
+              f'{run["seconds"]:>9.3f} {run["speedup"]:>11.2f}x {mark}')
+    print(f'  peak RSS {result["peak_rss_mb"]:.1f} MB (payload alone {result["payload_rss_mb"]:.1f} MB)')
+
+
+def compare(results, baseline_file, tolerance):
+    """Print regressions against a baseline run, returns True when none were found"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {item['case']: item for item in json.load(f)}
+
+    ok = True
+    print(f'\n🔎 Comparing against {baseline_file} (tolerance {tolerance:.0%})')
+    for result in results:
+        base = baseline.get(result['case'])
+        if base is None:
+            print(f'  {result["case"]}: no baseline')
+            continue
+
+        for stage in ('fetch', 'generate', 'execute'):
+            old = base[stage]['seconds']
+            new = result[stage]['seconds']
+            change = (new - old) / old if old else 0
+            regressed = change > tolerance
+            ok = ok and not regressed
+            mark = '❌' if regressed else '✓'
+            print(f'  {mark} {result["case"]} {stage}: {old:.3f}s -> {new:.3f}s ({change:+.0%})')
+    return ok
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the sync pipeline offline')
+    parser.add_argument('--fixture', action='append', default=[],
+                        help='recorded API data (complete-sync-all.py --record); repeatable')
+    parser.add_argument('--scales', default=DEFAULT_SCALES,
+                        help=f'comma-separated synthetic trade counts (default: {DEFAULT_SCALES}); empty to skip')
+    parser.add_argument('--positions', type=int, default=DEFAULT_POSITIONS,
+                        help=f'open positions in synthetic payloads (default: {DEFAULT_POSITIONS})')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='run each case N times and keep the fastest (less noise)')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', metavar='BASELINE', help='fail on regressions against a previous --output')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--workers', default='',
+                        help='comma-separated generate_sql() worker counts to time against one process, e.g. 1,2,4')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    workers = [int(count) for count in args.workers.split(',') if count.strip()]
+    if args.case:
+        print(json.dumps(run_case(args.case, args.positions, workers)))
+        return
+
+    cases = list(args.fixture)
+    cases += [f'synthetic:{int(scale)}' for scale in args.scales.split(',') if scale.strip()]
+
+    print('🏁 Benchmarking sync pipeline...')
+    results = []
+    for case in cases:
+        runs = [run_case_subprocess(case, args.positions, workers) for _ in range(max(1, args.repeat))]
+        result = min(runs, key=lambda run: run['generate']['seconds'] + run['execute']['seconds'])
+        print_result(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'\n✅ Results saved to {args.output}')
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+    if any(not run['identical'] for result in results for run in result.get('workers', [])):
+        print('\n❌ Parallel generate_sql() output differs from the single-process output')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
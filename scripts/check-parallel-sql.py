@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Check that generate_sql() on a process pool writes exactly the serial SQL
+
+Builds a synthetic payload whose /trades and /conversations arrays are
+streamed (JsonArray over a spooled body, as fetched) and where every
+--idless-every-th trade has no id, so trades_detailed falls back to
+positional trade-{timestamp}-{index} ids across split pieces. Renders it
+once in-process and once per --workers count, and exits 1 unless every
+output is byte-identical to the serial one and every trade kept its own row.
+
+  python scripts/check-parallel-sql.py
+  python scripts/check-parallel-sql.py --trades 20000 --workers 2,3,8
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+
+from d1sync.jsonstream import JsonArray
+from d1sync.parallel import CHUNK_ITEMS, fork_available
+from d1sync.synthetic import START_TIME, synthetic_payload
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Enough trades for trades_detailed to be split into several pieces
+DEFAULT_TRADES = 2 * CHUNK_ITEMS + 1000
+DEFAULT_WORKERS = '2,4'
+DEFAULT_IDLESS_EVERY = 3
+
+# The id (first column) of each row of a trades_detailed statement
+_ROW_ID = re.compile(r"(?:VALUES |\),)\('((?:[^']|'')*)'")
+
+
+def load_sync_module():
+    """Import complete-sync-all.py (its file name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location(
+        'complete_sync_all', os.path.join(SCRIPTS_DIR, 'complete-sync-all.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def streamed(payload, key):
+    """payload as the fetch stage hands a STREAMED endpoint over"""
+    return {key: JsonArray(io.BytesIO(json.dumps(payload).encode('utf-8')), key)}
+
+
+def check_payload(trades, idless_every):
+    data = synthetic_payload(trades)
+    for index, trade in enumerate(data['trades']['trades']):
+        if index % idless_every == 0:
+            del trade['id']
+    data['trades'] = streamed(data['trades'], 'trades')
+    data['conversations'] = streamed(data['conversations'], 'conversations')
+    return data
+
+
+def render(sync, data, workers):
+    """(sha256 of the SQL, trades_detailed ids written) of one generate_sql() run"""
+    digest = hashlib.sha256()
+    ids = set()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for statement in sync.generate_sql(data, timestamp=START_TIME, workers=workers):
+            digest.update(statement.encode('utf-8'))
+            if statement.startswith('INSERT OR REPLACE INTO trades_detailed'):
+                ids.update(_ROW_ID.findall(statement))
+    return digest.hexdigest(), ids
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Check parallel generate_sql() against the serial output')
+    parser.add_argument('--trades', type=int, default=DEFAULT_TRADES, help=f'synthetic trades (default: {DEFAULT_TRADES})')
+    parser.add_argument('--workers', default=DEFAULT_WORKERS,
+                        help=f'comma-separated worker counts to check (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--idless-every', type=int, default=DEFAULT_IDLESS_EVERY,
+                        help=f'drop the id of every Nth trade (default: {DEFAULT_IDLESS_EVERY})')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not fork_available():
+        print('⚠️  fork is unavailable here, generate_sql() always renders in-process')
+        return
+
+    sync = load_sync_module()
+    data = check_payload(args.trades, args.idless_every)
+    print(f'🔍 Checking generate_sql() with {args.trades:,} streamed trades '
+          f'(1 in {args.idless_every} without an id)...')
+
+    reference, ids = render(sync, data, 1)
+    ok = len(ids) == args.trades
+    print(f'  {"✓" if ok else "❌"} 1 worker: {len(ids):,} distinct trade ids')
+    for workers in (int(count) for count in args.workers.split(',') if count.strip()):
+        digest, ids = render(sync, data, workers)
+        identical = digest == reference and len(ids) == args.trades
+        ok = ok and identical
+        print(f'  {"✓" if identical else "❌ output differs,"} {workers} workers: {len(ids):,} distinct trade ids')
+
+    if not ok:
+        print('\n❌ Parallel generate_sql() output differs from the single-process output')
+        sys.exit(1)
+    print('\n✅ Parallel output is byte-identical to the serial output')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,424 +3,657 @@
 Complete D1 Sync Script - Syncs ALL NOF1 API data to D1
 """
 
-import requests
+import argparse
 import json
+import signal
 import sys
-from datetime import datetime
-import subprocess
-import tempfile
-import os
-
-MODELS = [
-    'qwen3-max',
-    'deepseek-chat-v3.1',
-    'claude-sonnet-4-5',
-    'grok-4',
-    'gemini-2.5-pro',
-    'gpt-5'
-]
-
-def fetch_all_data():
-    """Fetch data from all NOF1 APIs"""
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import chain, islice
+
+from d1sync import telemetry
+from d1sync.archive import TradeArchive
+from d1sync.backends import DEFAULT_SQLITE_PATH, create_backend, ensure_columns
+from d1sync.cache import ResponseCache
+from d1sync.candles import tick_candles
+from d1sync.execute import MAX_PARALLEL, SERIAL_BARRIER
+from d1sync.fetch import (
+    ENDPOINTS, MAX_IN_FLIGHT, analytics_job, analytics_path, create_session,
+    fetch_endpoints, print_timings
+)
+from d1sync.incremental import SeenIndex, TradeWatermark
+from d1sync.metrics import TradeColumns, daily_stats, model_stats
+from d1sync.models import ModelRegistry, signals
+from d1sync.parallel import rendered_sections
+from d1sync.payloads import PayloadArchive
+from d1sync.positions import (
+    CLOSED, MARKED, OPENED, RESIZED, PositionChanges, PositionSnapshot, account_model_id
+)
+from d1sync.readmodels import ReadModels
+from d1sync.resilience import DEFAULT_DEADLINE, CircuitBreakers, Deadline
+from d1sync.retention import COMPACT_INTERVAL, compact
+from d1sync.schema import conversation_id, extract_rows, validated
+from d1sync.scheduler import TICK_SECONDS, JobScheduler, sync_runs_rows
+from d1sync.sqlwriter import WRITE_BUFFER_BYTES, insert_statements, pack_statements, write_statements
+from d1sync.state import state_path
+from d1sync.telemetry import PROFILE_MODES, profiled
+
+SQL_FILE = 'complete-sync.sql'
+REPLAY_SQL_FILE = 'replay.sql'
+
+# Archived jobs a --replay rebuilds tables from
+REPLAY_JOBS = ('leaderboard', 'account_totals')
+
+# Daemon job that rolls up and prunes the history tables
+COMPACT_JOB = 'compact'
+
+# Tables written from each endpoint's payload. A stale payload is the last
+# good body, which landed with an earlier run, so its sections are skipped
+# instead of restamping old values with this run's cached_at.
+ENDPOINT_TABLES = {
+    'leaderboard': ('leaderboard_cache', 'leaderboard_history'),
+    'trades': ('recent_trades_cache', 'trades_detailed', 'model_performance_cache', 'daily_stats_cache'),
+    'since_inception': ('since_inception_values',),
+    'crypto_prices': ('crypto_prices_realtime', 'crypto_price_candles'),
+    'account_totals': ('account_totals', 'account_positions', 'position_marks'),
+    'conversations': ('ai_conversations',)
+}
+
+def fetch_jobs(jobs=None, cache=None, session=None, archive=None, fallback=None, breakers=None,
+               deadline=None, registry=None, full=False):
+    """
+    Fetch the given ENDPOINTS jobs (all by default), then fan out
+    analytics:<model> for the models that need it: with a ModelRegistry,
+    the active models that closed a trade, or whose equity moved by
+    models.EQUITY_TRIGGER dollars, since their analytics last landed (every active
+    model with full=True); without one, every model listed in the payloads.
+
+    Returns (data, timings). Jobs that were not requested, failed, or were
+    skipped by the ResponseCache come back as {} so their sections are skipped.
+    Bodies read are staged in the PayloadArchive, if one is given. A failed
+    job with a last good body in the fallback ResponseCache gets that body
+    instead and is listed in data['stale']; sql_sections() writes nothing
+    from it (see ENDPOINT_TABLES).
+    """
+    targets = {name: path for name, path in ENDPOINTS.items() if jobs is None or name in jobs}
+    # One budget for both waves
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    options = dict(
+        session=session, cache=cache, archive=archive, breakers=breakers, deadline=deadline, fallback=fallback
+    )
+
+    started = time.perf_counter()
+    payloads, timings = fetch_endpoints(targets, **options)
+    data = {name: payloads.get(name, {}) for name in ENDPOINTS}
+
+    now = int(time.time())
+    if registry is None:
+        models = sorted(signals(data, now)[0])
+    else:
+        registry.observe(data, now)
+        models = registry.due(now, full)
+    model_payloads, model_timings = fetch_endpoints(
+        {analytics_job(model): analytics_path(model) for model in models}, **options
+    ) if models else ({}, {})
+    payloads.update(model_payloads)
+    timings.update(model_timings)
+    print_timings(timings, time.perf_counter() - started)
+
+    skipped = [name for name, timing in timings.items() if timing.get('cache')]
+    if skipped:
+        print(f'\n↺ Skipping {len(skipped)} unchanged/not-due endpoints: {", ".join(sorted(skipped))}')
+
+    data['model_analytics'] = {model: payloads.get(analytics_job(model), {}) for model in models}
+    if registry is not None:
+        landed = [
+            model for model in models
+            if model_timings[analytics_job(model)]['error'] is None
+            and model_timings[analytics_job(model)]['cache'] != 'fresh'
+        ]
+        for model in landed:
+            registry.synced(model, data['model_analytics'][model], now)
+        print(f'\n🧭 {len(registry.active(now))} active models, analytics due for {len(models)}, '
+              f'fetched or unchanged for {len(landed)}')
+
+    data['stale'] = sorted(name for name, timing in timings.items() if timing.get('stale') is not None)
+    if data['stale']:
+        print(f'\n⚠️  Using the last good payload of {len(data["stale"])} failed endpoints: {", ".join(data["stale"])}')
+
+    return data, timings
+
+def fetch_all_data(cache=None, archive=None, fallback=None, breakers=None, deadline=None, registry=None,
+                   full=False):
+    """
+    Fetch data from all NOF1 APIs.
+
+    With a ResponseCache, endpoints that are not due yet or did not change
+    come back as {} so their sections are skipped. Failed endpoints fall
+    back to their last good body in the fallback cache, and a ModelRegistry
+    limits the per-model analytics to the models that changed (see fetch_jobs()).
+    """
     print('📡 Fetching data from all NOF1 APIs...\n')
+    data, _ = fetch_jobs(
+        cache=cache, archive=archive, fallback=fallback, breakers=breakers, deadline=deadline,
+        registry=registry, full=full
+    )
+    return data
 
-    data = {}
-
-    apis = {
-        'leaderboard': 'https://nof1.ai/api/leaderboard',
-        'trades': 'https://nof1.ai/api/trades',
-        'analytics': 'https://nof1.ai/api/analytics',
-        'conversations': 'https://nof1.ai/api/conversations',
-        'account_totals': 'https://nof1.ai/api/account-totals',
-        'since_inception': 'https://nof1.ai/api/since-inception-values',
-        'crypto_prices': 'https://nof1.ai/api/crypto-prices'
-    }
+def leaderboard_rows(data, timestamp):
+    yield from extract_rows('leaderboard', data['leaderboard'].get('leaderboard', []), timestamp=timestamp)
+
+def recent_trade_rows(data, timestamp):
+    yield from extract_rows('recent_trades', islice(data['trades'].get('trades', []), 50), timestamp=timestamp)
+
+def detailed_trade_rows(trades, timestamp, offset=0):
+    # offset numbers a split piece's id-less trades as in the whole list
+    yield from extract_rows('trades', trades, timestamp=timestamp, offset=offset)
+
+def conversation_rows(conversations, timestamp):
+    yield from extract_rows('conversations', conversations, timestamp=timestamp)
+
+def performance_rows(trade_columns, timestamp):
+    yield from extract_rows('model_stats', model_stats(trade_columns(), timestamp), timestamp=timestamp)
+
+def daily_stats_rows(trade_columns, timestamp):
+    yield from extract_rows('daily_stats', daily_stats(trade_columns()), timestamp=timestamp)
+
+def analytics_rows(data, timestamp):
+    stale = set(data.get('stale', ()))
+    entries = (
+        (model_id, analytics_data['analytics'][0])
+        for model_id, analytics_data in data['model_analytics'].items()
+        if analytics_data.get('analytics') and analytics_job(model_id) not in stale
+    )
+    yield from extract_rows('model_analytics', entries, timestamp=timestamp)
+
+def since_inception_rows(data, timestamp):
+    entries = data['since_inception'].get('sinceInceptionValues', [])
+    yield from extract_rows('since_inception', entries, timestamp=timestamp)
+
+def crypto_price_rows(data, timestamp):
+    prices = data['crypto_prices'].get('prices', {})
+    yield from extract_rows('crypto_prices', prices.items(), timestamp=timestamp)
+
+def candle_rows(data, timestamp):
+    """Every /crypto-prices tick folded into its 1m/5m/1h/1d candles"""
+    prices = data['crypto_prices'].get('prices', {})
+    ticks = (
+        (symbol, price, tick_time)
+        for symbol, price, tick_time, _ in extract_rows('crypto_prices', prices.items(), timestamp=timestamp)
+    )
+    yield from extract_rows('price_candles', tick_candles(ticks, timestamp), timestamp=timestamp)
+
+def account_total_rows(data, timestamp, positions=None):
+    """
+    One row per account snapshot. With a PositionChanges delta, snapshots
+    already written are skipped and positions_data is only stored when the
+    account's positions changed structurally.
+    """
+    if positions is None:
+        accounts = ((account, True) for account in data['account_totals'].get('accountTotals', []))
+    else:
+        accounts = positions.accounts
+
+    for account, structure_changed in accounts:
+        yield from extract_rows(
+            'account_totals', (account,), timestamp=timestamp, structure_changed=structure_changed
+        )
+
+def account_position_rows(data, timestamp, positions=None):
+    """
+    Every open position, or with a PositionChanges delta only the opened
+    and resized ones plus a zero-quantity row for each closed position.
+    """
+    if positions is not None:
+        for account_id, model_id, symbol, pos, kind in positions.positions:
+            if kind == CLOSED:
+                pos = dict(pos, quantity=0, unrealized_pnl=0, margin=0)
+            yield from extract_rows(
+                'account_positions', ((symbol, pos),),
+                timestamp=timestamp, account_id=account_id, model_id=model_id
+            )
+        return
 
-    for name, url in apis.items():
-        try:
-            print(f'  Fetching {name}...', end=' ')
-            r = requests.get(url, timeout=30)
-            data[name] = r.json()
-            print('✓')
-        except Exception as e:
-            print(f'✗ Error: {e}')
-            data[name] = {}
-
-    # Fetch per-model analytics
-    data['model_analytics'] = {}
-    for model in MODELS:
-        try:
-            print(f'  Fetching analytics for {model}...', end=' ')
-            r = requests.get(f'https://nof1.ai/api/analytics/{model}', timeout=30)
-            data['model_analytics'][model] = r.json()
-            print('✓')
-        except Exception as e:
-            print(f'✗ Error: {e}')
-            data['model_analytics'][model] = {}
+    for account in data['account_totals'].get('accountTotals', []):
+        account_id = account.get('id', '')
+        yield from extract_rows(
+            'account_positions', account.get('positions', {}).items(),
+            timestamp=timestamp, account_id=account_id, model_id=account_model_id(account_id)
+        )
+
+def position_mark_rows(positions, timestamp):
+    if positions is None:
+        return
+    for model_id, symbol, pos in positions.marks:
+        yield from extract_rows('position_marks', ((symbol, pos),), timestamp=timestamp, model_id=model_id)
+
+def leaderboard_history_rows(data, timestamp):
+    yield from extract_rows('leaderboard_history', data['leaderboard'].get('leaderboard', []), timestamp=timestamp)
+
+def read_model_rows(read_models, name, timestamp):
+    """Rows of one read model (curves, deltas or symbol_pnl) of a ReadModelChanges"""
+    if read_models is None:
+        return
+    source = {'curves': 'equity_curves', 'deltas': 'leaderboard_deltas', 'symbol_pnl': 'symbol_pnl'}[name]
+    yield from extract_rows(source, getattr(read_models, name), timestamp=timestamp)
+
+def registry_rows(registry, timestamp):
+    """model_registry rows of the models whose registry entry changed"""
+    yield from extract_rows('model_registry', registry or (), timestamp=timestamp)
+
+def sql_sections(data, detailed_trades=None, timestamp=None, conversations=None, positions=None,
+                 read_models=None, registry=None, trades_offset=0):
+    """
+    List the (label, table, rows) sections of a sync, in write order.
+
+    detailed_trades limits the trades_detailed section to the given trades
+    (incremental mode); by default every trade in the payload is written.
+    conversations does the same for ai_conversations, and a PositionChanges
+    delta in positions replaces the full account snapshot rewrite.
+    trades_offset is the position of detailed_trades[0] when they are one
+    split piece of the trades to write.
+    read_models is the ReadModelChanges of the run; without one the read
+    model sections are empty, and so is model_registry without the
+    ModelRegistry changes in registry. The sections of the stale endpoints
+    in data['stale'] are empty. Rows are lazy generators, nothing is
+    materialized here.
+    """
+    if timestamp is None:
+        timestamp = int(datetime.now().timestamp())
+
+    all_trades = data['trades'].get('trades', [])
+    if detailed_trades is None:
+        detailed_trades = all_trades
+        trades_label = f'3. Detailed trades (ALL {len(all_trades)} trades)'
+    else:
+        trades_label = f'3. Detailed trades ({len(detailed_trades)} new/changed of {len(all_trades)})'
 
-    return data
+    if conversations is None:
+        conversations = data['conversations'].get('conversations', [])
 
-def generate_sql(data):
-    """Generate SQL for all data"""
-    timestamp = int(datetime.now().timestamp())
-    sql_statements = []
+    if positions is None:
+        positions_label = '8. Account positions (ALL)'
+    else:
+        counts = positions.counts()
+        positions_label = (
+            f'8. Account positions ({counts[OPENED]} opened, {counts[RESIZED]} resized, '
+            f'{counts[CLOSED]} closed, {counts[MARKED]} mark-only)'
+        )
+
+    # Columnar trade arrays shared by the metrics sections, built on first use
+    # unless the read models already built them
+    columns = []
+    if read_models is not None and read_models.columns is not None:
+        columns.append(read_models.columns)
+
+    def trade_columns():
+        if not columns:
+            columns.append(TradeColumns(all_trades))
+        return columns[0]
+
+    sections = [
+        ('1. Leaderboard cache', 'leaderboard_cache', leaderboard_rows(data, timestamp)),
+        ('2. Recent trades cache', 'recent_trades_cache', recent_trade_rows(data, timestamp)),
+        (trades_label, 'trades_detailed', detailed_trade_rows(detailed_trades, timestamp, trades_offset)),
+        ('4. Model performance cache', 'model_performance_cache', performance_rows(trade_columns, timestamp)),
+        ('4. Daily stats cache', 'daily_stats_cache', daily_stats_rows(trade_columns, timestamp)),
+        ('5. Model analytics (detailed)', 'model_analytics', analytics_rows(data, timestamp)),
+        ('6. Since inception values', 'since_inception_values', since_inception_rows(data, timestamp)),
+        ('7. Crypto prices', 'crypto_prices_realtime', crypto_price_rows(data, timestamp)),
+        ('7. Crypto price candles', 'crypto_price_candles', candle_rows(data, timestamp)),
+        ('8. Account totals', 'account_totals', account_total_rows(data, timestamp, positions)),
+        (positions_label, 'account_positions', account_position_rows(data, timestamp, positions)),
+        ('8. Position marks', 'position_marks', position_mark_rows(positions, timestamp)),
+        ('9. Leaderboard history snapshots', 'leaderboard_history', leaderboard_history_rows(data, timestamp)),
+        ('10. AI conversations', 'ai_conversations', conversation_rows(conversations, timestamp)),
+        ('11. Equity curves (read model)', 'model_equity_curves', read_model_rows(read_models, 'curves', timestamp)),
+        ('11. Leaderboard deltas (read model)', 'leaderboard_deltas', read_model_rows(read_models, 'deltas', timestamp)),
+        ('11. Symbol PnL (read model)', 'model_symbol_pnl', read_model_rows(read_models, 'symbol_pnl', timestamp)),
+        ('12. Model registry', 'model_registry', registry_rows(registry, timestamp))
+    ]
+
+    stale = {table for name in data.get('stale', ()) for table in ENDPOINT_TABLES.get(name, ())}
+    return [
+        (f'{label} (stale payload, skipped)', table, iter(())) if table in stale else (label, table, rows)
+        for label, table, rows in sections
+    ]
+
+def split_sizes(data, detailed_trades, conversations, positions):
+    """Input item counts of the sections a worker pool may split by item range"""
+    if positions is None:
+        position_items = len(data['account_totals'].get('accountTotals', []))
+    else:
+        position_items = len(positions.positions)
+    return {
+        'trades_detailed': len(detailed_trades),
+        'account_positions': position_items,
+        'ai_conversations': len(conversations)
+    }
 
+def split_inputs(table, start, stop, data, detailed_trades, conversations, positions):
+    """sql_sections() inputs narrowed to items start:stop of one split section"""
+    if table == 'trades_detailed':
+        detailed_trades = detailed_trades[start:stop]
+    elif table == 'ai_conversations':
+        conversations = conversations[start:stop]
+    elif table == 'account_positions':
+        if positions is None:
+            accounts = data['account_totals'].get('accountTotals', [])
+            data = dict(data, account_totals={'accountTotals': accounts[start:stop]})
+        else:
+            sliced = PositionChanges()
+            sliced.positions = positions.positions[start:stop]
+            positions = sliced
+    return data, detailed_trades, conversations, positions
+
+def generate_sql(data, detailed_trades=None, timestamp=None, conversations=None, positions=None,
+                 read_models=None, registry=None, workers=1):
+    """
+    Generate SQL for all data, yielding one statement at a time.
+
+    With workers > 1 rows are rendered on a process pool, the large
+    sections split by item range; the statements are the same as serially.
+    """
     print('\n📝 Generating SQL statements...\n')
+    if timestamp is None:
+        timestamp = int(datetime.now().timestamp())
+
+    sizes = {}
+    if workers > 1:
+        # Workers slice these by item range, so streamed inputs are read once here
+        # (which also records the conversation IDs a SeenIndex selection yields)
+        if detailed_trades is None:
+            detailed_trades = data['trades'].get('trades', [])
+        if conversations is None:
+            conversations = data['conversations'].get('conversations', [])
+        detailed_trades = detailed_trades if isinstance(detailed_trades, list) else list(detailed_trades)
+        conversations = conversations if isinstance(conversations, list) else list(conversations)
+        sizes = split_sizes(data, detailed_trades, conversations, positions)
+
+    sections = sql_sections(data, detailed_trades, timestamp, conversations, positions, read_models, registry)
+
+    def build(index, start, stop):
+        _, table, rows = sections[index]
+        if start is not None:
+            inputs = split_inputs(table, start, stop, data, detailed_trades, conversations, positions)
+            _, _, rows = sql_sections(
+                *inputs[:2], timestamp, *inputs[2:], read_models, registry, trades_offset=start
+            )[index]
+        return table, validated(table, rows)
+
+    tables = [table for _, table, _ in sections]
+    rendered = rendered_sections(tables, [sizes.get(table) for table in tables], build, workers)
+    for (label, table, _), (_, rows) in zip(sections, rendered):
+        print(f'  {label}...')
+        with telemetry.span('section', table, label=label) as span:
+            for statement in pack_statements(table, span.count(rows)):
+                span.add(bytes=len(statement))
+                yield statement
+
+def parse_time(text):
+    """Epoch seconds, or an ISO date/time (UTC unless it has an offset)"""
+    if text.isdigit():
+        return int(text)
+    moment = datetime.fromisoformat(text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+def parse_window(text):
+    """FROM..TO as (start, end) with start <= t < end; either side may be left empty"""
+    if '..' not in text:
+        raise argparse.ArgumentTypeError('expected FROM..TO, e.g. 2025-10-20..2025-10-22')
+    start, end = text.split('..', 1)
+    try:
+        return (parse_time(start) if start else None, parse_time(end) if end else None)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def replay_sections(archive, start=None, end=None):
+    """
+    (label, table, rows) sections rebuilding leaderboard_history,
+    account_positions and position_marks from the archived payloads.
+
+    Account snapshots are delta-encoded against each other like a live run,
+    starting from an empty snapshot at the beginning of the window.
+    """
+    marks = []
+
+    def history_rows():
+        for timestamp, _, payload in archive.replay(['leaderboard'], start, end):
+            yield from leaderboard_history_rows({'leaderboard': payload}, timestamp)
+
+    def positions_rows():
+        snapshot = PositionSnapshot(None)
+        for timestamp, _, payload in archive.replay(['account_totals'], start, end):
+            changes = snapshot.diff(payload.get('accountTotals', []))
+            snapshot.commit()
+            yield from account_position_rows(None, timestamp, changes)
+            marks.extend(position_mark_rows(changes, timestamp))
+
+    def mark_rows():
+        # Filled while the account_positions section is consumed
+        yield from marks
+
+    return [
+        ('9. Leaderboard history snapshots', 'leaderboard_history', history_rows()),
+        ('8. Account positions', 'account_positions', positions_rows()),
+        ('8. Position marks', 'position_marks', mark_rows())
+    ]
+
+class IncrementalState:
+    """
+    Per-target record of what already landed: trade watermark, seen
+    conversation IDs, the last position snapshot, the read models and the
+    model registry.
+    Tracked per backend so local runs never advance D1's state; committed
+    only after a write succeeds. Committing also appends newly closed trades to the local TradeArchive.
+    """
+
+    def __init__(self, backend):
+        self.watermark = TradeWatermark(
+            f'trades-watermark-{backend.key}.json', seen=SeenIndex(f'trade-ids-{backend.key}.db')
+        )
+        self.seen = SeenIndex(f'conversation-ids-{backend.key}.db')
+        self.positions = PositionSnapshot(f'positions-snapshot-{backend.key}.json')
+        self.read_models = ReadModels(f'read-models-{backend.key}.json')
+        # Observed while fetching (fetch_jobs()), so the per-model analytics follow it
+        self.models = ModelRegistry(f'model-registry-{backend.key}.json')
+        # Shared by all targets: it records what the API returned, not what landed
+        self.archive = TradeArchive()
+        self._archive_trades = None
+
+    def select(self, data, timestamp, full=False):
+        """generate_sql() keyword arguments limiting each section to what changed"""
+        trades = data['trades'].get('trades', [])
+        detailed_trades = self.watermark.select(trades, full=full)
+        # New and changed trades cover every newly closed one; an empty archive is backfilled
+        self._archive_trades = detailed_trades if len(self.archive) else trades
+        return {
+            'detailed_trades': detailed_trades,
+            'conversations': self.seen.select(
+                data['conversations'].get('conversations', []),
+                key=lambda item: conversation_id(item, timestamp),
+                full=full
+            ),
+            'positions': self.positions.diff(data['account_totals'].get('accountTotals', []), full=full),
+            'read_models': self.read_models.diff(data, timestamp, full=full),
+            'registry': self.models.changes(full=full)
+        }
+
+    def commit(self):
+        self.watermark.commit()
+        self.seen.commit()
+        self.positions.commit()
+        self.read_models.commit()
+        self.models.commit()
+        if self._archive_trades is not None:
+            appended = self.archive.append(self._archive_trades)
+            if appended:
+                print(f'🗄️  Archived {appended} closed trades ({len(self.archive)} in {self.archive.path})')
+            self._archive_trades = None
+
+    def close(self):
+        self.watermark.seen.close()
+        self.seen.close()
+        self.archive.close()
+
+def write_sql_file(data, changes, timestamp, extra_statements=None, workers=1):
+    """
+    Generate SQL straight into the review file, which is also what gets
+    executed. extra_statements go below a SERIAL_BARRIER: they only run
+    once all of the data has landed.
+    """
+    statements = generate_sql(data, timestamp=timestamp, workers=workers, **changes)
+    if extra_statements is not None:
+        statements = chain(statements, [SERIAL_BARRIER], extra_statements)
+    with telemetry.span('stage', 'generate') as span, \
+            open(SQL_FILE, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f:
+        count, size = write_statements(f, statements)
+        count -= extra_statements is not None
+        span.add(bytes=size)
+        span.attrs['statements'] = count
+    print(f'\n✅ Generated {count} SQL statements, saved to {SQL_FILE} ({size} bytes)')
+    return count
+
+def execute_sql_file(backend, sql_file, parallel=1):
+    """Execute SQL file against the selected backend (D1 by default)"""
+    print(f'\n💾 Executing SQL in {backend.key}...')
+
+    with telemetry.span('stage', 'execute', target=backend.key) as span:
+        if backend.execute_file(sql_file, parallel=parallel):
+            print('✅ SQL executed successfully!')
+            return True
+        span.error = 'execution failed'
+
+    print('❌ SQL execution failed!')
+    return False
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Sync ALL NOF1 API data to D1')
+    parser.add_argument('--full', action='store_true',
+                        help='rewrite every trade instead of only new/changed ones')
+    parser.add_argument('--resume', action='store_true',
+                        help=f'skip fetching and finish executing the existing {SQL_FILE}')
+    parser.add_argument('--parallel', type=int, default=1,
+                        help=f'chunks to execute concurrently (max {MAX_PARALLEL})')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes rendering SQL sections (default: 1, in-process)')
+    parser.add_argument('--target', choices=('d1', 'sqlite'), default='d1',
+                        help='where to apply the SQL (default: remote D1)')
+    parser.add_argument('--sqlite-db', default=DEFAULT_SQLITE_PATH,
+                        help='database file for --target sqlite')
+    parser.add_argument('--fixture', metavar='PATH',
+                        help='load API data from a recorded JSON file instead of fetching')
+    parser.add_argument('--record', metavar='PATH',
+                        help='save the fetched API data to a JSON file (implies --no-cache)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='fetch and write every endpoint, ignoring the response cache')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE,
+                        help=f'seconds the fetch stage may take, retries included (default: {DEFAULT_DEADLINE}, 0 = none)')
+    parser.add_argument('--compact', action='store_true',
+                        help='roll up and prune leaderboard_history/account_positions after syncing')
+    parser.add_argument('--daemon', action='store_true',
+                        help='keep running and sync each endpoint on its own schedule')
+    parser.add_argument('--replay', metavar='FROM..TO', type=parse_window,
+                        help='rebuild leaderboard_history, account_positions and position_marks '
+                             'from archived payloads (epoch seconds or ISO dates, TO exclusive)')
+    parser.add_argument('--status', action='store_true',
+                        help='print the last-run state recorded by --daemon and exit')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='profile the run with cProfile (cpu) or tracemalloc (memory)')
+    return parser.parse_args()
 
-    # 1. Leaderboard Cache
-    print('  1. Leaderboard cache...')
-    for entry in data['leaderboard'].get('leaderboard', []):
-        sql = f"""INSERT OR REPLACE INTO leaderboard_cache (
-    model_id, num_trades, sharpe, win_dollars, num_losses,
-    lose_dollars, return_pct, equity, num_wins, rank, cached_at
-) VALUES (
-    '{entry.get('id', '')}',
-    {entry.get('num_trades', 0)},
-    {entry.get('sharpe', 0)},
-    {entry.get('win_dollars', 0)},
-    {entry.get('num_losses', 0)},
-    {entry.get('lose_dollars', 0)},
-    {entry.get('return_pct', 0)},
-    {entry.get('equity', 0)},
-    {entry.get('num_wins', 0)},
-    0,
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # 2. Recent Trades Cache (50)
-    print('  2. Recent trades cache...')
-    for i, trade in enumerate(data['trades'].get('trades', [])[:50]):
-        trade_id = trade.get('id', f'trade-{timestamp}-{i}')
-        trade_json = json.dumps(trade).replace("'", "''")
-        pnl = trade.get('realized_net_pnl', trade.get('pnl'))
-        pnl_sql = pnl if pnl is not None else 'NULL'
-        entry_time = trade.get('entry_time', timestamp)
-        exit_time = trade.get('exit_time')
-        exit_time_sql = exit_time if exit_time else 'NULL'
-
-        sql = f"""INSERT OR REPLACE INTO recent_trades_cache (
-    id, model_id, symbol, side, entry_time, exit_time,
-    realized_net_pnl, trade_data, cached_at
-) VALUES (
-    '{trade_id}',
-    '{trade.get('model_id', '')}',
-    '{trade.get('symbol', '')}',
-    '{trade.get('side', '')}',
-    {entry_time},
-    {exit_time_sql},
-    {pnl_sql},
-    '{trade_json}',
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # 3. Detailed Trades (ALL)
-    print(f'  3. Detailed trades (ALL {len(data["trades"].get("trades", []))} trades)...')
-    for i, trade in enumerate(data['trades'].get('trades', [])):
-        trade_id = trade.get('id', f'trade-{timestamp}-{i}')
-        model_id = trade.get('model_id', '')
-        symbol = trade.get('symbol', '')
-        side = trade.get('side', '')
-        trade_type = trade.get('trade_type', side)
-        leverage = trade.get('leverage', 1)
-        quantity = trade.get('quantity', trade.get('entry_sz', 0))
-        confidence = trade.get('confidence', 0)
-
-        entry_time = trade.get('entry_time', timestamp)
-        entry_human_time = trade.get('entry_human_time', '')
-        entry_price = trade.get('entry_price', 0)
-        entry_sz = trade.get('entry_sz', 0)
-        entry_oid = trade.get('entry_oid', '')
-        entry_tid = trade.get('entry_tid', '')
-        entry_commission = trade.get('entry_commission_dollars', 0)
-        entry_closed_pnl = trade.get('entry_closed_pnl', 0)
-        entry_crossed = 1 if trade.get('entry_crossed') else 0
-
-        exit_time = trade.get('exit_time')
-        exit_time_sql = exit_time if exit_time else 'NULL'
-        exit_human_time = trade.get('exit_human_time', '')
-        exit_price = trade.get('exit_price', 0)
-        exit_sz = trade.get('exit_sz', 0)
-        exit_oid = trade.get('exit_oid', '')
-        exit_tid = trade.get('exit_tid', '')
-        exit_commission = trade.get('exit_commission_dollars', 0)
-        exit_closed_pnl = trade.get('exit_closed_pnl', 0)
-        exit_crossed = 1 if trade.get('exit_crossed') else 0
-
-        realized_net_pnl = trade.get('realized_net_pnl')
-        realized_net_pnl_sql = realized_net_pnl if realized_net_pnl is not None else 'NULL'
-        realized_gross_pnl = trade.get('realized_gross_pnl')
-        realized_gross_pnl_sql = realized_gross_pnl if realized_gross_pnl is not None else 'NULL'
-        total_commission = trade.get('total_commission_dollars', 0)
-        trade_id_field = trade.get('trade_id', trade_id)
-
-        sql = f"""INSERT OR REPLACE INTO trades_detailed (
-    id, model_id, symbol, side, trade_type, leverage, quantity, confidence,
-    entry_time, entry_human_time, entry_price, entry_sz, entry_oid, entry_tid,
-    entry_commission_dollars, entry_closed_pnl, entry_crossed,
-    exit_time, exit_human_time, exit_price, exit_sz, exit_oid, exit_tid,
-    exit_commission_dollars, exit_closed_pnl, exit_crossed,
-    realized_net_pnl, realized_gross_pnl, total_commission_dollars,
-    trade_id, cached_at
-) VALUES (
-    '{trade_id}', '{model_id}', '{symbol}', '{side}', '{trade_type}', {leverage}, {quantity}, {confidence},
-    {entry_time}, '{entry_human_time}', {entry_price}, {entry_sz}, '{entry_oid}', '{entry_tid}',
-    {entry_commission}, {entry_closed_pnl}, {entry_crossed},
-    {exit_time_sql}, '{exit_human_time}', {exit_price}, {exit_sz}, '{exit_oid}', '{exit_tid}',
-    {exit_commission}, {exit_closed_pnl}, {exit_crossed},
-    {realized_net_pnl_sql}, {realized_gross_pnl_sql}, {total_commission},
-    '{trade_id_field}', {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # 4. Model Performance Cache
-    print('  4. Model performance cache...')
-    for entry in data['leaderboard'].get('leaderboard', []):
-        model_id = entry.get('id', '')
-        num_trades = entry.get('num_trades', 0)
-        equity = entry.get('equity', 0)
-        wins = entry.get('num_wins', 0)
-        total = entry.get('num_trades', 0)
-        win_rate = (wins / total * 100) if total > 0 else 0
-
-        sql = f"""INSERT OR REPLACE INTO model_performance_cache (
-    model_id, today_trades, today_pnl, today_win_rate,
-    week_trades, week_pnl, week_win_rate,
-    total_trades, total_pnl, overall_win_rate, sharpe_ratio, cached_at
-) VALUES (
-    '{model_id}',
-    {num_trades}, {entry.get('return_pct', 0)}, {win_rate},
-    {num_trades}, {entry.get('return_pct', 0)}, {win_rate},
-    {num_trades}, {entry.get('return_pct', 0)}, {win_rate},
-    {entry.get('sharpe', 0)}, {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # 5. Model Analytics (full data for each model)
-    print('  5. Model analytics (detailed)...')
-    for model_id, analytics_data in data['model_analytics'].items():
-        analytics = analytics_data.get('analytics', [])
-        if not analytics:
-            continue
-
-        entry = analytics[0]
-
-        # Extract all metrics
-        fee_pnl = entry.get('fee_pnl_moves_breakdown_table', {})
-        winners_losers = entry.get('winners_losers_breakdown_table', {})
-        signals = entry.get('signals_breakdown_table', {})
-        overall = entry.get('overall_trades_overview_table', {})
-        longs_shorts = entry.get('longs_shorts_breakdown_table', {})
-        invocation = entry.get('invocation_breakdown_table', {})
-
-        sql = f"""INSERT OR REPLACE INTO model_analytics (
-    model_id, updated_at, last_trade_exit_time,
-    overall_pnl_with_fees, overall_pnl_without_fees, total_fees_paid,
-    avg_net_pnl, avg_gross_pnl, std_net_pnl, std_gross_pnl,
-    biggest_net_gain, biggest_net_loss,
-    win_rate, avg_winners_net_pnl, avg_losers_net_pnl,
-    total_trades, num_long_trades, num_short_trades,
-    avg_holding_period_mins, median_holding_period_mins,
-    avg_size_of_trade_notional, median_size_of_trade_notional,
-    total_signals, num_long_signals, num_short_signals,
-    avg_confidence, median_confidence, avg_leverage,
-    sharpe_ratio, cached_at
-) VALUES (
-    '{model_id}',
-    {entry.get('updated_at', timestamp)},
-    {entry.get('last_trade_exit_time', 'NULL') or 'NULL'},
-    {fee_pnl.get('overall_pnl_with_fees', 0)},
-    {fee_pnl.get('overall_pnl_without_fees', 0)},
-    {fee_pnl.get('total_fees_paid', 0)},
-    {fee_pnl.get('avg_net_pnl', 0)},
-    {fee_pnl.get('avg_gross_pnl', 0)},
-    {fee_pnl.get('std_net_pnl', 0)},
-    {fee_pnl.get('std_gross_pnl', 0)},
-    {fee_pnl.get('biggest_net_gain', 0)},
-    {fee_pnl.get('biggest_net_loss', 0)},
-    {winners_losers.get('win_rate', 0)},
-    {winners_losers.get('avg_winners_net_pnl', 0)},
-    {winners_losers.get('avg_losers_net_pnl', 0)},
-    {overall.get('total_trades', 0)},
-    {longs_shorts.get('num_long_trades', 0)},
-    {longs_shorts.get('num_short_trades', 0)},
-    {overall.get('avg_holding_period_mins', 0)},
-    {overall.get('median_holding_period_mins', 0)},
-    {overall.get('avg_size_of_trade_notional', 0)},
-    {overall.get('median_size_of_trade_notional', 0)},
-    {signals.get('total_signals', 0)},
-    {signals.get('num_long_signals', 0)},
-    {signals.get('num_short_signals', 0)},
-    {signals.get('avg_confidence', 0)},
-    {signals.get('median_confidence', 0)},
-    {signals.get('avg_leverage', 0)},
-    {winners_losers.get('win_rate', 0)},
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # 6. Since Inception Values
-    print('  6. Since inception values...')
-    for entry in data['since_inception'].get('sinceInceptionValues', []):
-        sql = f"""INSERT OR REPLACE INTO since_inception_values (
-    id, model_id, nav_since_inception, inception_date, num_invocations, cached_at
-) VALUES (
-    '{entry.get('id', '')}',
-    '{entry.get('model_id', '')}',
-    {entry.get('nav_since_inception', 0)},
-    {entry.get('inception_date', timestamp)},
-    {entry.get('num_invocations', 0)},
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # 7. Crypto Prices
-    print('  7. Crypto prices...')
-    for symbol, price_data in data['crypto_prices'].get('prices', {}).items():
-        sql = f"""INSERT OR REPLACE INTO crypto_prices_realtime (
-    symbol, price, timestamp, cached_at
-) VALUES (
-    '{symbol}',
-    {price_data.get('price', 0)},
-    {price_data.get('timestamp', timestamp)},
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # 8. Account Totals & Positions
-    print('  8. Account totals and positions...')
-    for account in data['account_totals'].get('accountTotals', []):
-        account_id = account.get('id', '')
-        model_id = account_id.rsplit('_', 1)[0] if '_' in account_id else account_id
-
-        positions_json = json.dumps(account.get('positions', {})).replace("'", "''")
-        realized_pnl = account.get('realized_pnl', 0)
-
-        # Calculate unrealized PnL from positions
-        unrealized_pnl = 0
-        positions = account.get('positions', {})
-        for pos_data in positions.values():
-            unrealized_pnl += pos_data.get('unrealized_pnl', 0)
-
-        total_equity = realized_pnl + unrealized_pnl
-
-        sql = f"""INSERT OR REPLACE INTO account_totals (
-    id, model_id, timestamp, realized_pnl, unrealized_pnl, total_equity,
-    positions_data, cached_at
-) VALUES (
-    '{account_id}',
-    '{model_id}',
-    {account.get('timestamp', timestamp)},
-    {realized_pnl},
-    {unrealized_pnl},
-    {total_equity},
-    '{positions_json}',
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-        # Individual positions
-        for symbol, pos in positions.items():
-            pos_id = f'{account_id}_{symbol}_{timestamp}'
-            exit_plan_json = json.dumps(pos.get('exit_plan', {})).replace("'", "''")
-
-            sql = f"""INSERT OR REPLACE INTO account_positions (
-    id, account_total_id, model_id, symbol, quantity,
-    entry_price, current_price, unrealized_pnl, closed_pnl,
-    leverage, margin, liquidation_price, entry_time,
-    confidence, risk_usd, exit_plan, cached_at
-) VALUES (
-    '{pos_id}',
-    '{account_id}',
-    '{model_id}',
-    '{symbol}',
-    {pos.get('quantity', 0)},
-    {pos.get('entry_price', 0)},
-    {pos.get('current_price', 0)},
-    {pos.get('unrealized_pnl', 0)},
-    {pos.get('closed_pnl', 0)},
-    {pos.get('leverage', 1)},
-    {pos.get('margin', 0)},
-    {pos.get('liquidation_price', 0)},
-    {pos.get('entry_time', timestamp)},
-    {pos.get('confidence', 0)},
-    {pos.get('risk_usd', 0)},
-    '{exit_plan_json}',
-    {timestamp}
-);"""
-            sql_statements.append(sql)
-
-    # 9. Leaderboard History
-    print('  9. Leaderboard history snapshots...')
-    for entry in data['leaderboard'].get('leaderboard', []):
-        history_id = f'{entry.get("id", "")}-{timestamp}'
-        wins = entry.get('num_wins', 0)
-        total = entry.get('num_trades', 0)
-        win_rate = (wins / total * 100) if total > 0 else 0
-
-        sql = f"""INSERT OR REPLACE INTO leaderboard_history (
-    id, model_id, timestamp, rank, equity, return_pct,
-    sharpe, num_trades, win_rate, cached_at
-) VALUES (
-    '{history_id}',
-    '{entry.get('id', '')}',
-    {timestamp},
-    0,
-    {entry.get('equity', 0)},
-    {entry.get('return_pct', 0)},
-    {entry.get('sharpe', 0)},
-    {entry.get('num_trades', 0)},
-    {win_rate},
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    print(f'\n✅ Generated {len(sql_statements)} SQL statements')
-    return '\n\n'.join(sql_statements)
-
-def execute_sql_file(sql_content):
-    """Execute SQL file using wrangler"""
-    print('\n💾 Executing SQL in D1 database...')
-
-    # Create temporary SQL file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False, encoding='utf-8') as f:
-        f.write(sql_content)
-        sql_file = f.name
+def main():
+    args = parse_args()
+    if args.status:
+        print(json.dumps(daemon_scheduler().status(), indent=2))
+        return
 
-    try:
-        # Execute SQL file with wrangler
-        cmd = ['pnpm', 'wrangler', 'd1', 'execute', 'alphaarena-db', '--remote', '--file', sql_file]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    backend = create_backend(args.target, args.sqlite_db)
 
-        if result.returncode == 0:
-            print('✅ SQL executed successfully!')
-            # Print last 500 chars of output
-            output = result.stdout
-            if len(output) > 500:
-                print('...' + output[-500:])
+    try:
+        ensure_columns(backend)
+        with profiled(args.profile):
+            if args.replay:
+                replay(args, backend)
+            elif args.daemon:
+                run_daemon(args, backend)
             else:
-                print(output)
-        else:
-            print('❌ SQL execution failed!')
-            print(result.stderr)
-            return False
+                run(args, backend)
+    finally:
+        backend.close()
 
+def run(args, backend):
+    """One sync; its spans and SyncResult are exported even when it fails"""
+    recorder = telemetry.reset()
+    try:
+        sync_once(args, backend)
     finally:
-        # Clean up temp file
+        export_metrics(recorder)
+
+def export_metrics(recorder):
+    result = recorder.sync_result()
+    recorder.export(result)
+    print(f'📈 {result["durationMs"]} ms, {len(result["errors"])} errors; metrics in {telemetry.METRICS_DIR}')
+    return result
+
+def load_data(args, backend, models):
+    """
+    Fetch all data, or replay a recorded fixture, and record it if asked.
+    Returns (data, sync timestamp, the ResponseCache to commit or None).
+    """
+    cache = None
+    if args.fixture:
+        print(f'📂 Loading API data from {args.fixture}...')
+        with open(args.fixture, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        timestamp = int(datetime.now().timestamp())
+    else:
+        # A full resync or a recording needs every payload, cached or not,
+        # and the analytics of every active model; the cache still stands
+        # in for endpoints that fail
+        cache = ResponseCache(state_path(f'http-cache-{backend.key}'))
+        fresh_cache = None if (args.no_cache or args.full or args.record) else cache
+        every_model = bool(args.full or args.record)
+        payloads = PayloadArchive()
         try:
-            os.unlink(sql_file)
-        except:
-            pass
-
-    return True
+            with telemetry.span('stage', 'fetch'):
+                data = fetch_all_data(
+                    fresh_cache, payloads, cache, CircuitBreakers(), args.deadline or None, models, every_model
+                )
+            timestamp = int(datetime.now().timestamp())
+            # Indexed right away: the payloads are worth keeping even if this sync fails
+            archived = payloads.commit(timestamp)
+        finally:
+            payloads.close()
+        print(f'🗃️  Archived {archived} payloads in {payloads.path}')
+
+    if args.record:
+        with open(args.record, 'w', encoding='utf-8') as f:
+            # Streamed arrays are written out item by item
+            json.dump(data, f, default=list)
+        print(f'📼 API data recorded to {args.record}')
+
+    return data, timestamp, cache
+
+def sync_once(args, backend):
+    if args.resume:
+        # The watermark is not advanced here; the next run re-sends those
+        # trades, which is harmless because every write is an upsert.
+        print(f'🔁 Resuming execution of {SQL_FILE}...')
+        if not execute_sql_file(backend, SQL_FILE, args.parallel):
+            sys.exit(1)
+        print('\n✅ Resumed sync finished successfully!')
+        return
 
-def main():
     print('🚀 Starting COMPLETE D1 sync...\n')
     print('This will sync ALL data from NOF1 APIs:\n')
     print('  ✓ Leaderboard')
     print('  ✓ Trades (ALL detailed trades)')
-    print('  ✓ Analytics (per-model)')
+    print('  ✓ Analytics (per-model, for models that changed)')
     print('  ✓ Conversations')
     print('  ✓ Account Totals & Positions')
     print('  ✓ Since Inception Values')
@@ -428,23 +661,170 @@ def main():
     print('  ✓ Historical Snapshots')
     print('\n' + '='*60 + '\n')
 
-    # Fetch all data
-    data = fetch_all_data()
+    # Only new or changed trades, conversations and positions are written unless --full
+    state = IncrementalState(backend)
+    try:
+        data, timestamp, cache = load_data(args, backend, state.models)
+        write_sql_file(data, state.select(data, timestamp, args.full), timestamp, workers=args.workers)
+
+        # Execute SQL
+        if not execute_sql_file(backend, SQL_FILE, args.parallel):
+            print('\n❌ Sync failed!')
+            sys.exit(1)
+        state.commit()
+    finally:
+        state.close()
+
+    if cache is not None:
+        cache.commit()
+    if args.compact:
+        with telemetry.span('stage', COMPACT_JOB) as span:
+            if compact(backend, int(time.time())) is None:
+                span.error = 'compaction failed'
+                sys.exit(1)
+    print('\n✅ Complete sync finished successfully!')
+
+def replay(args, backend):
+    """Regenerate the history tables of the --replay window from the payload archive"""
+    start, end = args.replay
+    recorder = telemetry.reset()
+    archive = PayloadArchive()
+    try:
+        fetches = archive.fetches(REPLAY_JOBS, start, end)
+        print(f'⏪ Replaying {len(fetches)} archived payloads '
+              f'({archive.stats()["payloads"]} distinct in {archive.path})...')
+        if not fetches:
+            return
+
+        started = time.perf_counter()
+        with telemetry.span('stage', 'generate') as span, \
+                open(REPLAY_SQL_FILE, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f:
+            def statements():
+                for label, table, rows in replay_sections(archive, start, end):
+                    print(f'  {label}...')
+                    with telemetry.span('section', table, label=label) as section:
+                        for statement in insert_statements(table, section.count(validated(table, rows))):
+                            section.add(bytes=len(statement))
+                            yield statement
+            count, size = write_statements(f, statements())
+            span.add(bytes=size)
+            span.attrs['statements'] = count
+
+        rows = sum(section.rows for section in recorder.of_kind('section'))
+        seconds = time.perf_counter() - started
+        print(f'\n✅ Generated {rows} rows in {count} statements ({size} bytes) in {seconds:.2f}s, saved to {REPLAY_SQL_FILE}')
+
+        if not execute_sql_file(backend, REPLAY_SQL_FILE, args.parallel):
+            print('\n❌ Replay failed!')
+            sys.exit(1)
+        print('\n✅ Replay finished successfully!')
+    finally:
+        archive.close()
+        recorder.export(recorder.sync_result())
+
+def all_jobs():
+    # Per-model analytics are fanned out by the ticks that fetch, see fetch_jobs()
+    return list(ENDPOINTS)
+
+def daemon_scheduler():
+    return JobScheduler(all_jobs() + [COMPACT_JOB], intervals={COMPACT_JOB: COMPACT_INTERVAL})
+
+def run_daemon(args, backend):
+    """
+    Long-running sync: one warm connection pool, each job on its own interval.
+
+    Every tick fetches only the jobs that are due, writes them as one SQL
+    batch and stamps sync_runs so the worker cron skips what was just synced.
+    """
+    scheduler = daemon_scheduler()
+    session = create_session(MAX_IN_FLIGHT)
+    state = IncrementalState(backend)
+    fallback = ResponseCache(state_path(f'http-cache-{backend.key}'))
+    cache = None if args.no_cache else fallback
+    breakers = CircuitBreakers()
+    payloads = PayloadArchive()
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        print('\n🛑 Stopping after the current tick...')
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    print(f'🔄 Sync daemon started for {backend.key} ({len(scheduler.jobs)} jobs)')
+    try:
+        while not stop.is_set():
+            due = scheduler.due()
+            if due:
+                run_tick(args, backend, scheduler, session, state, cache, fallback, breakers, payloads, due)
+            stop.wait(min(TICK_SECONDS, max(1.0, scheduler.seconds_until_next())))
+    finally:
+        session.close()
+        state.close()
+        payloads.close()
 
-    # Generate SQL
-    sql = generate_sql(data)
+def run_tick(args, backend, scheduler, session, state, cache, fallback, breakers, payloads, due):
+    """One daemon tick; exports its spans with the jobs that were not due as skipped"""
+    recorder = telemetry.reset()
+    try:
+        sync_tick(args, backend, scheduler, session, state, cache, fallback, breakers, payloads, due)
+    finally:
+        not_due = set(scheduler.jobs) - set(due)
+        cached = {span.name for span in recorder.of_kind('fetch') if span.attrs.get('cache')}
+        recorder.export(recorder.sync_result(skipped=not_due | cached))
+
+def sync_tick(args, backend, scheduler, session, state, cache, fallback, breakers, payloads, due):
+    started = time.time()
+    print(f'\n⏰ {datetime.now().isoformat(timespec="seconds")} running {len(due)} due jobs: {", ".join(sorted(due))}')
+
+    if COMPACT_JOB in due:
+        due = [job for job in due if job != COMPACT_JOB]
+        compact_started = time.perf_counter()
+        with telemetry.span('stage', COMPACT_JOB) as span:
+            error = None if compact(backend, int(started)) is not None else 'compaction failed'
+            span.error = error
+        scheduler.mark(COMPACT_JOB, started, time.perf_counter() - compact_started, error)
+        if not due:
+            scheduler.save()
+            return
+
+    with telemetry.span('stage', 'fetch'):
+        data, timings = fetch_jobs(
+            due, cache=cache, session=session, archive=payloads, fallback=fallback,
+            breakers=breakers, deadline=args.deadline or None, registry=state.models, full=args.full
+        )
+    payloads.commit(int(started))
+    fetched = [job for job in due if not timings[job]['error']]
+    for job in due:
+        if timings[job]['error']:
+            scheduler.mark(job, started, timings[job]['seconds'], timings[job]['error'])
+
+    ok = True
+    if fetched:
+        timestamp = int(started)
+        changes = state.select(data, timestamp, args.full)
+        write_started = time.perf_counter()
+        # The sync_runs stamps ride in the same file, below a barrier, so they only land once the data did
+        count = write_sql_file(data, changes, timestamp, insert_statements(
+            'sync_runs', sync_runs_rows(fetched, started)
+        ), workers=args.workers)
+        ok = count == 0 or execute_sql_file(backend, SQL_FILE, args.parallel)
+        write_seconds = time.perf_counter() - write_started
+
+        for job in fetched:
+            if ok:
+                scheduler.mark(job, started, timings[job]['seconds'] + write_seconds)
+            else:
+                scheduler.mark(job, started, timings[job]['seconds'] + write_seconds, 'write failed')
 
-    # Save SQL to file
-    with open('complete-sync.sql', 'w', encoding='utf-8') as f:
-        f.write(sql)
-    print(f'\n✅ SQL saved to complete-sync.sql ({len(sql)} bytes)')
+        if ok:
+            state.commit()
+            # Also the cache itself, unless --no-cache
+            fallback.commit()
 
-    # Execute SQL
-    if execute_sql_file(sql):
-        print('\n✅ Complete sync finished successfully!')
-    else:
-        print('\n❌ Sync failed!')
-        sys.exit(1)
+    scheduler.save()
+    print(f'{"✅" if ok else "❌"} Tick finished in {time.time() - started:.1f}s')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,4 @@
+"""
+Shared building blocks for the NOF1 -> D1 Python sync scripts
+(complete-sync-all.py, sync-d1-batch.py)
+"""
@@ -0,0 +1,326 @@
+"""
+Local columnar archive of closed trades
+
+Every closed trade the sync sees is appended once to a directory of
+fixed-width column files, so the full history can be analysed offline
+without pulling trades_detailed back out of D1:
+
+    <column>.bin     little-endian float64 per numeric column (NUMERIC_COLUMNS)
+                     or int32 dictionary codes (STRING_COLUMNS)
+    manifest.jsonl   one line per append: row count after it, strings that
+                     were added to each dictionary, and the segment's
+                     min/max times and model/symbol codes
+    ids.db           SQLite map trade id -> row, for de-duplication
+
+The manifest is the commit point. Column data is written first and a row
+is only visible once a manifest line covers it; on open, column bytes and
+ids beyond the last committed row (left by an interrupted append) are
+dropped. Reads go through np.memmap, and scan() skips whole segments by
+their manifest ranges before touching the column files, so a query's
+memory is bounded by SCAN_CHUNK rows plus its result.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from array import array
+
+import numpy as np
+
+from d1sync.incremental import trade_hash
+from d1sync.metrics import to_number
+from d1sync.state import state_path
+
+ARCHIVE_DIR = 'trade-archive'
+MANIFEST_FILE = 'manifest.jsonl'
+IDS_FILE = 'ids.db'
+
+# Column -> (payload fields, first present wins)
+NUMERIC_COLUMNS = {
+    'entry_time': ('entry_time',),
+    'exit_time': ('exit_time',),
+    'entry_price': ('entry_price',),
+    'exit_price': ('exit_price',),
+    'quantity': ('quantity', 'entry_sz'),
+    'leverage': ('leverage',),
+    'confidence': ('confidence',),
+    'realized_net_pnl': ('realized_net_pnl', 'pnl'),
+    'realized_gross_pnl': ('realized_gross_pnl',),
+    'total_commission_dollars': ('total_commission_dollars',)
+}
+STRING_COLUMNS = ('model_id', 'symbol', 'side')
+
+NUMERIC_DTYPE = np.dtype('<f8')
+CODE_DTYPE = np.dtype('<i4')
+
+# Columns with per-segment min/max in the manifest
+TIME_COLUMNS = ('entry_time', 'exit_time')
+
+# Rows read per step of a scan
+SCAN_CHUNK = 1 << 20
+
+# Ids looked up per SQLite query while de-duplicating
+ID_BATCH = 500
+
+
+def _value(trade, fields):
+    for field in fields:
+        if field in trade:
+            return to_number(trade[field])
+    return np.nan
+
+
+def _names(value):
+    if value is None:
+        return None
+    return {value} if isinstance(value, str) else set(value)
+
+
+class TradeArchive:
+    """Append-only columnar store of closed trades"""
+
+    def __init__(self, path=None):
+        self.path = path or state_path(ARCHIVE_DIR)
+        os.makedirs(self.path, exist_ok=True)
+        self.rows = 0
+        self.segments = []
+        self.dictionaries = {column: [] for column in STRING_COLUMNS}
+        self._codes = {column: {} for column in STRING_COLUMNS}
+        self._maps = {}
+
+        self._db = sqlite3.connect(os.path.join(self.path, IDS_FILE))
+        self._db.execute('CREATE TABLE IF NOT EXISTS ids (row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE)')
+        self._load_manifest()
+        self._recover()
+
+    def _file(self, column):
+        return os.path.join(self.path, f'{column}.bin')
+
+    def _dtype(self, column):
+        return CODE_DTYPE if column in STRING_COLUMNS else NUMERIC_DTYPE
+
+    def _load_manifest(self):
+        path = os.path.join(self.path, MANIFEST_FILE)
+        committed = 0
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn last line of an interrupted append
+                        break
+                    committed += len(line)
+                    self._apply(entry)
+        except FileNotFoundError:
+            return
+        if committed != os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(committed)
+
+    def _apply(self, entry):
+        self.segments.append(entry)
+        self.rows = entry['rows']
+        for column, strings in entry['strings'].items():
+            codes = self._codes[column]
+            for value in strings:
+                codes[value] = len(codes)
+                self.dictionaries[column].append(value)
+
+    def _recover(self):
+        """Drop column bytes and ids written after the last committed row"""
+        for column in (*NUMERIC_COLUMNS, *STRING_COLUMNS):
+            path = self._file(column)
+            size = self.rows * self._dtype(column).itemsize
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+            if os.path.getsize(path) != size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        with self._db:
+            self._db.execute('DELETE FROM ids WHERE row >= ?', (self.rows,))
+
+    def __len__(self):
+        return self.rows
+
+    def _known(self, ids):
+        known = set()
+        for i in range(0, len(ids), ID_BATCH):
+            chunk = ids[i:i + ID_BATCH]
+            placeholders = ','.join('?' * len(chunk))
+            known.update(row[0] for row in self._db.execute(
+                f'SELECT id FROM ids WHERE id IN ({placeholders})', chunk
+            ))
+        return known
+
+    def append(self, trades):
+        """
+        Archive the closed trades that are not in the archive yet.
+
+        Open trades are skipped until they close. Returns the number of
+        trades appended; all of them become visible at once.
+        """
+        candidates = {}
+        for trade in trades:
+            exit_time = to_number(trade.get('exit_time'))
+            if np.isnan(exit_time) or not exit_time:
+                continue
+            trade_id = str(trade.get('id') or '') or trade_hash(trade)
+            candidates.setdefault(trade_id, trade)
+
+        known = self._known(list(candidates))
+        new = [(trade_id, trade) for trade_id, trade in candidates.items() if trade_id not in known]
+        if not new:
+            return 0
+
+        numeric = {column: array('d') for column in NUMERIC_COLUMNS}
+        codes = {column: array('i') for column in STRING_COLUMNS}
+        # Strings new to a dictionary, coded after the existing ones; the
+        # dictionaries themselves only grow once the manifest line is written
+        added = {column: {} for column in STRING_COLUMNS}
+        for _, trade in new:
+            for column, fields in NUMERIC_COLUMNS.items():
+                numeric[column].append(_value(trade, fields))
+            for column in STRING_COLUMNS:
+                value = str(trade.get(column) or '')
+                code = self._codes[column].get(value)
+                if code is None:
+                    code = added[column].setdefault(value, len(self._codes[column]) + len(added[column]))
+                codes[column].append(code)
+
+        for column, values in (*numeric.items(), *codes.items()):
+            with open(self._file(column), 'ab') as f:
+                f.write(np.frombuffer(values, dtype=values.typecode).astype(self._dtype(column)).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        first = self.rows
+        with self._db:
+            self._db.executemany(
+                'INSERT INTO ids (row, id) VALUES (?, ?)',
+                ((first + i, trade_id) for i, (trade_id, _) in enumerate(new))
+            )
+
+        ranges = {}
+        for column in TIME_COLUMNS:
+            times = np.frombuffer(numeric[column], dtype=np.float64)
+            if not np.isnan(times).all():
+                ranges[column] = [float(np.nanmin(times)), float(np.nanmax(times))]
+
+        entry = {
+            'rows': first + len(new),
+            'added': len(new),
+            'appended_at': int(time.time()),
+            'strings': {column: list(values) for column, values in added.items() if values},
+            'ranges': ranges,
+            'model_id': sorted(set(codes['model_id'])),
+            'symbol': sorted(set(codes['symbol']))
+        }
+        with open(os.path.join(self.path, MANIFEST_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._apply(entry)
+        self._maps.clear()
+        return len(new)
+
+    def column(self, name):
+        """Read-only memory map of a whole column (dictionary codes for string columns)"""
+        if name not in self._maps:
+            if self.rows == 0:
+                self._maps[name] = np.empty(0, dtype=self._dtype(name))
+            else:
+                self._maps[name] = np.memmap(self._file(name), dtype=self._dtype(name), mode='r', shape=(self.rows,))
+        return self._maps[name]
+
+    def _lookup(self, column, names):
+        if names is None:
+            return None
+        codes = self._codes[column]
+        return {codes[name] for name in names if name in codes}
+
+    def _candidate_ranges(self, models, symbols, start, end, time_column):
+        """Row ranges of the segments that may hold matching rows, merged"""
+        ranges = []
+        first = 0
+        for segment in self.segments:
+            last = segment['rows']
+            bounds = segment['ranges'].get(time_column)
+            skip = (
+                (models is not None and models.isdisjoint(segment['model_id']))
+                or (symbols is not None and symbols.isdisjoint(segment['symbol']))
+                or (bounds is not None and start is not None and bounds[1] < start)
+                or (bounds is not None and end is not None and bounds[0] >= end)
+            )
+            if not skip:
+                if ranges and ranges[-1][1] == first:
+                    ranges[-1][1] = last
+                else:
+                    ranges.append([first, last])
+            first = last
+        return ranges
+
+    def select(self, model=None, symbol=None, start=None, end=None, time_column='exit_time'):
+        """
+        Row numbers of the trades matching every given filter, in archive order.
+
+        model and symbol take one name or a collection of names; start and
+        end bound time_column as start <= t < end (epoch seconds).
+        """
+        models = self._lookup('model_id', _names(model))
+        symbols = self._lookup('symbol', _names(symbol))
+        if models == set() or symbols == set():
+            return np.empty(0, dtype=np.int64)
+
+        model_codes = np.fromiter(models, dtype=CODE_DTYPE) if models is not None else None
+        symbol_codes = np.fromiter(symbols, dtype=CODE_DTYPE) if symbols is not None else None
+
+        selected = []
+        for first, last in self._candidate_ranges(models, symbols, start, end, time_column):
+            for lo in range(first, last, SCAN_CHUNK):
+                hi = min(lo + SCAN_CHUNK, last)
+                mask = np.ones(hi - lo, dtype=bool)
+                if model_codes is not None:
+                    mask &= np.isin(self.column('model_id')[lo:hi], model_codes)
+                if symbol_codes is not None:
+                    mask &= np.isin(self.column('symbol')[lo:hi], symbol_codes)
+                if start is not None or end is not None:
+                    times = self.column(time_column)[lo:hi]
+                    if start is not None:
+                        mask &= times >= start
+                    if end is not None:
+                        mask &= times < end
+                selected.append(np.flatnonzero(mask) + lo)
+        return np.concatenate(selected) if selected else np.empty(0, dtype=np.int64)
+
+    def scan(self, model=None, symbol=None, start=None, end=None, columns=None, time_column='exit_time'):
+        """
+        Columns of the trades matching the select() filters.
+
+        Returns {column: array} for columns (all by default) plus 'row';
+        string columns are decoded to object arrays of their values.
+        """
+        rows = self.select(model, symbol, start, end, time_column)
+        result = {'row': rows}
+        for name in columns or (*STRING_COLUMNS, *NUMERIC_COLUMNS):
+            values = np.asarray(self.column(name)[rows])
+            if name in STRING_COLUMNS:
+                values = np.array(self.dictionaries[name], dtype=object)[values] if len(values) else values.astype(object)
+            result[name] = values
+        return result
+
+    def ids(self, rows):
+        """Trade ids of the given row numbers"""
+        found = {}
+        rows = [int(row) for row in rows]
+        for i in range(0, len(rows), ID_BATCH):
+            chunk = rows[i:i + ID_BATCH]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(self._db.execute(f'SELECT row, id FROM ids WHERE row IN ({placeholders})', chunk))
+        return [found.get(row) for row in rows]
+
+    def close(self):
+        self._maps.clear()
+        self._db.close()
@@ -0,0 +1,206 @@
+"""
+Pluggable execution targets for generated sync SQL
+
+Every backend exposes the same small interface:
+
+    key                       stable name used to scope local sync state
+    execute_file(path, ...)   apply a generated .sql file, returns bool
+    query(sql, params=())     run a read query, returns a list of dicts
+    batch([(sql, params)])    run several statements in one round trip,
+                              returns the rows of each
+    close()
+
+D1HttpBackend is the production path (remote D1 over the HTTP API, used
+when CLOUDFLARE_API_TOKEN and CLOUDFLARE_ACCOUNT_ID are set);
+WranglerBackend reaches the same database through wrangler otherwise.
+SqliteBackend applies the D1 schema to a local SQLite file and runs the
+whole script in one transaction, for offline dry-runs, diffs and benchmarks.
+"""
+
+import json
+import os
+import re
+import sqlite3
+
+from d1sync import d1http
+from d1sync.execute import (
+    CHUNK_BYTES, D1_DATABASE, execute_in_chunks, iter_statements, run_wrangler, wrangler_executor
+)
+from d1sync.sqlwriter import sql_literal
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Applied in order; d1-schema.sql wins for the tables both files define, and
+# the read-path indexes go on once every table exists
+SCHEMA_FILES = (
+    os.path.join(REPO_ROOT, 'migrations', 'd1-schema.sql'),
+    os.path.join(REPO_ROOT, 'migrations', 'd1-sync-tables.sql'),
+    os.path.join(REPO_ROOT, 'migrations', 'd1-read-indexes.sql')
+)
+
+DEFAULT_SQLITE_PATH = 'alphaarena-local.db'
+
+# Columns added to existing tables after they were first created: CREATE
+# TABLE IF NOT EXISTS leaves older databases without them.
+# (table, column, declared type); worker-cron.ts ensureTables() adds the same.
+ADDED_COLUMNS = (
+    ('model_performance_cache', 'max_drawdown', 'REAL'),
+)
+
+
+class WranglerBackend:
+    """Remote D1 database driven through `wrangler d1 execute`"""
+
+    def __init__(self, database=D1_DATABASE, remote=True, chunk_bytes=CHUNK_BYTES):
+        self.database = database
+        self.remote = remote
+        self.chunk_bytes = chunk_bytes
+        self.key = f'd1-{database}' if remote else f'd1-local-{database}'
+
+    def execute_file(self, sql_file, parallel=1):
+        executor = wrangler_executor(self.database, self.remote)
+        return execute_in_chunks(sql_file, executor, self.chunk_bytes, parallel)
+
+    def query(self, sql, params=()):
+        if params:
+            raise ValueError('wrangler --command does not support bound parameters')
+
+        args = ['d1', 'execute', self.database, '--json', '--command', sql]
+        if self.remote:
+            args.append('--remote')
+        result = run_wrangler(args)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or 'wrangler query failed')
+
+        batches = json.loads(result.stdout)
+        return batches[0].get('results', []) if batches else []
+
+    def batch(self, statements):
+        """One wrangler call for every statement, with the parameters inlined as literals"""
+        statements = list(statements)
+        if not statements:
+            return []
+        sql = '\n'.join(_inline(statement, params) for statement, params in statements)
+
+        args = ['d1', 'execute', self.database, '--json', '--command', sql]
+        if self.remote:
+            args.append('--remote')
+        result = run_wrangler(args)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or 'wrangler query failed')
+        return [batch.get('results', []) for batch in json.loads(result.stdout)]
+
+    def close(self):
+        pass
+
+
+# Quoted strings and identifiers; a ? inside them is not a placeholder
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+def _inline(sql, params):
+    """sql with each ? outside quotes replaced by the literal of the next parameter"""
+    pieces = _QUOTED.split(sql)
+    expected = sum(piece.count('?') for piece in pieces[::2])
+    if expected != len(params):
+        raise ValueError(f'expected {expected} parameters, got {len(params)}')
+
+    values = iter(params)
+    inlined = []
+    for index, piece in enumerate(pieces):
+        if index % 2:
+            inlined.append(piece)
+            continue
+        parts = piece.split('?')
+        inlined.append(parts[0])
+        for part in parts[1:]:
+            inlined.append(sql_literal(next(values)))
+            inlined.append(part)
+    sql = ''.join(inlined).strip()
+    return sql if sql.endswith(';') else sql + ';'
+
+
+class D1HttpBackend:
+    """Remote D1 database through the D1 HTTP API over a pooled session"""
+
+    def __init__(self, database=D1_DATABASE, chunk_bytes=d1http.HTTP_CHUNK_BYTES, client=None):
+        self.database = database
+        self.chunk_bytes = chunk_bytes
+        # Same database as WranglerBackend, so the same sync state
+        self.key = f'd1-{database}'
+        self.client = client or d1http.D1Client(database)
+
+    def execute_file(self, sql_file, parallel=1):
+        return execute_in_chunks(sql_file, self.client.executor(), self.chunk_bytes, parallel)
+
+    def query(self, sql, params=()):
+        return self.client.query(sql, params)
+
+    def batch(self, statements):
+        return self.client.batch(statements)
+
+    def close(self):
+        self.client.close()
+
+
+class SqliteBackend:
+    """Local SQLite database with the D1 schema applied"""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, schema_files=SCHEMA_FILES):
+        self.path = path
+        self.key = f'sqlite-{os.path.basename(path)}'
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        for schema_file in schema_files:
+            with open(schema_file, 'r', encoding='utf-8') as f:
+                self.conn.executescript(f.read())
+
+    def execute_file(self, sql_file, parallel=1):
+        """Apply every statement of sql_file in a single transaction"""
+        count = 0
+        try:
+            self.conn.execute('BEGIN')
+            with open(sql_file, 'rb') as f:
+                for _, statement in iter_statements(f):
+                    self.conn.execute(statement.decode('utf-8'))
+                    count += 1
+            self.conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            self.conn.execute('ROLLBACK')
+            print(f'  ✗ statement {count + 1}: {e}')
+            return False
+
+        print(f'  {count} statements applied to {self.path}')
+        return True
+
+    def query(self, sql, params=()):
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def batch(self, statements):
+        return [self.query(sql, params) for sql, params in statements]
+
+    def close(self):
+        self.conn.close()
+
+
+def ensure_columns(backend, columns=ADDED_COLUMNS):
+    """Add the ADDED_COLUMNS a backend's existing tables lack"""
+    for table, column, kind in columns:
+        existing = {row['name'] for row in backend.query(f'PRAGMA table_info({table})')}
+        if existing and column not in existing:
+            backend.batch([(f'ALTER TABLE {table} ADD COLUMN {column} {kind}', ())])
+            print(f'🧱 Added {table}.{column}')
+
+
+def create_backend(target, sqlite_path=DEFAULT_SQLITE_PATH):
+    """
+    Build a backend by name: 'd1' (remote D1, over HTTP when the API
+    credentials are set, else through wrangler) or 'sqlite' (local file)
+    """
+    if target == 'd1':
+        return D1HttpBackend() if d1http.configured() else WranglerBackend()
+    if target == 'sqlite':
+        return SqliteBackend(sqlite_path)
+    raise ValueError(f'unknown target: {target}')
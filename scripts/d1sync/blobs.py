@@ -0,0 +1,108 @@
+"""
+Compact encoding of the JSON documents stored next to broken-out columns
+
+recent_trades_cache.trade_data and account_totals.positions_data keep the
+raw payload for clients that want more than the columns. Stored as
+json.dumps() output they repeat, on every row, whitespace after each
+separator and the fields the row already holds as columns. compact_json()
+drops both:
+
+    trade_data       the item without the keys whose value is stored, equal
+                     and of the same type, in the row's columns
+                     (TRADE_DATA_COLUMNS)
+    positions_data   each position without its `symbol`, which is the key
+                     it is stored under
+
+and, when SYNC_BLOB_COMPRESS_BYTES is set, deflates documents at least that
+large into COMPRESSED_PREFIX + base64. Compressed documents are smaller but
+no longer readable with json_extract(), so compression is off by default.
+
+Plain JSON stays valid input: decode_blob() and decode_positions() (and
+decodeBlob() / decodePositions() in src/lib/database/blobs.ts for the API
+routes) read rows written in either encoding.
+"""
+
+import base64
+import json
+import os
+import zlib
+
+# A JSON document never starts with this
+COMPRESSED_PREFIX = 'z:'
+
+# Documents at least this many bytes long are deflated; 0 disables compression
+COMPRESS_MIN_BYTES = int(os.environ.get('SYNC_BLOB_COMPRESS_BYTES') or 0)
+
+# recent_trades_cache columns also present, under the same name, in trade_data
+TRADE_DATA_COLUMNS = ('id', 'model_id', 'symbol', 'side', 'entry_time', 'exit_time', 'realized_net_pnl')
+
+
+def compact_json(value, compress_min_bytes=None):
+    """value as JSON without whitespace, deflated when large enough"""
+    if compress_min_bytes is None:
+        compress_min_bytes = COMPRESS_MIN_BYTES
+    text = json.dumps(value, separators=(',', ':'))
+    if not compress_min_bytes or len(text) < compress_min_bytes:
+        return text
+
+    packed = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(text.encode('utf-8'), 9)).decode('ascii')
+    return packed if len(packed) < len(text) else text
+
+
+def _same(value, column):
+    return type(value) is type(column) and value == column
+
+
+def trade_data(item, *columns):
+    """
+    trade_data for a trade whose row holds the TRADE_DATA_COLUMNS values
+    `columns`; keys equal to their column are left out
+    """
+    stored = dict(zip(TRADE_DATA_COLUMNS, columns))
+    return compact_json({
+        key: value for key, value in item.items()
+        if not (key in stored and _same(value, stored[key]))
+    })
+
+
+def positions_data(positions):
+    """positions_data for a symbol -> position map (lists are kept as they are)"""
+    if isinstance(positions, dict):
+        positions = {
+            symbol: {key: value for key, value in position.items() if not (key == 'symbol' and value == symbol)}
+            if isinstance(position, dict) else position
+            for symbol, position in positions.items()
+        }
+    return compact_json(positions)
+
+
+def _loads(text):
+    if text.startswith(COMPRESSED_PREFIX):
+        text = zlib.decompress(base64.b64decode(text[len(COMPRESSED_PREFIX):])).decode('utf-8')
+    return json.loads(text)
+
+
+def decode_blob(text, columns=None):
+    """
+    A stored document as written by either encoding; keys left out because
+    they equal a column are restored from `columns` (column -> row value).
+    A key the payload never had comes back as the column's non-NULL value.
+    """
+    if text is None:
+        return None
+    value = _loads(text)
+    if isinstance(value, dict) and columns:
+        for key, column in columns.items():
+            if key not in value and column is not None:
+                value[key] = column
+    return value
+
+
+def decode_positions(text):
+    """A stored positions_data map with each position's symbol restored"""
+    positions = decode_blob(text)
+    if isinstance(positions, dict):
+        for symbol, position in positions.items():
+            if isinstance(position, dict):
+                position.setdefault('symbol', symbol)
+    return positions
@@ -0,0 +1,143 @@
+"""
+On-disk NOF1 response cache with conditional requests
+
+Entries are keyed by URL and hold the raw body (gzip), ETag/Last-Modified
+and a content hash. Each endpoint also has a minimum refresh interval that
+mirrors the runJob() cadence in worker-cron.ts. Inside that interval the
+endpoint is not requested at all.
+
+Updates are staged and only written by commit(), once the generated SQL
+has landed. A payload that never reached D1 is therefore never reported
+as unchanged.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from d1sync.state import state_path
+
+# Cadences from worker-cron.ts, in seconds
+FIVE_MINUTES = 5 * 60
+ONE_HOUR = 60 * 60
+ONE_DAY = 24 * 60 * 60
+
+REFRESH_INTERVALS = {
+    'leaderboard': FIVE_MINUTES,
+    'trades': FIVE_MINUTES,
+    'analytics': ONE_HOUR,
+    'conversations': FIVE_MINUTES,
+    'account_totals': FIVE_MINUTES,
+    'since_inception': ONE_DAY,
+    'crypto_prices': FIVE_MINUTES
+}
+ANALYTICS_MODEL_INTERVAL = ONE_HOUR
+
+# Cron runs are never exactly on the minute; treat "almost due" as due
+SCHEDULE_SLACK = 30
+
+CACHE_DIR = 'http-cache'
+
+
+def refresh_interval(name):
+    """Minimum seconds between two requests for a fetch job"""
+    if name.startswith('analytics:'):
+        return ANALYTICS_MODEL_INTERVAL
+    return REFRESH_INTERVALS.get(name, FIVE_MINUTES)
+
+
+def body_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResponseCache:
+    """URL-keyed response cache stored under .sync-state/http-cache"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or state_path(CACHE_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body.gz'
+
+    def lookup(self, url):
+        """Committed metadata for url, or None"""
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def read_body(self, url):
+        """Committed raw body for url, or None"""
+        _, body_path = self._paths(url)
+        try:
+            with gzip.open(body_path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def is_fresh(self, entry, name, now=None):
+        """True when the endpoint was checked within its refresh interval"""
+        if entry is None:
+            return False
+        now = time.time() if now is None else now
+        return now - entry.get('checked_at', 0) < refresh_interval(name) - SCHEDULE_SLACK
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def stage(self, url, body, digest, etag=None, last_modified=None):
+        """Record a new body (bytes or a spooled file) for url, written on commit()"""
+        with self._lock:
+            self._pending[url] = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'hash': digest,
+                'checked_at': time.time(),
+                'body': body
+            }
+
+    def touch(self, url, entry):
+        """Record that url was revalidated without changes"""
+        with self._lock:
+            self._pending[url] = dict(entry, checked_at=time.time(), body=None)
+
+    def commit(self):
+        """Persist every staged entry"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for url, entry in pending.items():
+            meta_path, body_path = self._paths(url)
+            body = entry.pop('body')
+            if body is not None:
+                tmp = body_path + '.tmp'
+                with gzip.open(tmp, 'wb', compresslevel=5) as f:
+                    if isinstance(body, bytes):
+                        f.write(body)
+                    else:
+                        body.seek(0)
+                        shutil.copyfileobj(body, f)
+                os.replace(tmp, body_path)
+
+            tmp = meta_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, meta_path)
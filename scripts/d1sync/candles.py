@@ -0,0 +1,66 @@
+"""
+OHLC candles folded from crypto price ticks
+
+crypto_prices_realtime only holds the latest price per symbol. Every tick
+is also folded into crypto_price_candles at each resolution in
+RESOLUTIONS, so charts can range-query price history without a tick table.
+
+Each (symbol, resolution) is a ring buffer of `capacity` slots: a candle
+lives in slot (bucket / seconds) % capacity, and a tick for a newer bucket
+overwrites whatever older candle held its slot. Retention is bounded by
+construction and nothing ever has to be pruned. The fold itself runs in
+the database (sqlwriter.UPSERT_CLAUSES), so the sync and the worker cron
+can both write ticks into the same candles:
+
+    newer bucket than the slot's   the slot restarts as this tick
+    same bucket                    high/low widen, open/close move to the
+                                   earliest/latest tick, ticks counts it
+    older bucket                   ignored (its candle was already recycled)
+
+A tick already folded (same first/last time) is not counted twice, so
+re-applying a batch is harmless. RESOLUTIONS must match
+CANDLE_RESOLUTIONS in worker-cron.ts.
+"""
+
+from d1sync.schema import to_timestamp_seconds
+
+# name -> (bucket seconds, slots kept)
+RESOLUTIONS = {
+    '1m': (60, 1440),           # 1 day
+    '5m': (5 * 60, 2016),       # 7 days
+    '1h': (60 * 60, 2160),      # 90 days
+    '1d': (24 * 60 * 60, 1825)  # 5 years
+}
+
+
+def candle_slot(tick_time, seconds, capacity):
+    """(bucket start, ring slot) of a tick at one resolution"""
+    bucket = tick_time - tick_time % seconds
+    return bucket, (bucket // seconds) % capacity
+
+
+def tick_candles(ticks, timestamp):
+    """
+    One single-tick candle per resolution for every (symbol, price, tick
+    time) tick. Ticks without a positive price are skipped; a missing tick
+    time falls back to the sync timestamp.
+    """
+    for symbol, price, tick_time in ticks:
+        if not isinstance(price, (int, float)) or isinstance(price, bool) or not price > 0:
+            continue
+        tick_time = to_timestamp_seconds(tick_time, timestamp)
+        for resolution, (seconds, capacity) in RESOLUTIONS.items():
+            bucket, slot = candle_slot(tick_time, seconds, capacity)
+            yield {
+                'symbol': symbol,
+                'resolution': resolution,
+                'slot': slot,
+                'bucket': bucket,
+                'open': price,
+                'high': price,
+                'low': price,
+                'close': price,
+                'ticks': 1,
+                'first_ts': tick_time,
+                'last_ts': tick_time
+            }
@@ -0,0 +1,259 @@
+"""
+Cloudflare D1 over its HTTP API, without wrangler
+
+Every `wrangler d1 execute` call starts Node and wrangler from scratch,
+which costs seconds per chunk or query. D1Client talks to the D1 REST API
+(POST .../d1/database/<id>/query) over one pooled keep-alive session
+instead. Statements are sent in batches: a batch is a single request, and
+D1 runs it as one transaction.
+
+The sync data goes through the SQL files the writers render, with values
+inlined as literals for wrangler. executor() splits those values back out
+(sqlwriter.bound_statements()), so each chunk runs as parameterized
+statements: D1 does not parse the data as SQL, and the statements of a
+table share one SQL text.
+
+Credentials come from the same variables wrangler reads:
+
+    CLOUDFLARE_API_TOKEN     API token with D1 edit rights
+    CLOUDFLARE_ACCOUNT_ID    account owning the database
+    D1_DATABASE_ID           database UUID (default: from wrangler.toml)
+    D1_API_URL               API base, e.g. a local stand-in server
+
+serve_sqlite() runs a stand-in for that API backed by a local SQLite
+database, so the whole HTTP path can be exercised offline:
+
+    python -m d1sync.d1http --serve alphaarena-local.db --port 8787
+    D1_API_URL=http://127.0.0.1:8787 CLOUDFLARE_API_TOKEN=x CLOUDFLARE_ACCOUNT_ID=x \\
+        python scripts/complete-sync-all.py
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import tomllib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from d1sync.execute import iter_statements
+from d1sync.fetch import create_session
+from d1sync.sqlwriter import bound_statements
+
+API_URL = 'https://api.cloudflare.com/client/v4'
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+WRANGLER_CONFIG = os.path.join(REPO_ROOT, 'wrangler.toml')
+
+# (connect, read) timeouts; a chunk batch can take a while to apply
+TIMEOUT = (5, 120)
+
+# Connections kept open, enough for execute_in_chunks() at MAX_PARALLEL
+POOL_SIZE = 4
+
+# Request bodies stay well below the D1 API's request size limit
+HTTP_CHUNK_BYTES = 512 * 1024
+
+
+def configured():
+    """Whether the environment holds D1 API credentials"""
+    return bool(os.environ.get('CLOUDFLARE_API_TOKEN') and os.environ.get('CLOUDFLARE_ACCOUNT_ID'))
+
+
+def database_id(database, config=WRANGLER_CONFIG):
+    """D1_DATABASE_ID, or the database_id wrangler.toml binds to the database name"""
+    if os.environ.get('D1_DATABASE_ID'):
+        return os.environ['D1_DATABASE_ID']
+    with open(config, 'rb') as f:
+        for binding in tomllib.load(f).get('d1_databases', []):
+            if binding.get('database_name') == database:
+                return binding['database_id']
+    raise ValueError(f'no database_id for {database} in {config}; set D1_DATABASE_ID')
+
+
+class D1Error(RuntimeError):
+    """A D1 API request that failed or returned unsuccessful results"""
+
+
+class D1Client:
+    """Queries and statement batches against one D1 database"""
+
+    def __init__(self, database, account_id=None, api_token=None, api_url=None, session=None):
+        account_id = account_id or os.environ.get('CLOUDFLARE_ACCOUNT_ID')
+        api_token = api_token or os.environ.get('CLOUDFLARE_API_TOKEN')
+        if not (account_id and api_token):
+            raise ValueError('CLOUDFLARE_ACCOUNT_ID and CLOUDFLARE_API_TOKEN are required')
+
+        api_url = (api_url or os.environ.get('D1_API_URL') or API_URL).rstrip('/')
+        self.url = f'{api_url}/accounts/{account_id}/d1/database/{database_id(database)}/query'
+        self.session = session or create_session(POOL_SIZE)
+        self.session.headers['Authorization'] = f'Bearer {api_token}'
+
+    def _post(self, body):
+        try:
+            response = self.session.post(self.url, json=body, timeout=TIMEOUT)
+        except Exception as e:
+            raise D1Error(f'D1 request failed: {e}') from e
+        try:
+            payload = response.json()
+        except ValueError:
+            raise D1Error(f'D1 returned HTTP {response.status_code}: {response.text[:200]}')
+        if not response.ok or not payload.get('success'):
+            messages = '; '.join(error.get('message', '') for error in payload.get('errors', []))
+            raise D1Error(messages or f'D1 returned HTTP {response.status_code}')
+
+        results = payload.get('result', [])
+        for result in results:
+            if not result.get('success', True):
+                raise D1Error(result.get('error') or 'statement failed')
+        return results
+
+    def batch(self, statements):
+        """
+        Run (sql, params) pairs in one request and one transaction; returns
+        the result rows (list of dicts) of each statement
+        """
+        statements = list(statements)
+        if not statements:
+            return []
+        results = self._post({'batch': [{'sql': sql, 'params': list(params)} for sql, params in statements]})
+        if len(results) != len(statements):
+            raise D1Error(f'expected {len(statements)} results, got {len(results)}')
+        return [result.get('results', []) for result in results]
+
+    def query(self, sql, params=()):
+        return self.batch([(sql, params)])[0]
+
+    def executor(self):
+        """
+        execute_in_chunks() executor sending each chunk as one batch of its
+        statements, with their values bound as parameters
+        """
+
+        def execute(sql):
+            statements = []
+            for _, statement in iter_statements(sql.splitlines(True)):
+                statements.extend(bound_statements(statement.decode('utf-8').strip()))
+            self.batch(statements)
+
+        return execute
+
+    def close(self):
+        self.session.close()
+
+
+def split_statements(sql):
+    """Complete statements of a SQL text, as SQLite would parse them"""
+    statements = []
+    start = 0
+    position = sql.find(';')
+    while position != -1:
+        if sqlite3.complete_statement(sql[start:position + 1]):
+            statements.append(sql[start:position + 1].strip())
+            start = position + 1
+        position = sql.find(';', position + 1)
+    if sql[start:].strip():
+        statements.append(sql[start:].strip())
+    return statements
+
+
+def _run_statement(conn, sql, params):
+    started = time.perf_counter()
+    rows = []
+    changes = conn.total_changes
+    for statement in split_statements(sql) if not params else [sql]:
+        cursor = conn.execute(statement, params)
+        if cursor.description:
+            names = [column[0] for column in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor]
+    return {
+        'results': rows,
+        'success': True,
+        'meta': {
+            'changes': conn.total_changes - changes,
+            'last_row_id': conn.execute('SELECT last_insert_rowid()').fetchone()[0],
+            'duration': (time.perf_counter() - started) * 1000
+        }
+    }
+
+
+@contextlib.contextmanager
+def serve_sqlite(path, host='127.0.0.1', port=0, schema_files=None):
+    """
+    Serve the D1 query API for a local SQLite database (schema applied);
+    yields the base URL to use as D1_API_URL. Any account, database id and
+    non-empty bearer token are accepted.
+    """
+    # Imported here: backends imports this module
+    from d1sync.backends import SCHEMA_FILES, SqliteBackend
+
+    SqliteBackend(path, schema_files=schema_files or SCHEMA_FILES).close()
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def reply(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if not self.path.endswith('/query') or '/d1/database/' not in self.path:
+                self.reply(404, {'success': False, 'errors': [{'code': 7003, 'message': 'Could not route'}]})
+                return
+            if not self.headers.get('Authorization', '').removeprefix('Bearer ').strip():
+                self.reply(401, {'success': False, 'errors': [{'code': 10000, 'message': 'Authentication error'}]})
+                return
+
+            request = json.loads(body)
+            statements = request.get('batch') or [request]
+            with lock:
+                try:
+                    conn.execute('BEGIN')
+                    results = [_run_statement(conn, item['sql'], item.get('params') or ()) for item in statements]
+                    conn.execute('COMMIT')
+                except sqlite3.Error as e:
+                    conn.execute('ROLLBACK')
+                    self.reply(400, {'success': False, 'errors': [{'code': 7500, 'message': str(e)}]})
+                    return
+            self.reply(200, {'success': True, 'errors': [], 'messages': [], 'result': results})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the D1 query API for a local SQLite database')
+    parser.add_argument('--serve', metavar='DB', required=True, help='SQLite database file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    args = parser.parse_args()
+
+    with serve_sqlite(args.serve, args.host, args.port) as url:
+        print(f'🧪 D1 stand-in for {args.serve} at {url} (D1_API_URL={url})')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+Chunked, resumable execution of generated SQL files against D1
+
+The .sql file is split on statement boundaries into size-bounded chunks,
+each identified by its position and content hash. Every chunk that lands is
+recorded in a journal under .sync-state/, so rerunning the same file after a
+failure only sends the chunks that have not been applied yet.
+
+A SERIAL_BARRIER line splits a file in two: the chunks above it are
+independent upserts that may land in parallel and in any order, the ones
+below it (sync_runs stamps, retention) run one at a time, in file order,
+and only once every chunk above has landed.
+
+The wrangler subprocess sits behind run_wrangler(); WRANGLER_CMD can point
+at any command that accepts `d1 execute <db> --remote --file <path>`,
+e.g. a fake wrangler that applies the file to a local SQLite database.
+"""
+
+import hashlib
+import os
+import shlex
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from d1sync import telemetry
+from d1sync.state import load_state, save_state, state_path
+
+D1_DATABASE = 'alphaarena-db'
+
+# Upper bound for one `wrangler d1 execute --file` call
+CHUNK_BYTES = 2 * 1024 * 1024
+
+# D1 serializes writes per database; more in-flight chunks only queue up
+MAX_PARALLEL = 4
+
+# Written as a statement of its own (a comment line); see the module docstring
+SERIAL_BARRIER = '-- d1sync: serial below'
+
+_BARRIER_LINE = SERIAL_BARRIER.encode('utf-8')
+
+
+def iter_statements(f, barriers=False):
+    """
+    Yield (offset, statement bytes) for every statement in a binary SQL file.
+
+    A statement ends at a line ending in ';' outside a string literal, which
+    is how sqlwriter.write_statements() lays statements out. SERIAL_BARRIER
+    lines are skipped, or yielded as statements of their own with barriers=True.
+    """
+    offset = 0
+    start = 0
+    lines = []
+    in_literal = False
+
+    for line in f:
+        offset += len(line)
+        if not lines and line.rstrip() == _BARRIER_LINE:
+            if barriers:
+                yield start, line
+            start = offset
+            continue
+        lines.append(line)
+        if line.count(b"'") % 2:
+            in_literal = not in_literal
+        if not in_literal and line.rstrip().endswith(b';'):
+            yield start, b''.join(lines)
+            start = offset
+            lines = []
+
+    if lines and b''.join(lines).strip():
+        yield start, b''.join(lines)
+
+
+def plan_chunks(sql_file, max_bytes=CHUNK_BYTES):
+    """
+    Split a SQL file into chunks of whole statements.
+
+    Returns (file hash, [(chunk_id, offset, length, serial), ...]), where
+    serial is set for the chunks below a SERIAL_BARRIER. A statement larger
+    than max_bytes gets a chunk of its own.
+    """
+    file_hash = hashlib.sha256()
+    chunks = []
+    chunk_start = 0
+    chunk_length = 0
+    digest = hashlib.sha256()
+    serial = False
+
+    def close_chunk():
+        chunk_id = f'{len(chunks):05d}-{digest.hexdigest()[:12]}'
+        chunks.append((chunk_id, chunk_start, chunk_length, serial))
+
+    with open(sql_file, 'rb') as f:
+        for offset, statement in iter_statements(f, barriers=True):
+            if statement.rstrip() == _BARRIER_LINE:
+                # Nothing above the barrier shares a chunk with what is below it
+                if chunk_length:
+                    close_chunk()
+                    chunk_length = 0
+                    digest = hashlib.sha256()
+                chunk_start = offset + len(statement)
+                serial = True
+                continue
+            if chunk_length and chunk_length + len(statement) > max_bytes:
+                close_chunk()
+                chunk_start = offset
+                chunk_length = 0
+                digest = hashlib.sha256()
+
+            digest.update(statement)
+            file_hash.update(statement)
+            chunk_length += len(statement)
+
+    if chunk_length:
+        close_chunk()
+
+    return file_hash.hexdigest(), chunks
+
+
+class ChunkJournal:
+    """Records which chunks of a given SQL file have been applied"""
+
+    def __init__(self, sql_file, file_hash):
+        self.state_file = f'journal-{os.path.basename(sql_file)}.json'
+        self.file_hash = file_hash
+        self._lock = threading.Lock()
+
+        state = load_state(self.state_file, {}) or {}
+        # A journal written for different file contents does not apply
+        if state.get('file_hash') == file_hash:
+            self.done = set(state.get('done', []))
+        else:
+            self.done = set()
+
+    def is_done(self, chunk_id):
+        return chunk_id in self.done
+
+    def mark_done(self, chunk_id):
+        with self._lock:
+            self.done.add(chunk_id)
+            save_state(self.state_file, {
+                'file_hash': self.file_hash,
+                'done': sorted(self.done)
+            })
+
+    def clear(self):
+        with self._lock:
+            self.done = set()
+            try:
+                os.unlink(state_path(self.state_file))
+            except FileNotFoundError:
+                pass
+
+
+def wrangler_command():
+    """Base wrangler command, overridable through WRANGLER_CMD"""
+    return shlex.split(os.environ.get('WRANGLER_CMD', 'pnpm wrangler'))
+
+
+def run_wrangler(args):
+    """Run wrangler with the given arguments (the subprocess boundary)"""
+    return subprocess.run(wrangler_command() + args, capture_output=True, text=True)
+
+
+def wrangler_executor(database=D1_DATABASE, remote=True):
+    """Executor that applies one chunk of SQL through `wrangler d1 execute --file`"""
+
+    def execute(sql):
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.sql', delete=False) as f:
+            f.write(sql)
+            chunk_file = f.name
+
+        try:
+            args = ['d1', 'execute', database]
+            if remote:
+                args.append('--remote')
+            result = run_wrangler(args + ['--file', chunk_file])
+        finally:
+            try:
+                os.unlink(chunk_file)
+            except OSError:
+                pass
+
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or result.stdout.strip() or 'wrangler failed')
+        return result.stdout
+
+    return execute
+
+
+def execute_in_chunks(sql_file, execute, max_bytes=CHUNK_BYTES, parallel=1):
+    """
+    Apply a SQL file chunk by chunk, skipping chunks already journaled.
+
+    execute(sql_bytes) must raise on failure. Chunks above a SERIAL_BARRIER
+    are independent upserts, so with parallel > 1 they may land out of
+    order; the chunks below it only run, in order, once all of those have
+    landed. Returns True when every chunk has been applied; the journal is
+    cleared in that case.
+    """
+    parallel = max(1, min(parallel, MAX_PARALLEL))
+    file_hash, chunks = plan_chunks(sql_file, max_bytes)
+    journal = ChunkJournal(sql_file, file_hash)
+
+    pending = [chunk for chunk in chunks if not journal.is_done(chunk[0])]
+    skipped = len(chunks) - len(pending)
+    print(f'  {len(chunks)} chunks ({skipped} already applied, {len(pending)} to run)')
+
+    def apply(chunk):
+        chunk_id, offset, length, _ = chunk
+        with telemetry.span('chunk', os.path.basename(sql_file), chunk_id=chunk_id) as span:
+            with open(sql_file, 'rb') as f:
+                f.seek(offset)
+                sql = f.read(length)
+            span.add(bytes=length)
+            execute(sql)
+            journal.mark_done(chunk_id)
+        print(f'  ✓ chunk {chunk_id} ({length} bytes)')
+
+    def apply_in_order(chunks):
+        for chunk in chunks:
+            try:
+                apply(chunk)
+            except Exception as e:
+                failures.append((chunk[0], e))
+                return
+
+    failures = []
+    independent = [chunk for chunk in pending if not chunk[3]]
+    if parallel == 1:
+        apply_in_order(independent)
+    else:
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            futures = {pool.submit(apply, chunk): chunk[0] for chunk in independent}
+            for future, chunk_id in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append((chunk_id, e))
+    if not failures:
+        apply_in_order([chunk for chunk in pending if chunk[3]])
+
+    if failures:
+        for chunk_id, error in failures:
+            print(f'  ✗ chunk {chunk_id}: {error}')
+        print(f'  {len(journal.done)}/{len(chunks)} chunks applied; rerun with --resume to continue')
+        return False
+
+    journal.clear()
+    return True
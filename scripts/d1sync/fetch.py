@@ -0,0 +1,282 @@
+"""
+Concurrent NOF1 API fetch stage shared by the D1 sync scripts
+
+All endpoints are requested in parallel over one pooled keep-alive session,
+so a sync costs roughly as much as its slowest endpoint instead of the sum
+of every request. With a ResponseCache, endpoints that are not due or whose
+body did not change come back as empty payloads and are flagged in the
+timings, so their sections generate no SQL.
+
+The history endpoints in STREAMED are never decoded as a whole: their
+payload is {key: JsonArray} and items are parsed lazily as rows are built.
+
+Requests are retried, time-boxed and circuit-broken as described in
+d1sync.resilience. An endpoint that still fails falls back to the last body
+that landed (a ResponseCache's committed body), flagged stale in its timing.
+"""
+
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from d1sync import telemetry
+from d1sync.cache import body_hash
+from d1sync.jsonstream import JsonArray, spool_response
+from d1sync.resilience import MAX_ATTEMPTS, CircuitOpen, Deadline, DeadlineExceeded, with_retries
+
+# Overridable so the sync can run against a local stand-in server
+NOF1_BASE = os.environ.get('NOF1_BASE', 'https://nof1.ai/api')
+
+ENDPOINTS = {
+    'leaderboard': '/leaderboard',
+    'trades': '/trades',
+    'analytics': '/analytics',
+    'conversations': '/conversations',
+    'account_totals': '/account-totals',
+    'since_inception': '/since-inception-values',
+    'crypto_prices': '/crypto-prices'
+}
+
+# (connect, read) timeouts in seconds. The history payloads are the largest
+# responses NOF1 serves, so they get a longer read budget than the rest.
+DEFAULT_TIMEOUT = (5, 30)
+TIMEOUTS = {
+    'trades': (5, 45),
+    'conversations': (5, 60)
+}
+
+# Endpoints whose bodies are spooled and streamed, with the key of their item array
+STREAMED = {
+    'trades': 'trades',
+    'conversations': 'conversations'
+}
+
+# Cap on concurrent requests against nof1.ai
+MAX_IN_FLIGHT = 6
+
+
+def analytics_job(model):
+    """Job name for a per-model analytics endpoint (matches worker-cron.ts)"""
+    return f'analytics:{model}'
+
+
+def analytics_path(model):
+    """Endpoint path for a per-model analytics payload"""
+    return f'/analytics/{quote(model, safe="")}'
+
+
+def create_session(pool_size=MAX_IN_FLIGHT):
+    """Create a keep-alive HTTP session sized for MAX_IN_FLIGHT requests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': 'AlphaArena-Sync/1.0',
+        'Accept': 'application/json'
+    })
+    return session
+
+
+def _read_body(name, response):
+    """(body, size, digest); STREAMED bodies are spooled instead of held as bytes"""
+    if name in STREAMED:
+        return spool_response(response)
+    body = response.content
+    return body, len(body), body_hash(body)
+
+
+def _decode(name, body):
+    if name in STREAMED:
+        return {STREAMED[name]: JsonArray(body, STREAMED[name])}
+    return json.loads(body)
+
+
+def fetch_json(session, url, timeout, name=None, archive=None, fallback=None):
+    """
+    GET a JSON endpoint, returns (payload, response size in bytes). The body
+    is staged in the PayloadArchive and in the fallback ResponseCache, if given.
+    """
+    response = session.get(url, timeout=timeout, stream=name in STREAMED)
+    response.raise_for_status()
+    body, size, digest = _read_body(name, response)
+    if archive is not None:
+        archive.stage(name, body, digest, size)
+    if fallback is not None:
+        fallback.stage(
+            url, body, digest,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+    return _decode(name, body), size
+
+
+def _fetch_cached(session, cache, name, url, timeout, timing, archive=None):
+    entry = cache.lookup(url)
+    if cache.is_fresh(entry, name):
+        timing['cache'] = 'fresh'
+        return {}
+
+    response = session.get(
+        url, timeout=timeout, headers=cache.conditional_headers(entry), stream=name in STREAMED
+    )
+    if response.status_code == 304 and entry:
+        cache.touch(url, entry)
+        timing['cache'] = 'not-modified'
+        return {}
+
+    response.raise_for_status()
+    body, timing['bytes'], digest = _read_body(name, response)
+
+    if entry and entry.get('hash') == digest:
+        cache.touch(url, entry)
+        timing['cache'] = 'unchanged'
+        return {}
+
+    if archive is not None:
+        archive.stage(name, body, digest, timing['bytes'])
+    payload = _decode(name, body)
+    cache.stage(
+        url, body, digest,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified')
+    )
+    return payload
+
+
+def _stale_payload(fallback, name, url):
+    """(payload, age in seconds) of the last body that landed for url, or None"""
+    entry = fallback.lookup(url)
+    body = fallback.read_body(url) if entry else None
+    if body is None:
+        return None
+    try:
+        payload = _decode(name, io.BytesIO(body) if name in STREAMED else body)
+    except ValueError:
+        return None
+    return payload, max(0.0, time.time() - entry.get('checked_at', 0))
+
+
+def _fetch_one(session, name, path, cache=None, archive=None, breakers=None, deadline=None, fallback=None):
+    url = NOF1_BASE + path
+    timeout = TIMEOUTS.get(name, DEFAULT_TIMEOUT)
+    deadline = deadline or Deadline(None)
+    started = time.perf_counter()
+    timing = {'seconds': 0.0, 'bytes': 0, 'error': None, 'cache': None, 'retries': 0, 'stale': None}
+
+    def request():
+        if cache is None:
+            payload, timing['bytes'] = fetch_json(
+                session, url, deadline.timeout(timeout), name, archive, fallback
+            )
+            return payload
+        return _fetch_cached(session, cache, name, url, deadline.timeout(timeout), timing, archive)
+
+    with telemetry.span('fetch', name, path=path) as span:
+        try:
+            # A probe of a breaker whose cooldown ran out gets a single attempt
+            probe = breakers is not None and breakers.check(name)
+            payload, timing['retries'] = with_retries(request, deadline, 1 if probe else MAX_ATTEMPTS)
+            if breakers is not None:
+                breakers.record(name, True)
+        except Exception as e:
+            payload = {}
+            timing['error'] = str(e) or type(e).__name__
+            timing['retries'] = getattr(e, 'retries', 0)
+            # Neither a skipped request nor one the stage had no time left
+            # for says anything about the endpoint's health
+            if breakers is not None and not isinstance(e, (CircuitOpen, DeadlineExceeded)):
+                breakers.record(name, False)
+            stale = _stale_payload(fallback, name, url) if fallback is not None else None
+            if stale is not None:
+                payload, timing['stale'] = stale
+
+        timing['seconds'] = time.perf_counter() - started
+        span.add(bytes=timing['bytes'], retries=timing['retries'])
+        span.error = timing['error']
+        if timing['cache']:
+            span.attrs['cache'] = timing['cache']
+        if timing['stale'] is not None:
+            span.attrs['stale'] = True
+    return name, payload, timing
+
+
+def fetch_endpoints(targets, session=None, max_in_flight=MAX_IN_FLIGHT, cache=None, archive=None,
+                    breakers=None, deadline=None, fallback=None):
+    """
+    Fetch {name: path} concurrently.
+
+    Returns (payloads, timings). A failed endpoint yields an empty dict
+    payload and its error is recorded in timings[name]['error']. With a
+    cache, skipped endpoints also yield {} and timings[name]['cache'] says
+    why ('fresh', 'not-modified' or 'unchanged'). With a PayloadArchive,
+    every body that is passed on to the sync is staged in it.
+
+    Transient failures are retried (timings[name]['retries']) within the
+    deadline, in seconds or a resilience.Deadline; CircuitBreakers skip
+    endpoints that keep failing and are saved afterwards. With a fallback
+    ResponseCache (usually the cache itself), a failed endpoint yields the
+    last body committed there instead, with its age in seconds in
+    timings[name]['stale']; the error stays recorded. Without a cache,
+    fetched bodies are staged in the fallback for the caller to commit.
+    """
+    own_session = session is None
+    if own_session:
+        session = create_session(max_in_flight)
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+
+    payloads = {}
+    timings = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            futures = [
+                pool.submit(_fetch_one, session, name, path, cache, archive, breakers, deadline, fallback)
+                for name, path in targets.items()
+            ]
+            for future in futures:
+                name, payload, timing = future.result()
+                payloads[name] = payload
+                timings[name] = timing
+    finally:
+        if own_session:
+            session.close()
+        if breakers is not None:
+            breakers.save()
+
+    return payloads, timings
+
+
+def _age(seconds):
+    if seconds < 120:
+        return f'{seconds:.0f}s'
+    if seconds < 2 * 3600:
+        return f'{seconds / 60:.0f}m'
+    return f'{seconds / 3600:.1f}h'
+
+
+def print_timings(timings, wall_seconds=None):
+    """Print per-endpoint timings, slowest first"""
+    print('\n⏱️  Endpoint timings:')
+    for name, timing in sorted(timings.items(), key=lambda item: -item[1]['seconds']):
+        if timing['error'] is not None and timing.get('stale') is not None:
+            status = f'⚠ stale ({_age(timing["stale"])} old) after {timing["error"]}'
+        elif timing['error'] is not None:
+            status = f'✗ {timing["error"]}'
+        elif timing.get('cache'):
+            status = f'↺ {timing["cache"]}'
+        else:
+            status = '✓'
+        if timing.get('retries'):
+            status += f' ({timing["retries"]} retries)'
+        print(f'  {name:<32} {timing["seconds"]:6.2f}s {timing["bytes"]:>10,} B  {status}')
+
+    if wall_seconds is not None:
+        serial = sum(timing['seconds'] for timing in timings.values())
+        print(f'  {"total (wall / serial)":<32} {wall_seconds:6.2f}s / {serial:.2f}s')
@@ -0,0 +1,176 @@
+"""
+Incremental trade sync: high-water mark plus per-trade content hashes
+
+Trades are ordered by (exit_time, id). Everything above the stored
+watermark is new. Trades inside a lookback window below the watermark, and
+trades that are still open, are compared by content hash so late
+corrections are picked up. Anything older than the window is treated as
+settled and skipped without hashing, once the trade IDs index (a
+SeenIndex of every trade written) confirms it landed before: a trade
+that arrives late or is backfilled below the window is still written.
+
+Append-only histories such as conversations use a SeenIndex instead: a
+SQLite set of IDs already written, so memory stays flat however long the
+history grows.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+from d1sync.state import load_state, save_state, state_path
+
+STATE_FILE = 'trades-watermark-d1-alphaarena-db.json'
+
+# Closed trades older than this (relative to the watermark) are never re-emitted
+LOOKBACK_SECONDS = 24 * 60 * 60
+
+
+def trade_hash(trade):
+    """Stable content hash of a trade payload"""
+    encoded = json.dumps(trade, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+
+def _exit_time(trade):
+    value = trade.get('exit_time')
+    try:
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TradeWatermark:
+    """
+    Tracks which trades have already been written to D1; seen is the
+    SeenIndex of their IDs (without one, settled trades are always skipped)
+    """
+
+    def __init__(self, state_file=STATE_FILE, seen=None):
+        self.state_file = state_file
+        self.seen = seen
+        state = load_state(state_file, {}) or {}
+        self.exit_time = state.get('exit_time')
+        self.last_id = state.get('id')
+        self.hashes = state.get('hashes', {})
+        self._pending = None
+
+    def select(self, trades, full=False):
+        """
+        Return the trades that need to be written.
+
+        With full=True every trade is returned (the input itself, so a
+        streamed payload is not copied) and the stored state is rebuilt
+        from scratch on commit().
+        """
+        if self.seen is not None:
+            self.seen.reset()
+        if not trades:
+            # Empty or failed fetch: keep the stored state untouched
+            self._pending = None
+            return []
+
+        hashes = {} if full else self.hashes
+        watermark = None if full else self.exit_time
+        cutoff = watermark - LOOKBACK_SECONDS if watermark is not None else None
+
+        changed = []
+        next_hashes = {}
+        high = (self.exit_time or 0, self.last_id or '') if not full else (0, '')
+
+        for trade in trades:
+            exit_time = _exit_time(trade)
+            trade_id = str(trade.get('id') or '')
+
+            if exit_time is not None and cutoff is not None and exit_time < cutoff:
+                key = trade_id or trade_hash(trade)
+                if self.seen is None or key in self.seen:
+                    continue
+                # Settled, but never written: a late or backfilled trade
+                changed.append(trade)
+                self.seen.stage(key)
+                continue
+
+            digest = trade_hash(trade)
+            key = trade_id or digest
+            next_hashes[key] = digest
+            if self.seen is not None:
+                self.seen.stage(key)
+
+            if not full and hashes.get(key) != digest:
+                changed.append(trade)
+
+            if exit_time is not None and (exit_time, trade_id) > high:
+                high = (exit_time, trade_id)
+
+        self._pending = {
+            'exit_time': high[0] or None,
+            'id': high[1] or None,
+            'hashes': next_hashes
+        }
+        return trades if full else changed
+
+    def commit(self):
+        """Persist the state computed by the last select() call"""
+        if self._pending is None:
+            return
+        if self.seen is not None:
+            self.seen.commit()
+        save_state(self.state_file, self._pending)
+        self.exit_time = self._pending['exit_time']
+        self.last_id = self._pending['id']
+        self.hashes = self._pending['hashes']
+        self._pending = None
+
+
+class SeenIndex:
+    """Persistent set of item IDs already written, stored in SQLite"""
+
+    def __init__(self, state_file):
+        path = state_path(state_file)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY) WITHOUT ROWID')
+        self._pending = set()
+
+    def __contains__(self, item_id):
+        return self._db.execute('SELECT 1 FROM seen WHERE id = ?', (item_id,)).fetchone() is not None
+
+    def select(self, items, key, full=False):
+        """
+        Lazily yield the items whose key(item) has not been committed yet.
+
+        The yielded IDs are staged and only recorded by commit(), once the
+        rows have landed. With full=True every item is yielded.
+        """
+        pending = self._pending = set()
+        return self._select(items, key, full, pending)
+
+    def reset(self):
+        """Drop the IDs staged since the last commit()"""
+        self._pending = set()
+
+    def stage(self, item_id):
+        """Stage one ID for the next commit()"""
+        self._pending.add(item_id)
+
+    def _select(self, items, key, full, pending):
+        for item in items:
+            item_id = key(item)
+            if item_id in pending or (not full and item_id in self):
+                continue
+            pending.add(item_id)
+            yield item
+
+    def commit(self):
+        """Record the IDs yielded since the last select() call"""
+        with self._db:
+            self._db.executemany(
+                'INSERT OR IGNORE INTO seen (id) VALUES (?)',
+                ((item_id,) for item_id in self._pending)
+            )
+        self._pending = set()
+
+    def close(self):
+        self._db.close()
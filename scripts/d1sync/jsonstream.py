@@ -0,0 +1,208 @@
+"""
+Incremental parsing of the large NOF1 history payloads
+
+/trades and /conversations are single JSON documents holding one big
+array. Instead of response.json(), their bodies are spooled to a temporary
+file (in memory up to SPOOL_BYTES, on disk beyond) and the array items are
+decoded one at a time with json.JSONDecoder.raw_decode over a small
+sliding text buffer. Only one item plus one read chunk is ever held in
+memory, whatever the size of the history.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from itertools import islice
+
+# Bodies larger than this roll over from memory to a temporary file
+SPOOL_BYTES = 8 << 20
+
+# Read size for both the HTTP stream and the parser
+STREAM_CHUNK = 64 << 10
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'\s*')
+
+# Characters that can follow a complete JSON value
+_DELIMITERS = frozenset(',:]} \t\r\n')
+
+
+class _TextBuffer:
+    """Sliding window of decoded text over a binary stream"""
+
+    def __init__(self, read, chunk_size=STREAM_CHUNK):
+        self._read = read
+        self._chunk_size = chunk_size
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self._read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            self.text = self.text[self.pos:] + self._utf8.decode(b'', final=True)
+        else:
+            self.text = self.text[self.pos:] + self._utf8.decode(chunk)
+        self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace character without consuming it, '' at the end"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def value(self):
+        """Decode the JSON value at the current position"""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                # A value cut by the end of the window can still decode
+                # ("12" of "123", "1." of "1.5"); only trust it when a
+                # delimiter follows
+                if self.eof or (end < len(self.text) and self.text[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_array_items(read, key=None, chunk_size=STREAM_CHUNK):
+    """
+    Yield the items of a JSON array one at a time.
+
+    read is a file-like read(size) callable. With key, the array is the
+    value of that key in a top-level object ({"trades": [...]}); other keys
+    are skipped. A missing key or a non-array value yields nothing.
+    """
+    buf = _TextBuffer(read, chunk_size)
+
+    if key is not None:
+        if buf.peek() != '{':
+            return
+        buf.pos += 1
+        while True:
+            char = buf.peek()
+            if char in ('}', ''):
+                return
+            if char == ',':
+                buf.pos += 1
+                continue
+            name = buf.value()
+            if buf.peek() != ':':
+                raise ValueError(f'Malformed JSON object near key {name!r}')
+            buf.pos += 1
+            if name == key and buf.peek() == '[':
+                break
+            buf.value()
+
+    if buf.peek() != '[':
+        return
+    buf.pos += 1
+    while True:
+        char = buf.peek()
+        if char in (']', ''):
+            return
+        if char == ',':
+            buf.pos += 1
+            continue
+        yield buf.value()
+
+
+def _disk_fileno(f):
+    """Descriptor of a body that lives on disk, None while it is held in memory"""
+    if isinstance(f, tempfile.SpooledTemporaryFile) and not f._rolled:
+        return None
+    try:
+        return f.fileno()
+    except (AttributeError, OSError):
+        return None
+
+
+class _SharedReader:
+    """
+    Independent read position over a file shared by several iterators.
+
+    Bodies on disk are read with os.pread, which leaves the descriptor's
+    offset alone; forked workers share that offset with their parent, so
+    seek() + read() could interleave between processes.
+    """
+
+    def __init__(self, f, lock):
+        self._f = f
+        self._lock = lock
+        self._offset = 0
+        self._fileno = _disk_fileno(f)
+
+    def read(self, size):
+        if self._fileno is not None:
+            chunk = os.pread(self._fileno, size, self._offset)
+        else:
+            with self._lock:
+                self._f.seek(self._offset)
+                chunk = self._f.read(size)
+        self._offset += len(chunk)
+        return chunk
+
+
+class JsonArray:
+    """
+    Re-iterable view of the array under key in a spooled JSON body.
+
+    Every iteration re-parses the body from the start, so only the item
+    being processed is alive. len() is known after the first full pass.
+    """
+
+    def __init__(self, body, key=None):
+        self.body = body
+        self.key = key
+        self._lock = threading.Lock()
+        self._len = None
+
+    def __iter__(self):
+        count = 0
+        for item in iter_array_items(_SharedReader(self.body, self._lock).read, self.key):
+            count += 1
+            yield item
+        self._len = count
+
+    def __len__(self):
+        if self._len is None:
+            for _ in self:
+                pass
+        return self._len
+
+    def __bool__(self):
+        if self._len is not None:
+            return self._len > 0
+        return any(True for _ in islice(self, 1))
+
+
+def spool_response(response, chunk_size=STREAM_CHUNK):
+    """
+    Copy a streamed (stream=True) response body into a spool file.
+
+    Returns (file, size in bytes, sha256 hex digest); the digest matches
+    cache.body_hash() of the same body.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in response.iter_content(chunk_size):
+        body.write(chunk)
+        digest.update(chunk)
+        size += len(chunk)
+    body.seek(0)
+    return body, size, digest.hexdigest()
@@ -0,0 +1,289 @@
+"""
+Vectorized per-model trade metrics for the performance and daily caches
+
+Trades are loaded once into columnar NumPy arrays (model_id dictionary
+encoded to int codes). Every statistic is then computed for all models
+at once with bincount/reduceat over those columns:
+
+- today / week / all-time trade counts, PnL and win rate per model
+- Sharpe ratio of daily PnL per model (annualized), from its first trading day
+- maximum drawdown of cumulative realized PnL per model
+- per-day totals, best/worst performer by return on the day's starting
+  equity, volume and holding time
+- per-(model, symbol) PnL breakdown
+
+The output feeds model_performance_cache, daily_stats_cache and the
+model_symbol_pnl read model.
+"""
+
+import math
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+TRADING_DAYS_PER_YEAR = 365
+
+# Capital every model started the competition with
+STARTING_EQUITY = 10_000
+
+
+def to_number(value):
+    """Float value of a payload number, NaN when it is missing or not numeric"""
+    if value is None or value == '':
+        return math.nan
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class TradeColumns:
+    """Closed trades as parallel NumPy arrays"""
+
+    def __init__(self, trades):
+        codes = {}
+        symbol_codes = {}
+        model = array('i')
+        symbol = array('i')
+        exit_time = array('d')
+        entry_time = array('d')
+        pnl = array('d')
+        gross = array('d')
+        commission = array('d')
+        notional = array('d')
+
+        # One pass, so a streamed trades payload is parsed only once
+        for trade in trades:
+            model.append(codes.setdefault(trade.get('model_id', ''), len(codes)))
+            symbol.append(symbol_codes.setdefault(trade.get('symbol', ''), len(symbol_codes)))
+            exit_time.append(to_number(trade.get('exit_time')))
+            entry_time.append(to_number(trade.get('entry_time')))
+            pnl.append(to_number(trade.get('realized_net_pnl', trade.get('pnl'))))
+            gross.append(to_number(trade.get('realized_gross_pnl')))
+            commission.append(to_number(trade.get('total_commission_dollars')))
+            notional.append(to_number(trade.get('entry_price')) * to_number(trade.get('entry_sz')))
+
+        model = np.frombuffer(model, dtype=np.int32)
+        symbol = np.frombuffer(symbol, dtype=np.int32)
+        exit_time = np.frombuffer(exit_time, dtype=np.float64)
+        entry_time = np.frombuffer(entry_time, dtype=np.float64)
+        pnl = np.frombuffer(pnl, dtype=np.float64)
+        gross = np.frombuffer(gross, dtype=np.float64)
+        commission = np.frombuffer(commission, dtype=np.float64)
+        notional = np.frombuffer(notional, dtype=np.float64)
+
+        # Only closed trades with a realized PnL count towards the stats
+        closed = ~np.isnan(exit_time) & ~np.isnan(pnl)
+
+        self.models = list(codes)
+        self.symbols = list(symbol_codes)
+        self.model = model[closed]
+        self.symbol = symbol[closed]
+        self.exit_time = exit_time[closed]
+        self.entry_time = entry_time[closed]
+        self.pnl = pnl[closed]
+        self.gross = np.nan_to_num(gross[closed])
+        self.commission = np.nan_to_num(commission[closed])
+        self.notional = np.nan_to_num(notional[closed])
+        self.day = (self.exit_time // DAY).astype(np.int64)
+
+    def __len__(self):
+        return len(self.pnl)
+
+
+def _window(columns, mask):
+    k = len(columns.models)
+    model = columns.model[mask]
+    pnl = columns.pnl[mask]
+
+    trades = np.bincount(model, minlength=k)
+    total = np.bincount(model, weights=pnl, minlength=k)
+    wins = np.bincount(model, weights=(pnl > 0).astype(np.float64), minlength=k)
+    win_rate = np.divide(wins * 100, trades, out=np.zeros(k), where=trades > 0)
+    return trades, total, win_rate
+
+
+def _daily_grid(columns):
+    """(models x days) realized PnL and trade-count grids, plus the first day"""
+    k = len(columns.models)
+    first_day = int(columns.day.min())
+    days = int(columns.day.max()) - first_day + 1
+    cell = columns.model.astype(np.int64) * days + (columns.day - first_day)
+
+    pnl = np.bincount(cell, weights=columns.pnl, minlength=k * days).reshape(k, days)
+    count = np.bincount(cell, minlength=k * days).reshape(k, days)
+    return pnl, count, first_day
+
+
+def _trading(daily_count):
+    """(models x days) mask of each model's days from its first trade on"""
+    traded = daily_count > 0
+    return np.logical_or.accumulate(traded, axis=1)
+
+
+def _sharpe(daily_pnl, trading):
+    """
+    Annualized Sharpe ratio of daily PnL over the days each model was
+    trading, so a model that started later is not diluted by zero days
+    """
+    days = trading.sum(axis=1)
+    mean = np.divide(np.where(trading, daily_pnl, 0).sum(axis=1), days, out=np.zeros(len(days)), where=days > 0)
+    squares = np.where(trading, (daily_pnl - mean[:, None]) ** 2, 0).sum(axis=1)
+    std = np.sqrt(np.divide(squares, days - 1, out=np.zeros(len(days)), where=days > 1))
+    return np.divide(mean, std, out=np.zeros_like(mean), where=std > 0) * math.sqrt(TRADING_DAYS_PER_YEAR)
+
+
+def _max_drawdown(columns):
+    """Largest peak-to-trough drop of cumulative realized PnL, per model"""
+    k = len(columns.models)
+    drawdown = np.zeros(k)
+    if not len(columns):
+        return drawdown
+
+    order = np.lexsort((columns.exit_time, columns.model))
+    model = columns.model[order]
+    pnl = columns.pnl[order]
+
+    starts = np.flatnonzero(np.r_[True, model[1:] != model[:-1]])
+    counts = np.diff(np.r_[starts, len(model)])
+
+    # Cumulative PnL restarted at every model boundary
+    cumulative = np.cumsum(pnl)
+    offsets = cumulative[starts] - pnl[starts]
+    cumulative -= np.repeat(offsets, counts)
+
+    # Lift each group above the previous one so a single running maximum
+    # never leaks across models, then undo the lift
+    span = float(np.ptp(cumulative)) + 1.0
+    lift = np.repeat(np.arange(len(starts)) * span, counts)
+    peak = np.maximum.accumulate(cumulative + lift) - lift
+    peak = np.maximum(peak, 0)
+
+    drawdown[model[starts]] = np.maximum.reduceat(peak - cumulative, starts)
+    return drawdown
+
+
+def model_stats(columns, now):
+    """Per-model today/week/all-time stats, Sharpe and drawdown"""
+    if not len(columns):
+        return []
+
+    today = columns.day == int(now // DAY)
+    week = columns.exit_time >= now - WEEK
+    everything = np.ones(len(columns), dtype=bool)
+
+    today_trades, today_pnl, today_win_rate = _window(columns, today)
+    week_trades, week_pnl, week_win_rate = _window(columns, week)
+    total_trades, total_pnl, win_rate = _window(columns, everything)
+
+    daily_pnl, daily_count, _ = _daily_grid(columns)
+    sharpe = _sharpe(daily_pnl, _trading(daily_count))
+    drawdown = _max_drawdown(columns)
+
+    return [
+        {
+            'model_id': model_id,
+            'today_trades': int(today_trades[i]),
+            'today_pnl': float(today_pnl[i]),
+            'today_win_rate': float(today_win_rate[i]),
+            'week_trades': int(week_trades[i]),
+            'week_pnl': float(week_pnl[i]),
+            'week_win_rate': float(week_win_rate[i]),
+            'total_trades': int(total_trades[i]),
+            'total_pnl': float(total_pnl[i]),
+            'overall_win_rate': float(win_rate[i]),
+            'sharpe_ratio': float(sharpe[i]),
+            'max_drawdown': float(drawdown[i])
+        }
+        for i, model_id in enumerate(columns.models)
+    ]
+
+
+def daily_stats(columns):
+    """Per-UTC-day totals with best and worst performing model"""
+    if not len(columns):
+        return []
+
+    daily_pnl, daily_count, first_day = _daily_grid(columns)
+    day_index = columns.day - first_day
+    days = daily_pnl.shape[1]
+
+    trades = daily_count.sum(axis=0)
+    pnl = daily_pnl.sum(axis=0)
+    volume = np.bincount(day_index, weights=columns.notional, minlength=days)
+    duration = np.bincount(
+        day_index, weights=np.nan_to_num(columns.exit_time - columns.entry_time), minlength=days
+    )
+
+    # Return (%) of each model's day on its equity at the start of the day:
+    # its starting capital plus all PnL realized on earlier days
+    equity = STARTING_EQUITY + np.cumsum(daily_pnl, axis=1) - daily_pnl
+    daily_return = np.divide(daily_pnl * 100, equity, out=np.full_like(daily_pnl, np.nan), where=equity > 0)
+
+    # Models without trades that day can be neither best nor worst
+    active = (daily_count > 0) & ~np.isnan(daily_return)
+    best = np.where(active, daily_return, -np.inf).argmax(axis=0)
+    worst = np.where(active, daily_return, np.inf).argmin(axis=0)
+
+    result = []
+    for d in np.flatnonzero(trades):
+        result.append({
+            'date': datetime.fromtimestamp((first_day + int(d)) * DAY, tz=timezone.utc).strftime('%Y-%m-%d'),
+            'total_trades': int(trades[d]),
+            'total_pnl': float(pnl[d]),
+            'best_performer': columns.models[best[d]] if active[best[d], d] else None,
+            'best_performer_return': float(daily_return[best[d], d]) if active[best[d], d] else None,
+            'worst_performer': columns.models[worst[d]] if active[worst[d], d] else None,
+            'worst_performer_return': float(daily_return[worst[d], d]) if active[worst[d], d] else None,
+            'total_volume': float(volume[d]),
+            'avg_trade_duration': int(duration[d] / trades[d])
+        })
+    return result
+
+
+def symbol_pnl(columns):
+    """Per (model, symbol) closed trades, wins/losses, net and gross PnL, fees and extremes"""
+    if not len(columns):
+        return []
+
+    symbols = len(columns.symbols)
+    cells = len(columns.models) * symbols
+    cell = columns.model.astype(np.int64) * symbols + columns.symbol
+
+    trades = np.bincount(cell, minlength=cells)
+    wins = np.bincount(cell, weights=(columns.pnl > 0).astype(np.float64), minlength=cells)
+    losses = np.bincount(cell, weights=(columns.pnl < 0).astype(np.float64), minlength=cells)
+    net = np.bincount(cell, weights=columns.pnl, minlength=cells)
+    gross = np.bincount(cell, weights=columns.gross, minlength=cells)
+    fees = np.bincount(cell, weights=columns.commission, minlength=cells)
+
+    best = np.full(cells, -np.inf)
+    worst = np.full(cells, np.inf)
+    last_exit = np.full(cells, -np.inf)
+    np.maximum.at(best, cell, columns.pnl)
+    np.minimum.at(worst, cell, columns.pnl)
+    np.maximum.at(last_exit, cell, columns.exit_time)
+
+    result = []
+    for c in np.flatnonzero(trades):
+        count = int(trades[c])
+        result.append({
+            'model_id': columns.models[c // symbols],
+            'symbol': columns.symbols[c % symbols],
+            'trades': count,
+            'wins': int(wins[c]),
+            'losses': int(losses[c]),
+            'win_rate': float(wins[c] * 100 / count),
+            'realized_net_pnl': float(net[c]),
+            'realized_gross_pnl': float(gross[c]),
+            'total_commission': float(fees[c]),
+            'best_trade_pnl': float(best[c]),
+            'worst_trade_pnl': float(worst[c]),
+            'last_exit_time': int(last_exit[c])
+        })
+    return result
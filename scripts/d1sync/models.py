@@ -0,0 +1,211 @@
+"""
+Registry of the models competing on NOF1
+
+The sync used to request /analytics/{model} for a hardcoded list of six
+models every run, so new competitors were missed and retired ones still
+cost a request. ModelRegistry derives the roster from the payloads
+instead:
+
+    leaderboard, account_totals   a model listed in either is seen; its
+                                  equity is that of its latest account
+                                  snapshot, to the cent. The leaderboard
+                                  equity only stands in while a model
+                                  has none, so a leaderboard-only sync
+                                  (account_totals unchanged) does not
+                                  flip it to another figure
+    analytics                     the summary's last_trade_exit_time of
+                                  each registered model
+
+and keeps first/last-seen times per model. A model not seen for
+ACTIVE_SECONDS is retired: it stays registered but is no longer fanned
+out, until it shows up again. Payloads skipped as unchanged leave
+last_seen as it is.
+
+due() lists the active models whose /analytics/{model} payload is out of
+date: a trade closed since it last landed (last_trade_exit_time moved),
+or, between trades, equity moved by at least EQUITY_TRIGGER dollars since
+then. Equity drifts with every mark price, so it is not compared to the cent;
+per-model requests follow trading activity rather than the size of the
+roster. Like the other
+incremental state, observe() and synced() stage changes that commit()
+persists once the batch landed; each observe() starts over from what
+was committed. changes() are the model_registry rows to write;
+worker-cron.ts maintains the same table for its own fan-out.
+"""
+
+import copy
+
+from d1sync.metrics import STARTING_EQUITY
+from d1sync.readmodels import EQUITY_DIGITS
+from d1sync.schema import extract_rows
+from d1sync.sqlwriter import TABLES
+from d1sync.state import load_state, save_state
+
+STATE_FILE = 'model-registry-d1-alphaarena-db.json'
+
+# A model missing from the payloads this long is no longer fanned out
+# (MODEL_ACTIVE_SECONDS in worker-cron.ts)
+ACTIVE_SECONDS = 3 * 24 * 60 * 60
+
+# Equity move in dollars since the analytics landed that makes a model due
+# without a new closed trade: 1% of the starting equity (EQUITY_TRIGGER in
+# worker-cron.ts)
+EQUITY_TRIGGER = STARTING_EQUITY / 100
+
+_ACCOUNT = {name: index for index, name in enumerate(TABLES['account_totals'])}
+_LEADERBOARD = {name: index for index, name in enumerate(TABLES['leaderboard_cache'])}
+
+
+def signals(data, timestamp):
+    """
+    (model -> (account equity, leaderboard equity), model ->
+    last_trade_exit_time) of one sync's payloads; the models in the first
+    map are the ones seen, either equity is None when its payload lacks it
+    """
+    listed = {}
+    for row in extract_rows('leaderboard', data['leaderboard'].get('leaderboard', []), timestamp=timestamp):
+        if row[_LEADERBOARD['model_id']]:
+            listed[row[_LEADERBOARD['model_id']]] = row[_LEADERBOARD['equity']]
+
+    latest = {}
+    accounts = data['account_totals'].get('accountTotals', [])
+    for row in extract_rows('account_totals', accounts, timestamp=timestamp, structure_changed=False):
+        model_id, sample_time = row[_ACCOUNT['model_id']], row[_ACCOUNT['timestamp']]
+        if model_id and (model_id not in latest or sample_time >= latest[model_id][0]):
+            latest[model_id] = (sample_time, row[_ACCOUNT['total_equity']])
+
+    exit_times = {
+        item['model_id']: item['last_trade_exit_time']
+        for item in data['analytics'].get('analytics', [])
+        if item.get('model_id') and item.get('last_trade_exit_time') is not None
+    }
+    equity = {
+        model_id: (_rounded(latest.get(model_id, (None, None))[1]), _rounded(listed.get(model_id)))
+        for model_id in listed.keys() | latest.keys()
+    }
+    return equity, exit_times
+
+
+def _rounded(equity):
+    return None if equity is None else round(equity, EQUITY_DIGITS)
+
+
+def _later(exit_time, other):
+    """The later of two last_trade_exit_time values, either of which may be None"""
+    return exit_time if other is None or (exit_time is not None and exit_time > other) else other
+
+
+def _signature(entry):
+    return [entry['last_trade_exit_time'], entry['equity']]
+
+
+def _stale(entry):
+    """Whether entry's current signature calls for fetching its analytics again"""
+    if entry['synced'] is None:
+        return True
+    exit_time, equity = entry['synced']
+    if entry['last_trade_exit_time'] != exit_time:
+        return True
+    if entry['equity'] is None or equity is None:
+        return entry['equity'] is not None
+    return abs(entry['equity'] - equity) >= EQUITY_TRIGGER
+
+
+class ModelRegistry:
+    """
+    Models seen in the payloads and the analytics signature each last
+    landed with, persisted under .sync-state (kept in memory only when
+    state_file is None)
+    """
+
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+        # model -> {'first_seen', 'last_seen', 'last_trade_exit_time', 'equity',
+        #           'synced': signature that landed, 'synced_at'}
+        self.models = (load_state(state_file, {}) or {}) if state_file else {}
+        self._pending = None
+
+    def _staged(self):
+        if self._pending is None:
+            self._pending = copy.deepcopy(self.models)
+        return self._pending
+
+    def observe(self, data, timestamp):
+        """
+        Stage the committed registry with one sync's payloads folded in,
+        dropping what an earlier uncommitted sync staged; returns the models seen
+        """
+        equity, exit_times = signals(data, timestamp)
+        self._pending = None
+        models = self._staged()
+        for model_id, (account, listed) in equity.items():
+            entry = models.setdefault(model_id, {
+                'first_seen': timestamp, 'last_seen': timestamp,
+                'last_trade_exit_time': None, 'equity': None, 'synced': None, 'synced_at': None
+            })
+            entry['last_seen'] = max(entry['last_seen'], timestamp)
+            if account is not None:
+                entry['equity'] = account
+            elif entry['equity'] is None:
+                entry['equity'] = listed
+        for model_id, exit_time in exit_times.items():
+            if model_id in models:
+                models[model_id]['last_trade_exit_time'] = _later(exit_time, models[model_id]['last_trade_exit_time'])
+        return sorted(equity)
+
+    def active(self, now):
+        return sorted(
+            model_id for model_id, entry in self._staged().items()
+            if now - entry['last_seen'] < ACTIVE_SECONDS
+        )
+
+    def due(self, now, full=False):
+        """Active models whose analytics need fetching (all of them with full=True)"""
+        models = self._staged()
+        return [
+            model_id for model_id in self.active(now)
+            if full or _stale(models[model_id])
+        ]
+
+    def synced(self, model_id, payload, timestamp):
+        """
+        Stage that model_id's analytics landed as of its current signature,
+        taking the payload's own last_trade_exit_time when it is the later.
+        """
+        entry = self._staged().get(model_id)
+        if entry is None:
+            return
+        items = payload.get('analytics') or [{}]
+        entry['last_trade_exit_time'] = _later(items[0].get('last_trade_exit_time'), entry['last_trade_exit_time'])
+        entry['synced'] = _signature(entry)
+        entry['synced_at'] = timestamp
+
+    def changes(self, full=False):
+        """model_registry rows (dicts) of the staged entries that changed"""
+        if self._pending is None:
+            return []
+        rows = []
+        for model_id, entry in sorted(self._pending.items()):
+            if not full and self.models.get(model_id) == entry:
+                continue
+            synced = entry['synced'] or [None, None]
+            rows.append({
+                'model_id': model_id,
+                'first_seen': entry['first_seen'],
+                'last_seen': entry['last_seen'],
+                'last_trade_exit_time': entry['last_trade_exit_time'],
+                'equity': entry['equity'],
+                'analytics_exit_time': synced[0],
+                'analytics_equity': synced[1],
+                'analytics_synced_at': entry['synced_at']
+            })
+        return rows
+
+    def commit(self):
+        """Persist the state staged since the last commit()"""
+        if self._pending is None:
+            return
+        self.models = self._pending
+        self._pending = None
+        if self.state_file:
+            save_state(self.state_file, self.models)
@@ -0,0 +1,94 @@
+"""
+Process-pool rendering of SQL sections
+
+Turning rows into SQL text (extraction, validation, literal rendering) is
+pure CPU work and every section of a sync is independent, so it can run on
+a ProcessPoolExecutor. Workers only render rows; the caller packs rendered
+rows into statements in section order, and since statement boundaries only
+depend on the sequence of rendered rows, the output is byte-identical to a
+serial run whatever the number of workers or pieces.
+
+Workers are forked, so they inherit the fetched payloads and the section
+builder instead of receiving them pickled. A task is just (section index,
+first item, last item) and comes back as the rendered rows of that piece.
+Where fork is unavailable, sections are rendered in-process.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from d1sync.sqlwriter import render_rows
+
+# Input items per task when a large section is split by item range
+CHUNK_ITEMS = 2000
+
+# Section builder of the current run, inherited by the forked workers
+_build = None
+
+
+def fork_available():
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _render(task):
+    index, start, stop = task
+    table, rows = _build(index, start, stop)
+    rendered, sizes = [], []
+    for value, size in render_rows(table, rows):
+        rendered.append(value)
+        sizes.append(size)
+    return rendered, sizes
+
+
+def plan_tasks(sizes, chunk_items=CHUNK_ITEMS):
+    """
+    Split sections into (index, start, stop) tasks.
+
+    sizes[i] is the number of input items of section i, or None when the
+    section cannot be split; those run as a single (i, None, None) task.
+    """
+    tasks = []
+    for index, size in enumerate(sizes):
+        if size is None or size <= chunk_items:
+            tasks.append((index, None, None))
+            continue
+        for start in range(0, size, chunk_items):
+            tasks.append((index, start, min(start + chunk_items, size)))
+    return tasks
+
+
+def rendered_sections(tables, sizes, build, workers, chunk_items=CHUNK_ITEMS):
+    """
+    Yield (table, rendered rows) per section, in section order.
+
+    build(index, start, stop) returns (table, rows) for input items
+    start:stop of section index (all of them when start is None); with
+    workers > 1 it is called in the worker processes. tables[i] names
+    section i and sizes[i] is its item count as for plan_tasks(). The
+    rendered rows are render_rows() pairs, ready for pack_statements().
+    """
+    global _build
+
+    if workers <= 1 or not fork_available():
+        for index, table in enumerate(tables):
+            _, rows = build(index, None, None)
+            yield table, render_rows(table, rows)
+        return
+
+    tasks = plan_tasks(sizes, chunk_items)
+    _build = build
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+    try:
+        futures = [(task[0], pool.submit(_render, task)) for task in tasks]
+        position = 0
+        for index, table in enumerate(tables):
+            pieces = []
+            while position < len(futures) and futures[position][0] == index:
+                pieces.append(futures[position][1])
+                position += 1
+            yield table, chain.from_iterable(zip(*piece.result()) for piece in pieces)
+    finally:
+        # An early exit (error or closed generator) drops the tasks not started yet
+        pool.shutdown(cancel_futures=True)
+        _build = None
@@ -0,0 +1,156 @@
+"""
+Content-addressed archive of raw NOF1 responses
+
+Every payload a sync uses is kept, so tables can be rebuilt for past
+periods after a failed sync or a schema change (complete-sync-all.py
+--replay). Layout under .sync-state/payload-archive:
+
+    objects/<aa>/<sha256>.json.gz   gzip of the raw body, named by the
+                                    sha256 of the uncompressed body, so an
+                                    identical payload is stored only once
+    index.db                        SQLite fetches(job, timestamp, fetched_at,
+                                    hash, size): one row per fetch
+
+Only bodies the sync actually used are archived; endpoints the
+ResponseCache skipped wrote no rows and get no index row either. Objects
+are written as soon as a body is read (atomically, and only when missing).
+Index rows are staged and written by commit(timestamp) with the sync
+timestamp of the run, which is the timestamp the live sync put into the
+rows it generated, so a replay reproduces the same row ids.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from d1sync.cache import body_hash
+from d1sync.state import state_path
+
+ARCHIVE_DIR = 'payload-archive'
+INDEX_FILE = 'index.db'
+
+COMPRESS_LEVEL = 6
+
+
+class PayloadArchive:
+    """Deduplicated store of raw response bodies, indexed by job and sync time"""
+
+    def __init__(self, path=None):
+        self.path = path or state_path(ARCHIVE_DIR)
+        os.makedirs(os.path.join(self.path, 'objects'), exist_ok=True)
+        self._pending = []
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(os.path.join(self.path, INDEX_FILE), check_same_thread=False)
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS fetches (
+                job TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (job, timestamp)
+            ) WITHOUT ROWID
+        ''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_fetches_time ON fetches(timestamp)')
+
+    def _object(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], f'{digest}.json.gz')
+
+    def put(self, body, digest=None):
+        """Store a body (bytes or a spooled file) unless it is already archived; returns its hash"""
+        if digest is None:
+            if not isinstance(body, bytes):
+                raise ValueError('a spooled body needs its digest')
+            digest = body_hash(body)
+
+        path = self._object(digest)
+        if os.path.exists(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=COMPRESS_LEVEL, mtime=0) as f:
+                if isinstance(body, bytes):
+                    f.write(body)
+                else:
+                    body.seek(0)
+                    shutil.copyfileobj(body, f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def stage(self, job, body, digest, size):
+        """Archive the body fetched for job and stage its index row"""
+        self.put(body, digest)
+        with self._lock:
+            self._pending.append((job, time.time(), digest, size))
+
+    def commit(self, timestamp):
+        """Index the staged fetches under the sync timestamp of their run"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO fetches (job, timestamp, fetched_at, hash, size) VALUES (?, ?, ?, ?, ?)',
+                ((job, timestamp, fetched_at, digest, size) for job, fetched_at, digest, size in pending)
+            )
+        return len(pending)
+
+    def fetches(self, jobs, start=None, end=None):
+        """(timestamp, job, hash) of the indexed fetches of jobs with start <= timestamp < end, oldest first"""
+        jobs = list(jobs)
+        where = [f'job IN ({",".join("?" * len(jobs))})']
+        params = jobs
+        if start is not None:
+            where.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            where.append('timestamp < ?')
+            params.append(end)
+        return self._db.execute(
+            f'SELECT timestamp, job, hash FROM fetches WHERE {" AND ".join(where)} ORDER BY timestamp, job',
+            params
+        ).fetchall()
+
+    def load(self, digest):
+        """Decoded payload of an archived body"""
+        with gzip.open(self._object(digest), 'rb') as f:
+            return json.load(f)
+
+    def replay(self, jobs, start=None, end=None):
+        """
+        Yield (timestamp, job, payload) for the archived fetches of jobs in
+        [start, end), oldest first. Each distinct body is decoded once per
+        run of consecutive identical fetches.
+        """
+        last = {}
+        for timestamp, job, digest in self.fetches(jobs, start, end):
+            cached = last.get(job)
+            if cached is None or cached[0] != digest:
+                cached = last[job] = (digest, self.load(digest))
+            yield timestamp, job, cached[1]
+
+    def stats(self):
+        """Fetch rows, distinct payloads and bytes on disk"""
+        fetches, distinct = self._db.execute('SELECT COUNT(*), COUNT(DISTINCT hash) FROM fetches').fetchone()
+        stored = 0
+        for root, _, files in os.walk(os.path.join(self.path, 'objects')):
+            stored += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return {'fetches': fetches, 'payloads': distinct, 'bytes': stored}
+
+    def close(self):
+        self._db.close()
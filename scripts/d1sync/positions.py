@@ -0,0 +1,129 @@
+"""
+Delta encoding of account position snapshots
+
+/account-totals returns every open position of every model on each call,
+although between two five-minute syncs most positions only change their
+mark price. PositionSnapshot compares the payload with the last snapshot
+that was written and classifies each (model, symbol):
+
+    opened    not in the previous snapshot
+    closed    in the previous snapshot, gone now
+    resized   quantity or another structural field changed
+    marked    only the mark-to-market fields (MARK_FIELDS) moved
+
+Only opened/resized positions get a full account_positions row; a closed
+position gets a zero-quantity row. Marked positions go to the narrow
+position_marks table, and account_totals only carries positions_data when
+the structure of the account changed.
+"""
+
+from d1sync.state import load_state, save_state
+
+STATE_FILE = 'positions-snapshot-d1-alphaarena-db.json'
+
+OPENED = 'opened'
+CLOSED = 'closed'
+RESIZED = 'resized'
+MARKED = 'marked'
+
+# Fields that move with the price alone
+MARK_FIELDS = ('current_price', 'unrealized_pnl', 'margin')
+
+
+def account_model_id(account_id):
+    return account_id.rsplit('_', 1)[0] if '_' in account_id else account_id
+
+
+def _structure(pos):
+    return {key: value for key, value in pos.items() if key not in MARK_FIELDS}
+
+
+def classify(old, new):
+    """Change kind between two versions of a position, None when identical"""
+    if old is None:
+        return OPENED
+    if new is None:
+        return CLOSED
+    if _structure(old) != _structure(new):
+        return RESIZED
+    if old != new:
+        return MARKED
+    return None
+
+
+class PositionChanges:
+    """What changed in one account-totals payload"""
+
+    def __init__(self):
+        # (account, structure_changed) for every account snapshot to write
+        self.accounts = []
+        # (account_id, model_id, symbol, pos, kind) for opened/resized/closed
+        self.positions = []
+        # (model_id, symbol, pos) for mark-only changes
+        self.marks = []
+
+    def counts(self):
+        counts = {OPENED: 0, CLOSED: 0, RESIZED: 0, MARKED: len(self.marks)}
+        for *_, kind in self.positions:
+            counts[kind] += 1
+        return counts
+
+
+class PositionSnapshot:
+    """
+    Last written positions per model, persisted under .sync-state
+    (kept in memory only when state_file is None, e.g. for a replay)
+    """
+
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+        self.accounts = (load_state(state_file, {}) or {}) if state_file else {}
+        self._pending = None
+
+    def diff(self, accounts, full=False):
+        """
+        Classify every position of accounts against the stored snapshot.
+
+        With full=True the stored snapshot is ignored and everything is
+        reported as opened. The new snapshot is staged for commit().
+        """
+        previous = {} if full else self.accounts
+        changes = PositionChanges()
+        staged = dict(previous)
+
+        for account in accounts:
+            account_id = account.get('id', '')
+            model_id = account_model_id(account_id)
+            positions = account.get('positions', {})
+            before = previous.get(model_id)
+
+            # The same snapshot id was already written in full
+            if before is not None and before['account_id'] == account_id:
+                continue
+
+            old_positions = before['positions'] if before else {}
+            structure_changed = before is None
+            for symbol in sorted(set(old_positions) | set(positions)):
+                old = old_positions.get(symbol)
+                new = positions.get(symbol)
+                kind = classify(old, new)
+                if kind == MARKED:
+                    changes.marks.append((model_id, symbol, new))
+                elif kind is not None:
+                    structure_changed = True
+                    changes.positions.append((account_id, model_id, symbol, new or old, kind))
+
+            changes.accounts.append((account, structure_changed))
+            staged[model_id] = {'account_id': account_id, 'positions': positions}
+
+        self._pending = staged
+        return changes
+
+    def commit(self):
+        """Persist the snapshot staged by the last diff() call"""
+        if self._pending is None:
+            return
+        if self.state_file:
+            save_state(self.state_file, self._pending)
+        self.accounts = self._pending
+        self._pending = None
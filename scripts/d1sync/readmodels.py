@@ -0,0 +1,226 @@
+"""
+Read models materialized during sync
+
+The API routes rebuild equity curves, leaderboard movements and per-symbol
+PnL from the raw tables on every request, while the sync already holds the
+payloads those come from. So the sync also keeps three compact tables a
+route reads by primary key:
+
+    model_equity_curves   one row per (model, resolution): the account_totals
+                          equity curve downsampled to the last sample of each
+                          bucket, as a JSON array of at most RESOLUTIONS points
+    leaderboard_deltas    one row per model: rank, equity and return change
+                          since the previous leaderboard snapshot
+    model_symbol_pnl      one row per (model, symbol): closed trades, wins,
+                          net/gross PnL, fees, best and worst trade
+
+ReadModels keeps what was last written under .sync-state. New account
+snapshots are folded into the stored curves, and only rows whose values
+changed are written. Like the other incremental state, diff() stages the
+new state and commit() persists it once the batch landed.
+"""
+
+import copy
+import json
+
+from d1sync.metrics import TradeColumns, symbol_pnl
+from d1sync.schema import extract_rows
+from d1sync.sqlwriter import TABLES
+from d1sync.state import load_state, save_state
+
+STATE_FILE = 'read-models-d1-alphaarena-db.json'
+
+# name -> (bucket seconds, points kept): a day at 5 minutes, a month hourly,
+# two years daily
+RESOLUTIONS = {
+    '5m': (5 * 60, 288),
+    '1h': (60 * 60, 720),
+    '1d': (24 * 60 * 60, 730)
+}
+
+# Equity is stored to the cent in the curve points
+EQUITY_DIGITS = 2
+
+_ACCOUNT = {name: index for index, name in enumerate(TABLES['account_totals'])}
+_LEADERBOARD = {name: index for index, name in enumerate(TABLES['leaderboard_cache'])}
+
+# model_symbol_pnl values compared to decide whether a row changed
+_PNL_FIELDS = TABLES['model_symbol_pnl'][2:-1]
+
+
+def fold_point(points, timestamp, equity, bucket_seconds, limit):
+    """
+    Fold one sample into a downsampled curve (a list of [bucket, equity]),
+    in place. A sample in the last bucket replaces its value; samples older
+    than the last bucket are ignored. Returns True when the curve changed.
+    """
+    bucket = timestamp - timestamp % bucket_seconds
+    if points and bucket < points[-1][0]:
+        return False
+    if points and bucket == points[-1][0]:
+        if points[-1][1] == equity:
+            return False
+        points[-1][1] = equity
+        return True
+    points.append([bucket, equity])
+    if len(points) > limit:
+        del points[:len(points) - limit]
+    return True
+
+
+class ReadModelChanges:
+    """Read-model rows (dicts) to write for one sync"""
+
+    def __init__(self):
+        self.curves = []
+        self.deltas = []
+        self.symbol_pnl = []
+        # Trade arrays built for the PnL breakdown, reused by the metrics sections
+        self.columns = None
+
+    def counts(self):
+        return {
+            'model_equity_curves': len(self.curves),
+            'leaderboard_deltas': len(self.deltas),
+            'model_symbol_pnl': len(self.symbol_pnl)
+        }
+
+
+class ReadModels:
+    """
+    Last written read models, persisted under .sync-state
+    (kept in memory only when state_file is None)
+    """
+
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+        state = (load_state(state_file, {}) or {}) if state_file else {}
+        # model -> {'last': sample timestamp, resolution: [[bucket, equity], ...]}
+        self.curves = state.get('curves', {})
+        # {'timestamp', 'standings': {model: [rank, equity, return_pct]}, 'previous': {'timestamp', 'standings'}}
+        self.leaderboard = state.get('leaderboard')
+        # model -> symbol -> [_PNL_FIELDS values]
+        self.symbol_pnl = state.get('symbol_pnl', {})
+        self._pending = None
+
+    def diff(self, data, timestamp, full=False):
+        """
+        Fold the payloads of one sync into the read models and return the
+        rows that changed (every row of each payload with full=True). Empty
+        payloads (failed, not due or unchanged) leave their model as it is.
+        The new state is staged for commit().
+        """
+        changes = ReadModelChanges()
+        curves = self._fold_curves(data, timestamp, full, changes)
+        leaderboard = self._leaderboard_deltas(data, timestamp, full, changes)
+        pnl = self._symbol_pnl(data, full, changes)
+        self._pending = (curves, leaderboard, pnl)
+        return changes
+
+    def _fold_curves(self, data, timestamp, full, changes):
+        accounts = data['account_totals'].get('accountTotals', [])
+        curves = copy.deepcopy(self.curves)
+        changed = set()
+
+        samples = sorted(
+            (row[_ACCOUNT['timestamp']], row[_ACCOUNT['model_id']], row[_ACCOUNT['total_equity']])
+            for row in extract_rows('account_totals', accounts, timestamp=timestamp, structure_changed=False)
+        )
+        for sample_time, model_id, equity in samples:
+            curve = curves.setdefault(model_id, {'last': None})
+            if curve['last'] is not None and sample_time <= curve['last']:
+                continue
+            curve['last'] = sample_time
+            equity = round(equity, EQUITY_DIGITS)
+            for resolution, (bucket_seconds, limit) in RESOLUTIONS.items():
+                if fold_point(curve.setdefault(resolution, []), sample_time, equity, bucket_seconds, limit):
+                    changed.add((model_id, resolution))
+
+        if full:
+            changed = {
+                (model_id, resolution)
+                for model_id, curve in curves.items() for resolution in RESOLUTIONS if curve.get(resolution)
+            }
+        for model_id, resolution in sorted(changed):
+            curve = curves[model_id]
+            points = curve[resolution]
+            changes.curves.append({
+                'model_id': model_id,
+                'resolution': resolution,
+                'points': json.dumps(points, separators=(',', ':')),
+                'num_points': len(points),
+                'first_ts': points[0][0],
+                'last_ts': curve['last'],
+                'last_equity': points[-1][1]
+            })
+        return curves
+
+    def _leaderboard_deltas(self, data, timestamp, full, changes):
+        entries = data['leaderboard'].get('leaderboard', [])
+        if not entries:
+            return self.leaderboard
+
+        standings = {}
+        for index, row in enumerate(extract_rows('leaderboard', entries, timestamp=timestamp)):
+            # Same fallback as /api/leaderboard: list position when the entry has no rank
+            rank = row[_LEADERBOARD['rank']] or index + 1
+            standings[row[_LEADERBOARD['model_id']]] = [
+                rank, row[_LEADERBOARD['equity']], row[_LEADERBOARD['return_pct']]
+            ]
+
+        current = self.leaderboard
+        if current is None or standings != current['standings']:
+            # A new snapshot: the one written last becomes the baseline
+            previous = current or {'timestamp': None, 'standings': {}}
+            current = {
+                'timestamp': timestamp,
+                'standings': standings,
+                'previous': {'timestamp': previous['timestamp'], 'standings': previous['standings']}
+            }
+        elif not full:
+            return current
+
+        previous = current['previous']
+        for model_id, (rank, equity, return_pct) in current['standings'].items():
+            before = previous['standings'].get(model_id)
+            changes.deltas.append({
+                'model_id': model_id,
+                'timestamp': current['timestamp'],
+                'rank': rank,
+                'previous_rank': before[0] if before else None,
+                'rank_change': before[0] - rank if before else None,
+                'equity': equity,
+                'equity_change': equity - before[1] if before else None,
+                'return_pct': return_pct,
+                'return_pct_change': return_pct - before[2] if before else None,
+                'previous_timestamp': previous['timestamp'] if before else None
+            })
+        return current
+
+    def _symbol_pnl(self, data, full, changes):
+        trades = data['trades'].get('trades', [])
+        if not trades:
+            return self.symbol_pnl
+
+        changes.columns = TradeColumns(trades)
+        stored = {} if full else self.symbol_pnl
+        pnl = copy.deepcopy(self.symbol_pnl)
+        for row in symbol_pnl(changes.columns):
+            values = [row[field] for field in _PNL_FIELDS]
+            if stored.get(row['model_id'], {}).get(row['symbol']) != values:
+                changes.symbol_pnl.append(row)
+            pnl.setdefault(row['model_id'], {})[row['symbol']] = values
+        return pnl
+
+    def commit(self):
+        """Persist the state staged by the last diff() call"""
+        if self._pending is None:
+            return
+        self.curves, self.leaderboard, self.symbol_pnl = self._pending
+        self._pending = None
+        if self.state_file:
+            save_state(self.state_file, {
+                'curves': self.curves,
+                'leaderboard': self.leaderboard,
+                'symbol_pnl': self.symbol_pnl
+            })
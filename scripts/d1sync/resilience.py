@@ -0,0 +1,172 @@
+"""
+Retry, circuit breaker and deadline policy for the NOF1 fetch stage
+
+A degraded NOF1 endpoint used to cost a full 30-60 s timeout per request,
+after which its section was quietly empty. d1sync.fetch now runs every
+endpoint under:
+
+    retries           transient failures (connection errors, timeouts, 429
+                      and 5xx responses) are retried up to MAX_ATTEMPTS times
+                      with full-jitter exponential backoff, honouring a
+                      Retry-After header
+    Deadline          one time budget for the whole fetch stage: request
+                      timeouts are capped to what is left and no attempt
+                      starts once it is spent
+    CircuitBreakers   an endpoint that failed FAILURE_THRESHOLD fetches in a
+                      row is not requested at all for a cooldown (doubling up
+                      to MAX_COOLDOWN); afterwards a single probe request
+                      decides whether it closes again
+
+Breaker state is persisted under .sync-state, so one-shot cron runs see the
+failures of the runs before them. An endpoint that fails or is skipped
+falls back to its last good body (see fetch_endpoints()), flagged stale.
+"""
+
+import random
+import threading
+import time
+
+import requests
+
+from d1sync.state import load_state, save_state
+
+MAX_ATTEMPTS = 3
+
+# Backoff before retry n is uniform in [0, min(BACKOFF_MAX, BACKOFF_BASE * 2**n)]
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Total budget of one fetch stage, in seconds
+DEFAULT_DEADLINE = 90
+
+# Consecutive failed fetches that open an endpoint's breaker
+FAILURE_THRESHOLD = 3
+COOLDOWN = 60
+MAX_COOLDOWN = 30 * 60
+
+STATE_FILE = 'circuit-breakers.json'
+
+# Shortest request timeout worth starting with what is left of the deadline
+MIN_TIMEOUT = 1.0
+
+
+class DeadlineExceeded(Exception):
+    """The fetch stage ran out of time before the request could be made"""
+
+
+class CircuitOpen(Exception):
+    """The endpoint's breaker is open; it was not requested"""
+
+
+class Deadline:
+    """Time budget shared by the requests of one fetch stage (None = unlimited)"""
+
+    def __init__(self, seconds=DEFAULT_DEADLINE):
+        self.seconds = seconds
+        self.at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        return None if self.at is None else max(0.0, self.at - time.monotonic())
+
+    def timeout(self, timeout):
+        """(connect, read) timeout capped to the remaining budget"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if remaining < MIN_TIMEOUT:
+            raise DeadlineExceeded(f'fetch deadline of {self.seconds}s exceeded')
+        return tuple(min(part, remaining) for part in timeout)
+
+
+def is_retryable(error):
+    """Whether a failed request is worth repeating"""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status == 429 or (status is not None and status >= 500)
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError))
+
+
+def backoff(attempt, error=None):
+    """Seconds to wait before retry number attempt (1-based)"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def with_retries(request, deadline, attempts=MAX_ATTEMPTS):
+    """
+    Call request() until it succeeds, a failure is not retryable,
+    attempts run out or the deadline leaves no room for the backoff.
+    Returns (result, retries made); the last error is raised with its
+    retries in a `retries` attribute.
+    """
+    attempt = 0
+    while True:
+        try:
+            return request(), attempt
+        except Exception as e:
+            attempt += 1
+            delay = backoff(attempt, e) if is_retryable(e) and attempt < attempts else None
+            remaining = deadline.remaining()
+            if delay is None or (remaining is not None and remaining < delay + MIN_TIMEOUT):
+                e.retries = attempt - 1
+                raise
+            time.sleep(delay)
+
+
+class CircuitBreakers:
+    """
+    Per-endpoint breakers, persisted under .sync-state
+    (kept in memory only when state_file is None)
+    """
+
+    def __init__(self, state_file=STATE_FILE, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.state_file = state_file
+        self.threshold = threshold
+        self.cooldown = cooldown
+        # name -> {'failures', 'opened_at', 'cooldown'}; closed breakers have no entry
+        self.endpoints = (load_state(state_file, {}) or {}) if state_file else {}
+        self._lock = threading.Lock()
+
+    def check(self, name, now=None):
+        """
+        Raise CircuitOpen while name's breaker is open. Returns True when the
+        request is the probe of a breaker whose cooldown ran out.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self.endpoints.get(name)
+            if entry is None or entry['opened_at'] is None:
+                return False
+            retry_in = entry['opened_at'] + entry['cooldown'] - now
+        if retry_in > 0:
+            raise CircuitOpen(f'circuit open after {entry["failures"]} failures, next probe in {retry_in:.0f}s')
+        return True
+
+    def record(self, name, ok, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            if ok:
+                self.endpoints.pop(name, None)
+                return
+            entry = self.endpoints.setdefault(name, {'failures': 0, 'opened_at': None, 'cooldown': self.cooldown})
+            entry['failures'] += 1
+            if entry['opened_at'] is not None:
+                # The probe failed: stay open for longer
+                entry['cooldown'] = min(entry['cooldown'] * 2, MAX_COOLDOWN)
+                entry['opened_at'] = now
+            elif entry['failures'] >= self.threshold:
+                entry['opened_at'] = now
+
+    def open_endpoints(self):
+        with self._lock:
+            return sorted(name for name, entry in self.endpoints.items() if entry['opened_at'] is not None)
+
+    def save(self):
+        if self.state_file:
+            with self._lock:
+                endpoints = {name: dict(entry) for name, entry in self.endpoints.items()}
+            save_state(self.state_file, endpoints)
@@ -0,0 +1,240 @@
+"""
+Retention and downsampling for the append-only snapshot tables
+
+leaderboard_history, account_positions and position_marks get new rows
+per model (per symbol) on every sync. Compaction keeps them bounded:
+
+- rows newer than RAW_WINDOW stay at full resolution
+- older rows are rolled up into hourly buckets of the *_rollup table
+- hourly buckets older than HOURLY_WINDOW are rolled up into daily buckets
+- rolled-up rows are deleted in batches of at most PRUNE_BATCH rows,
+  except the latest row of each position: account_positions and
+  position_marks only get a row when a position changes, so that row
+  is the position's current state however old it is
+
+Each bucket keeps last/min/max of the tracked values. Cutoffs are aligned
+to bucket boundaries, so a bucket is always rolled up from all of its rows
+at once. Re-running after a partial prune only merges a subset of the same
+rows into the bucket (min/max/last are idempotent, samples keeps the
+larger count), so an interrupted compaction can simply be run again.
+"""
+
+from itertools import chain
+
+from d1sync.execute import SERIAL_BARRIER
+from d1sync.sqlwriter import write_statements
+from d1sync.state import state_path
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Full-resolution window, then hourly buckets, then daily buckets forever
+RAW_WINDOW = 2 * DAY
+HOURLY_WINDOW = 30 * DAY
+
+# Upper bound on rows removed by a single DELETE statement
+PRUNE_BATCH = 5000
+
+# Written under the state dir, next to the journal that makes it resumable
+COMPACT_SQL_FILE = 'compact.sql'
+
+# How often the daemon compacts
+COMPACT_INTERVAL = HOUR
+
+# source table -> how it is rolled up
+ROLLUPS = {
+    'leaderboard_history': {
+        'rollup': 'leaderboard_history_rollup',
+        'time': 'timestamp',
+        'keys': ('model_id',),
+        'ranges': ('equity', 'return_pct', 'sharpe'),
+        'lasts': ('rank', 'num_trades', 'win_rate')
+    },
+    'account_positions': {
+        'rollup': 'account_positions_rollup',
+        'time': 'cached_at',
+        'keys': ('model_id', 'symbol'),
+        'ranges': ('current_price', 'unrealized_pnl'),
+        'lasts': ('quantity', 'leverage'),
+        'keep_latest': True
+    },
+    'position_marks': {
+        'rollup': 'position_marks_rollup',
+        'time': 'timestamp',
+        'keys': ('model_id', 'symbol'),
+        'ranges': ('current_price', 'unrealized_pnl'),
+        'lasts': ('margin',),
+        'keep_latest': True
+    }
+}
+
+
+def _value_columns(spec):
+    columns = []
+    for name in spec['ranges']:
+        columns += [f'{name}_last', f'{name}_min', f'{name}_max']
+    columns += [f'{name}_last' for name in spec['lasts']]
+    return columns
+
+
+def _merge_clause(spec):
+    """ON CONFLICT update that folds a re-computed bucket into the stored one"""
+    keys = ', '.join(spec['keys'])
+    newer = 'excluded.last_ts >= last_ts'
+    sets = [
+        'samples = MAX(samples, excluded.samples)',
+        'first_ts = MIN(first_ts, excluded.first_ts)'
+    ]
+    for column in _value_columns(spec):
+        if column.endswith('_min'):
+            sets.append(f'{column} = MIN(COALESCE({column}, excluded.{column}), COALESCE(excluded.{column}, {column}))')
+        elif column.endswith('_max'):
+            sets.append(f'{column} = MAX(COALESCE({column}, excluded.{column}), COALESCE(excluded.{column}, {column}))')
+        else:
+            sets.append(f'{column} = CASE WHEN {newer} THEN excluded.{column} ELSE {column} END')
+    sets += ['last_ts = MAX(last_ts, excluded.last_ts)', 'cached_at = excluded.cached_at']
+    return f'ON CONFLICT ({keys}, resolution, bucket) DO UPDATE SET {", ".join(sets)}'
+
+
+def rollup_raw_statement(table, cutoff, now):
+    """Roll raw rows older than cutoff into hourly buckets"""
+    spec = ROLLUPS[table]
+    keys = ', '.join(spec['keys'])
+    time = f'CAST({spec["time"]} AS INTEGER)'
+
+    aggregates = []
+    for name in spec['ranges']:
+        aggregates += [f'MAX(CASE WHEN rn = 1 THEN {name} END)', f'MIN({name})', f'MAX({name})']
+    aggregates += [f'MAX(CASE WHEN rn = 1 THEN {name} END)' for name in spec['lasts']]
+
+    columns = ', '.join([*spec['keys'], 'resolution', 'bucket', 'samples', 'first_ts', 'last_ts',
+                         *_value_columns(spec), 'cached_at'])
+    return (
+        f'INSERT INTO {spec["rollup"]} ({columns}) '
+        f"SELECT {keys}, 'hour', bucket, COUNT(*), MIN(ts), MAX(ts), {', '.join(aggregates)}, {now} "
+        f'FROM (SELECT *, {time} AS ts, {time} / {HOUR} * {HOUR} AS bucket, '
+        f'ROW_NUMBER() OVER (PARTITION BY {keys}, {time} / {HOUR} ORDER BY {time} DESC) AS rn '
+        f'FROM {table} WHERE {spec["time"]} < {cutoff}) '
+        f'WHERE 1 GROUP BY {keys}, bucket {_merge_clause(spec)};'
+    )
+
+
+def rollup_hourly_statement(table, cutoff, now):
+    """Roll hourly buckets older than cutoff into daily buckets"""
+    spec = ROLLUPS[table]
+    keys = ', '.join(spec['keys'])
+
+    aggregates = []
+    for column in _value_columns(spec):
+        if column.endswith('_min'):
+            aggregates.append(f'MIN({column})')
+        elif column.endswith('_max'):
+            aggregates.append(f'MAX({column})')
+        else:
+            aggregates.append(f'MAX(CASE WHEN rn = 1 THEN {column} END)')
+
+    columns = ', '.join([*spec['keys'], 'resolution', 'bucket', 'samples', 'first_ts', 'last_ts',
+                         *_value_columns(spec), 'cached_at'])
+    return (
+        f'INSERT INTO {spec["rollup"]} ({columns}) '
+        f"SELECT {keys}, 'day', day, SUM(samples), MIN(first_ts), MAX(last_ts), {', '.join(aggregates)}, {now} "
+        f'FROM (SELECT *, bucket / {DAY} * {DAY} AS day, '
+        f'ROW_NUMBER() OVER (PARTITION BY {keys}, bucket / {DAY} ORDER BY last_ts DESC) AS rn '
+        f"FROM {spec['rollup']} WHERE resolution = 'hour' AND bucket < {cutoff}) "
+        f'WHERE 1 GROUP BY {keys}, day {_merge_clause(spec)};'
+    )
+
+
+def prune_statements(table, where, count, batch=PRUNE_BATCH):
+    """Bounded DELETEs removing the count rows matching where"""
+    for _ in range(-(-count // batch)):
+        yield f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT {batch});'
+
+
+def prune_where(table, cutoff):
+    """Condition of the raw rows of table that compaction deletes"""
+    spec = ROLLUPS[table]
+    time = spec['time']
+    where = f'{time} < {cutoff}'
+    if spec.get('keep_latest'):
+        same_key = ' AND '.join(f'newer.{key} = {table}.{key}' for key in spec['keys'])
+        where += f' AND EXISTS (SELECT 1 FROM {table} AS newer WHERE {same_key} AND newer.{time} > {table}.{time})'
+    return where
+
+
+def _count(backend, table, where):
+    rows = backend.query(f'SELECT COUNT(*) AS n FROM {table} WHERE {where}')
+    return int(rows[0]['n']) if rows else 0
+
+
+def compaction_plan(backend, now):
+    """
+    Count what compaction would remove.
+
+    Returns {table: (where, rows)} for the raw tables and the hourly
+    buckets of their rollup tables, plus the two cutoffs.
+    """
+    raw_cutoff = (now - RAW_WINDOW) // HOUR * HOUR
+    hourly_cutoff = (now - HOURLY_WINDOW) // DAY * DAY
+
+    plan = {}
+    for table, spec in ROLLUPS.items():
+        where = prune_where(table, raw_cutoff)
+        plan[table] = (where, _count(backend, table, where))
+
+        # Hourly buckets past the window, including the ones this run is
+        # about to create from a raw backlog older than hourly_cutoff
+        where = f"resolution = 'hour' AND bucket < {hourly_cutoff}"
+        backlog = (
+            f'(SELECT 1 FROM {table} WHERE {spec["time"]} < {hourly_cutoff} '
+            f'GROUP BY {", ".join(spec["keys"])}, CAST({spec["time"]} AS INTEGER) / {HOUR})'
+        )
+        plan[spec['rollup']] = (where, _count(backend, spec['rollup'], where) + _count(backend, backlog, '1'))
+    return raw_cutoff, hourly_cutoff, plan
+
+
+def compaction_statements(raw_cutoff, hourly_cutoff, plan, now):
+    """Roll up first, then prune, so no row is deleted before it is aggregated"""
+    for table in ROLLUPS:
+        yield rollup_raw_statement(table, raw_cutoff, now)
+        yield rollup_hourly_statement(table, hourly_cutoff, now)
+    for table, (where, count) in plan.items():
+        yield from prune_statements(table, where, count)
+
+
+def _total_rows(backend):
+    return sum(
+        _count(backend, table, '1') + _count(backend, spec['rollup'], '1')
+        for table, spec in ROLLUPS.items()
+    )
+
+
+def compact(backend, now, sql_file=None):
+    """
+    Roll up and prune the ROLLUPS source tables, through sql_file (by
+    default COMPACT_SQL_FILE in the state dir, scoped to the backend).
+
+    Returns {table: rows pruned}, or None when executing the SQL failed.
+    """
+    if sql_file is None:
+        sql_file = state_path(f'{backend.key}-{COMPACT_SQL_FILE}')
+    print('\n🗜️  Compacting history tables...')
+    raw_cutoff, hourly_cutoff, plan = compaction_plan(backend, now)
+    rows_before = _total_rows(backend)
+
+    with open(sql_file, 'w', encoding='utf-8') as f:
+        # Every statement relies on the ones before it having landed
+        count, _ = write_statements(
+            f, chain([SERIAL_BARRIER], compaction_statements(raw_cutoff, hourly_cutoff, plan, now))
+        )
+        count -= 1
+    if not backend.execute_file(sql_file):
+        print('❌ Compaction failed!')
+        return None
+
+    deleted = {table: rows for table, (_, rows) in plan.items()}
+    for table, rows in deleted.items():
+        print(f'  {table:<28} {rows:>10,} rows pruned')
+    reclaimed = rows_before - _total_rows(backend)
+    print(f'✅ Compaction finished ({count} statements, {reclaimed:,} rows reclaimed net of new buckets)')
+    return deleted
@@ -0,0 +1,113 @@
+"""
+Per-job interval scheduler for the long-running sync daemon
+
+Each fetch job (an ENDPOINTS name) runs on the same cadence as its
+runJob() counterpart in worker-cron.ts; the analytics:<model> fetches are
+fanned out by the ticks themselves (see d1sync.models). Maintenance jobs
+such as compaction pass their own intervals. The scheduler keeps
+last-run time, duration and last error per job, persisted to
+.sync-state/daemon-status.json and shaped like getSyncStatus().
+"""
+
+import time
+from datetime import datetime, timezone
+
+from d1sync.cache import refresh_interval
+from d1sync.state import load_state, save_state
+
+STATUS_FILE = 'daemon-status.json'
+
+# How often the daemon wakes up to look for due jobs
+TICK_SECONDS = 30
+
+# A failed job is retried after this delay instead of waiting a full interval
+RETRY_SECONDS = 60
+
+# Python job names that differ from the runJob() names in worker-cron.ts
+WORKER_JOB_NAMES = {
+    'account_totals': 'account-totals',
+    'since_inception': 'since-inception',
+    'crypto_prices': 'crypto-prices'
+}
+
+# Jobs whose tables the Python sync writes exactly like the worker does.
+# Only these are stamped into sync_runs, so the worker skips them while the
+# daemon is healthy but keeps running everything else itself.
+MIRRORED_JOBS = {
+    'leaderboard', 'trades', 'conversations', 'account_totals', 'since_inception', 'crypto_prices'
+}
+
+
+def worker_job_name(job):
+    return WORKER_JOB_NAMES.get(job, job)
+
+
+def sync_runs_rows(jobs, started):
+    """sync_runs rows (job, last_run ms) for the mirrored jobs among those that ran"""
+    last_run = int(started * 1000)
+    return [(worker_job_name(job), last_run) for job in jobs if job in MIRRORED_JOBS]
+
+
+class JobScheduler:
+    """Tracks when each job last ran and which jobs are due"""
+
+    def __init__(self, jobs, status_file=STATUS_FILE, intervals=None):
+        self.jobs = list(jobs)
+        self.intervals = intervals or {}
+        self.status_file = status_file
+        saved = {item['job']: item for item in load_state(status_file, []) or []}
+        self.state = {
+            job: {
+                'lastRun': saved.get(job, {}).get('lastRun'),
+                'durationMs': saved.get(job, {}).get('durationMs'),
+                'error': saved.get(job, {}).get('error'),
+                'nextRun': saved.get(job, {}).get('nextRun', 0)
+            }
+            for job in self.jobs
+        }
+
+    def interval(self, job):
+        """Seconds between two runs of job; fetch jobs follow refresh_interval()"""
+        return self.intervals.get(job) or refresh_interval(job)
+
+    def due(self, now=None):
+        """Jobs whose interval has elapsed (or whose retry delay has passed)"""
+        now = time.time() if now is None else now
+        return [job for job in self.jobs if now >= (self.state[job]['nextRun'] or 0)]
+
+    def seconds_until_next(self, now=None):
+        now = time.time() if now is None else now
+        next_run = min((self.state[job]['nextRun'] or 0) for job in self.jobs)
+        return max(0.0, next_run - now)
+
+    def mark(self, job, started, duration, error=None):
+        entry = self.state[job]
+        entry['durationMs'] = int(duration * 1000)
+        entry['error'] = error
+        if error is None:
+            entry['lastRun'] = int(started * 1000)
+            entry['nextRun'] = started + self.interval(job)
+        else:
+            entry['nextRun'] = started + RETRY_SECONDS
+
+    def status(self):
+        """Job status list in the shape returned by worker-cron.ts getSyncStatus()"""
+        result = []
+        for job in sorted(self.jobs):
+            entry = self.state[job]
+            last_run = entry['lastRun']
+            result.append({
+                'job': job,
+                'lastRun': last_run,
+                'lastRunIso': (
+                    datetime.fromtimestamp(last_run / 1000, tz=timezone.utc).isoformat()
+                    if last_run else None
+                ),
+                'durationMs': entry['durationMs'],
+                'error': entry['error'],
+                'nextRun': entry['nextRun']
+            })
+        return result
+
+    def save(self):
+        save_state(self.status_file, self.status())
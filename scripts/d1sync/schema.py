@@ -0,0 +1,665 @@
+"""
+Declarative mapping from NOF1 payloads to D1 rows
+
+SOURCES declares, for every kind of payload item, which table it feeds and
+where each column of that table (in sqlwriter.TABLES order) comes from:
+
+    Get(*paths, default=, convert=, truthy=, optional=)
+                    first path present in the item ('a.b' reaches into a
+                    nested object), else default. With truthy=True the first
+                    truthy value wins instead, like a chain of `or`.
+    Ctx(name)       an extractor keyword argument (timestamp, model_id, ...)
+                    or one of the loop variables item, key and index
+    Ref(column)     the value of an earlier column of the same row
+    Call(fn, *args) fn applied to other specs
+    Const(value)
+
+Aliases in Get cover the field names that differ between payload versions
+and scripts (aiModelId vs id, totalTrades vs num_trades, nested analytics
+tables vs flat fields), so every script reads a table through the same
+declaration.
+
+extractor() compiles a source once into a generator function. The common
+case, an item holding every primary field, is served by one
+operator.itemgetter call; items missing a field take a per-key .get() path
+that applies the declared aliases and defaults. Both paths produce the same
+tuples.
+
+validated() checks batches of rows against the column types declared in
+the D1 schema files, one set of types per column and batch. A value of
+another type is coerced when that loses nothing (a number or a JSON
+document into a TEXT column); a row that still does not fit is skipped and
+counted instead of failing the whole sync.
+"""
+
+import json
+import math
+import numbers
+import operator
+import sqlite3
+from functools import lru_cache
+from itertools import islice
+
+from d1sync import blobs
+from d1sync.backends import SCHEMA_FILES
+from d1sync.positions import account_model_id
+from d1sync.sqlwriter import TABLES
+
+# Rows type-checked together by validated()
+VALIDATE_BATCH = 1000
+
+_EMPTY = {}
+
+# check_rows: a value that cannot be coerced to its column's type
+_REJECT = object()
+
+
+class Get:
+    __slots__ = ('paths', 'default', 'convert', 'truthy', 'optional')
+
+    def __init__(self, *paths, default=None, convert=None, truthy=False, optional=False):
+        self.paths = paths
+        self.default = default
+        self.convert = convert
+        self.truthy = truthy
+        # Usually absent: left out of the itemgetter fast path
+        self.optional = optional
+
+
+class Ctx:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Ref:
+    __slots__ = ('column',)
+
+    def __init__(self, column):
+        self.column = column
+
+
+class Call:
+    __slots__ = ('fn', 'args')
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+
+class Const:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Source:
+    """
+    Items of one payload array feeding one table.
+
+    With pairs=True the extractor iterates (key, item) pairs, e.g. the
+    .items() of a payload keyed by symbol or model.
+    """
+
+    def __init__(self, table, columns, pairs=False):
+        self.table = table
+        self.columns = columns
+        self.pairs = pairs
+
+
+def to_timestamp_seconds(value, fallback):
+    """Mirror of toTimestampSeconds() in worker-cron.ts"""
+    if isinstance(value, bool):
+        return fallback
+    if isinstance(value, (int, float)):
+        return math.floor(value)
+    if isinstance(value, str):
+        try:
+            return math.floor(float(value))
+        except ValueError:
+            pass
+    return fallback
+
+
+def conversation_id(item, timestamp):
+    conversation_time = to_timestamp_seconds(item.get('timestamp'), timestamp)
+    return item.get('id') or f"{item.get('model_id') or 'conversation'}-{conversation_time}"
+
+
+def _unrealized_pnl(positions):
+    total = 0
+    for pos in positions.values():
+        total += pos.get('unrealized_pnl', 0)
+    return total
+
+
+def _positions_data(positions, structure_changed):
+    return blobs.positions_data(positions) if structure_changed else None
+
+
+def _win_rate(wins, total):
+    return (wins / total * 100) if total > 0 else 0
+
+
+_TIMESTAMP = Ctx('timestamp')
+_ITEM = Ctx('item')
+_FALLBACK_TRADE_ID = Call('trade-{}-{}'.format, _TIMESTAMP, Ctx('index'))
+
+
+def _numbers(*names, default=0):
+    return {name: Get(name, default=default) for name in names}
+
+
+def _analytics(table, *names, flat=True):
+    """Columns read from a nested analytics table, falling back to flat fields"""
+    return {
+        name: Get(*(f'{t}.{name}' for t in table.split()), *((name,) if flat else ()), default=0)
+        for name in names
+    }
+
+
+SOURCES = {
+    # /leaderboard entries (sync-d1-batch.py still sees the camelCase names)
+    'leaderboard': Source('leaderboard_cache', {
+        'model_id': Get('id', 'aiModelId', default=''),
+        'num_trades': Get('num_trades', 'totalTrades', default=0),
+        'sharpe': Get('sharpe', 'sharpeRatio', default=0),
+        'win_dollars': Get('win_dollars', 'winDollars', default=0),
+        'num_losses': Get('num_losses', 'numLosses', default=0),
+        'lose_dollars': Get('lose_dollars', 'loseDollars', default=0),
+        'return_pct': Get('return_pct', 'returnPct', default=0),
+        'equity': Get('equity', 'totalAssets', default=0),
+        'num_wins': Get('num_wins', 'numWins', default=0),
+        'rank': Get('rank', default=0),
+        'cached_at': _TIMESTAMP
+    }),
+    'leaderboard_history': Source('leaderboard_history', {
+        'id': Call('{}-{}'.format, Get('id', default=''), _TIMESTAMP),
+        'model_id': Get('id', default=''),
+        'timestamp': _TIMESTAMP,
+        'rank': Const(0),
+        **_numbers('equity', 'return_pct', 'sharpe', 'num_trades'),
+        'win_rate': Call(_win_rate, Get('num_wins', default=0), Get('num_trades', default=0)),
+        'cached_at': _TIMESTAMP
+    }),
+    'recent_trades': Source('recent_trades_cache', {
+        'id': Get('id', default=_FALLBACK_TRADE_ID),
+        'model_id': Get('model_id', 'aiModelId', default=''),
+        'symbol': Get('symbol', default=''),
+        'side': Get('side', default=''),
+        'entry_time': Get('entry_time', 'entryTime', default=_TIMESTAMP),
+        'exit_time': Get('exit_time', 'exitTime', convert='or_none'),
+        'realized_net_pnl': Get('realized_net_pnl', 'realizedNetPnl', 'pnl'),
+        'trade_data': Call(blobs.trade_data, _ITEM, *map(Ref, blobs.TRADE_DATA_COLUMNS)),
+        'cached_at': _TIMESTAMP
+    }),
+    'trades': Source('trades_detailed', {
+        'id': Get('id', default=_FALLBACK_TRADE_ID),
+        'model_id': Get('model_id', default=''),
+        'symbol': Get('symbol', default=''),
+        'side': Get('side', default=''),
+        'trade_type': Get('trade_type', default=Ref('side')),
+        'leverage': Get('leverage', default=1),
+        'quantity': Get('quantity', 'entry_sz', default=0),
+        'confidence': Get('confidence', default=0),
+        'entry_time': Get('entry_time', default=_TIMESTAMP),
+        'entry_human_time': Get('entry_human_time', default=''),
+        **_numbers('entry_price', 'entry_sz'),
+        'entry_oid': Get('entry_oid', default='', convert='str'),
+        'entry_tid': Get('entry_tid', default='', convert='str'),
+        **_numbers('entry_commission_dollars', 'entry_closed_pnl'),
+        'entry_crossed': Get('entry_crossed', convert='flag'),
+        'exit_time': Get('exit_time', convert='or_none'),
+        'exit_human_time': Get('exit_human_time', default=''),
+        **_numbers('exit_price', 'exit_sz'),
+        'exit_oid': Get('exit_oid', default='', convert='str'),
+        'exit_tid': Get('exit_tid', default='', convert='str'),
+        **_numbers('exit_commission_dollars', 'exit_closed_pnl'),
+        'exit_crossed': Get('exit_crossed', convert='flag'),
+        'realized_net_pnl': Get('realized_net_pnl'),
+        'realized_gross_pnl': Get('realized_gross_pnl'),
+        'total_commission_dollars': Get('total_commission_dollars', default=0),
+        'trade_id': Get('trade_id', default=Ref('id'), optional=True),
+        'cached_at': _TIMESTAMP
+    }),
+    # metrics.model_stats() / metrics.daily_stats() dicts
+    'model_stats': Source('model_performance_cache', {
+        **_numbers(*TABLES['model_performance_cache'][:-1], default=None),
+        'cached_at': _TIMESTAMP
+    }),
+    'daily_stats': Source('daily_stats_cache', {
+        **_numbers(*TABLES['daily_stats_cache'][:-1], default=None),
+        'cached_at': _TIMESTAMP
+    }),
+    # d1sync.readmodels dicts
+    'equity_curves': Source('model_equity_curves', {
+        **_numbers(*TABLES['model_equity_curves'][:-1], default=None),
+        'cached_at': _TIMESTAMP
+    }),
+    'leaderboard_deltas': Source('leaderboard_deltas', {
+        **_numbers(*TABLES['leaderboard_deltas'][:-1], default=None),
+        'cached_at': _TIMESTAMP
+    }),
+    'symbol_pnl': Source('model_symbol_pnl', {
+        **_numbers(*TABLES['model_symbol_pnl'][:-1], default=None),
+        'cached_at': _TIMESTAMP
+    }),
+    # (model_id, first /analytics entry) pairs; the nested tables and flat
+    # fallbacks follow syncAnalyticsSummary() in worker-cron.ts
+    'model_analytics': Source('model_analytics', {
+        'model_id': Ctx('key'),
+        'updated_at': Get('updated_at', default=_TIMESTAMP),
+        'last_trade_exit_time': Get('last_trade_exit_time', convert='or_none'),
+        **_analytics(
+            'fee_pnl_moves_breakdown_table',
+            'overall_pnl_with_fees', 'overall_pnl_without_fees', 'total_fees_paid',
+            'avg_net_pnl', 'avg_gross_pnl', 'std_net_pnl', 'std_gross_pnl',
+            'biggest_net_gain', 'biggest_net_loss', flat=False
+        ),
+        **_analytics(
+            'winners_losers_breakdown_table',
+            'win_rate', 'avg_winners_net_pnl', 'avg_losers_net_pnl', flat=False
+        ),
+        **_analytics('overall_trades_overview_table', 'total_trades'),
+        **_analytics(
+            'longs_shorts_breakdown_table overall_trades_overview_table',
+            'num_long_trades', 'num_short_trades'
+        ),
+        **_analytics(
+            'overall_trades_overview_table holding_period_breakdown_table',
+            'avg_holding_period_mins', 'median_holding_period_mins'
+        ),
+        **_analytics(
+            'overall_trades_overview_table trade_size_breakdown_table',
+            'avg_size_of_trade_notional', 'median_size_of_trade_notional'
+        ),
+        **_analytics('signals_breakdown_table', 'total_signals', 'num_long_signals', 'num_short_signals'),
+        **_analytics(
+            'signals_breakdown_table confidence_breakdown_table',
+            'avg_confidence', 'median_confidence'
+        ),
+        **_analytics('signals_breakdown_table leverage_breakdown_table', 'avg_leverage'),
+        'sharpe_ratio': Get('sharpe_ratio', default=0),
+        'cached_at': _TIMESTAMP
+    }, pairs=True),
+    'since_inception': Source('since_inception_values', {
+        'id': Get('id', default=''),
+        'model_id': Get('model_id', default=''),
+        'nav_since_inception': Get('nav_since_inception', default=0),
+        'inception_date': Get('inception_date', default=_TIMESTAMP),
+        'num_invocations': Get('num_invocations', default=0),
+        'cached_at': _TIMESTAMP
+    }),
+    # (symbol, price) pairs of /crypto-prices
+    'crypto_prices': Source('crypto_prices_realtime', {
+        'symbol': Ctx('key'),
+        'price': Get('price', default=0),
+        'timestamp': Get('timestamp', default=_TIMESTAMP),
+        'cached_at': _TIMESTAMP
+    }, pairs=True),
+    # d1sync.candles dicts
+    'price_candles': Source('crypto_price_candles', {
+        **_numbers(*TABLES['crypto_price_candles'][:-1], default=None),
+        'cached_at': _TIMESTAMP
+    }),
+    'model_registry': Source('model_registry', {
+        **_numbers(*TABLES['model_registry'][:-1], default=None),
+        'cached_at': _TIMESTAMP
+    }),
+    'account_totals': Source('account_totals', {
+        'id': Get('id', default=''),
+        'model_id': Call(account_model_id, Ref('id')),
+        'timestamp': Get('timestamp', default=_TIMESTAMP),
+        'realized_pnl': Get('realized_pnl', default=0),
+        'unrealized_pnl': Call(_unrealized_pnl, Get('positions', default=_EMPTY)),
+        'total_equity': Call(operator.add, Ref('realized_pnl'), Ref('unrealized_pnl')),
+        'positions_data': Call(_positions_data, Get('positions', default=_EMPTY), Ctx('structure_changed')),
+        'cached_at': _TIMESTAMP
+    }),
+    # (symbol, position) pairs of one account
+    'account_positions': Source('account_positions', {
+        'id': Call('{}_{}_{}'.format, Ctx('account_id'), Ctx('key'), _TIMESTAMP),
+        'account_total_id': Ctx('account_id'),
+        'model_id': Ctx('model_id'),
+        'symbol': Ctx('key'),
+        **_numbers('quantity', 'entry_price', 'current_price', 'unrealized_pnl', 'closed_pnl'),
+        'leverage': Get('leverage', default=1),
+        **_numbers('margin', 'liquidation_price'),
+        'entry_time': Get('entry_time', default=_TIMESTAMP),
+        **_numbers('confidence', 'risk_usd'),
+        'exit_plan': Get('exit_plan', default=_EMPTY, convert='json'),
+        'cached_at': _TIMESTAMP
+    }, pairs=True),
+    'position_marks': Source('position_marks', {
+        'model_id': Ctx('model_id'),
+        'symbol': Ctx('key'),
+        'timestamp': _TIMESTAMP,
+        **_numbers('current_price', 'unrealized_pnl', 'margin')
+    }, pairs=True),
+    'conversations': Source('ai_conversations', {
+        'id': Call(conversation_id, _ITEM, _TIMESTAMP),
+        'model_id': Get('model_id', default='', truthy=True),
+        'conversation_time': Call(to_timestamp_seconds, Get('timestamp'), _TIMESTAMP),
+        'decision': Get('decision_type', 'decision', default='', truthy=True),
+        'confidence': Get('confidence', default=0, truthy=True),
+        'symbol': Get('symbol', default='', truthy=True),
+        'action_taken': Get('action_taken', default='', truthy=True),
+        'raw_data': Call(json.dumps, _ITEM),
+        'cached_at': _TIMESTAMP
+    })
+}
+
+_CONVERTERS = {
+    'str': 'str({})',
+    'flag': '(1 if {} else 0)',
+    'or_none': '({} or None)',
+    'json': '_dumps({})'
+}
+
+# Loop variables of the generated function; everything else in Ctx is a keyword argument
+_LOOP_NAMES = ('item', 'key', 'index')
+
+
+def _primary_keys(spec, keys):
+    """Top-level fields read by the first path of every Get, in order"""
+    if isinstance(spec, Get):
+        if not spec.optional:
+            keys.setdefault(spec.paths[0].split('.', 1)[0], None)
+        _primary_keys(spec.default, keys)
+    elif isinstance(spec, Call):
+        for arg in spec.args:
+            _primary_keys(arg, keys)
+    return keys
+
+
+def _context_names(spec, names):
+    if isinstance(spec, Ctx):
+        names.setdefault(spec.name, None)
+    elif isinstance(spec, Get):
+        _context_names(spec.default, names)
+    elif isinstance(spec, Call):
+        for arg in spec.args:
+            _context_names(arg, names)
+    return names
+
+
+class _Codegen:
+    """Python source for one branch (itemgetter or .get) of an extractor"""
+
+    def __init__(self, namespace, keys, columns, fast):
+        self.namespace = namespace
+        self.keys = keys
+        self.columns = columns
+        self.fast = fast
+        self.parents = {}
+        self.prelude = []
+        self.uses_get = not fast
+
+    def constant(self, value):
+        if value is None or type(value) in (bool, int, str):
+            return repr(value)
+        name = f'_k{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def lookup(self, path, default):
+        """Expression for path with default, with nested parents bound once per item"""
+        parent, _, field = path.rpartition('.')
+        if not parent:
+            if self.fast and path in self.keys:
+                return f'f{self.keys.index(path)}'
+            self.uses_get = True
+            return f'get({field!r})' if default == 'None' else f'get({field!r}, {default})'
+        return f'{self.parent(parent)}.get({field!r}, {default})'
+
+    def parent(self, path):
+        if path not in self.parents:
+            name = f'p{len(self.parents)}'
+            self.prelude.append(f'{name} = {self.lookup(path, "None")} or _EMPTY')
+            self.parents[path] = name
+        return self.parents[path]
+
+    def expr(self, spec):
+        if isinstance(spec, Get):
+            default = self.expr(spec.default) if spec.default is not None else 'None'
+            if spec.truthy:
+                parts = [self.lookup(path, 'None') for path in spec.paths]
+                value = '(' + ' or '.join(parts + [default]) + ')'
+            else:
+                value = default
+                for path in reversed(spec.paths):
+                    value = self.lookup(path, value)
+            return _CONVERTERS[spec.convert].format(value) if spec.convert else value
+        if isinstance(spec, Ctx):
+            return spec.name
+        if isinstance(spec, Ref):
+            return f'c{self.columns.index(spec.column)}'
+        if isinstance(spec, Call):
+            fn = self.constant(spec.fn)
+            return f'{fn}({", ".join(self.expr(arg) for arg in spec.args)})'
+        if isinstance(spec, Const):
+            return self.constant(spec.value)
+        return self.constant(spec)
+
+    def body(self, specs, referenced, indent):
+        lines = []
+        values = []
+        for i, spec in enumerate(specs):
+            value = self.expr(spec)
+            if i in referenced:
+                lines.append(f'c{i} = {value}')
+                value = f'c{i}'
+            values.append(value)
+        lines = self.prelude + lines + ['yield (' + ', '.join(values) + ',)']
+        if self.uses_get:
+            lines.insert(0, 'get = item.get')
+        return [indent + line for line in lines]
+
+
+def compile_source(name, source):
+    """Build the extractor function of one SOURCES entry"""
+    columns = TABLES[source.table]
+    if tuple(source.columns) != columns:
+        raise ValueError(f'{name}: columns do not match TABLES[{source.table!r}]')
+    specs = [source.columns[column] for column in columns]
+
+    referenced = set()
+    for i, spec in enumerate(specs):
+        stack = [spec]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, Ref):
+                index = columns.index(current.column)
+                if index >= i:
+                    raise ValueError(f'{name}.{columns[i]}: Ref to a later column {current.column}')
+                referenced.add(index)
+            elif isinstance(current, Get):
+                stack.append(current.default)
+            elif isinstance(current, Call):
+                stack.extend(current.args)
+
+    keys = {}
+    names = {}
+    for spec in specs:
+        _primary_keys(spec, keys)
+        _context_names(spec, names)
+    keys = list(keys)
+    context = [n for n in names if n not in _LOOP_NAMES]
+    if 'index' in names and not source.pairs:
+        # Position of the first item, so a slice of items numbers its
+        # items as in the whole list
+        context.append('offset')
+
+    namespace = {
+        '_EMPTY': _EMPTY,
+        '_dumps': json.dumps,
+        '_keys': frozenset(keys),
+        '_getter': operator.itemgetter(*keys) if keys else None
+    }
+    signature = ', '.join(['items'] + ([f'*, {", ".join(f"{n}=None" for n in context)}'] if context else []))
+    if source.pairs:
+        loop = 'for key, item in items:'
+    elif 'index' in names:
+        loop = 'for index, item in enumerate(items, offset or 0):'
+    else:
+        loop = 'for item in items:'
+
+    lines = [f'def extract({signature}):', f'    {loop}']
+    if keys:
+        unpack = ', '.join(f'f{i}' for i in range(len(keys))) if len(keys) > 1 else 'f0'
+        lines += ['        try:', f'            {unpack} = _getter(item)', '        except KeyError:']
+        lines += _Codegen(namespace, keys, columns, fast=False).body(specs, referenced, ' ' * 12)
+        lines += ['            continue']
+        lines += _Codegen(namespace, keys, columns, fast=True).body(specs, referenced, ' ' * 8)
+    else:
+        lines += _Codegen(namespace, keys, columns, fast=False).body(specs, referenced, ' ' * 8)
+
+    code = '\n'.join(lines) + '\n'
+    exec(compile(code, f'<extractor {name}>', 'exec'), namespace)
+    extract = namespace['extract']
+    extract.__name__ = f'extract_{name}'
+    extract.source = code
+    return extract
+
+
+@lru_cache(maxsize=None)
+def extractor(name):
+    """Compiled row generator of SOURCES[name], built on first use"""
+    return compile_source(name, SOURCES[name])
+
+
+def extract_rows(name, items, **context):
+    """Row tuples for the items of source name, in TABLES column order"""
+    return extractor(name)(items, **context)
+
+
+@lru_cache(maxsize=None)
+def column_kinds(table):
+    """Type class of each column of table, from its declaration in the schema files"""
+    conn = sqlite3.connect(':memory:')
+    try:
+        for schema_file in SCHEMA_FILES:
+            with open(schema_file, 'r', encoding='utf-8') as f:
+                conn.executescript(f.read())
+        declared = {row[1]: row[2].upper() for row in conn.execute(f'PRAGMA table_info({table})')}
+    finally:
+        conn.close()
+
+    kinds = []
+    for column in TABLES[table]:
+        if column not in declared:
+            raise KeyError(f'{table}.{column} is not declared in the schema files')
+        kinds.append(_affinity(declared[column]))
+    return tuple(kinds)
+
+
+def _affinity(declared):
+    """SQLite column affinity rules (datatype3.html, section 3.1)"""
+    if 'INT' in declared:
+        return 'integer'
+    if any(name in declared for name in ('CHAR', 'CLOB', 'TEXT')):
+        return 'text'
+    if not declared or 'BLOB' in declared:
+        return 'blob'
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return 'real'
+    return 'numeric'
+
+
+_NUMERIC = frozenset({int, float, bool, type(None)})
+_ALLOWED = {
+    'integer': _NUMERIC,
+    'real': _NUMERIC,
+    'numeric': _NUMERIC,
+    'text': frozenset({str, type(None)}),
+    'blob': _NUMERIC | {str, bytes}
+}
+
+
+def _fits(kind, value):
+    if type(value) in _ALLOWED[kind]:
+        return True
+    if kind == 'text':
+        return False
+    if isinstance(value, numbers.Real):
+        return True
+    if isinstance(value, str):
+        # SQLite converts numeric text to a number on insert
+        try:
+            float(value)
+        except ValueError:
+            return False
+        return True
+    return False
+
+
+def _coerce(kind, value):
+    """value converted losslessly to fit a kind column, or _REJECT"""
+    if kind == 'text':
+        if isinstance(value, numbers.Real):
+            return str(value)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, separators=(',', ':'))
+    return _REJECT
+
+
+def check_rows(table, batch):
+    """
+    (rows, rejected) for batch: the rows with values coerced to their
+    column's declared type where possible, and (row, reason) for each row
+    holding a value that does not fit
+    """
+    fixes = {}
+    rejected = {}
+    for position, (column, kind, values) in enumerate(zip(TABLES[table], column_kinds(table), zip(*batch))):
+        if set(map(type, values)) <= _ALLOWED[kind]:
+            continue
+        for index, value in enumerate(values):
+            if _fits(kind, value):
+                continue
+            coerced = _coerce(kind, value)
+            if coerced is _REJECT:
+                rejected.setdefault(index, (
+                    f'{table}.{column}: {type(value).__name__} value {value!r:.80} '
+                    f'does not fit a {kind} column'
+                ))
+            else:
+                fixes.setdefault(index, []).append((position, coerced))
+
+    if not fixes and not rejected:
+        return batch, []
+    rows = []
+    for index, row in enumerate(batch):
+        if index in rejected:
+            continue
+        if index in fixes:
+            row = list(row)
+            for position, value in fixes[index]:
+                row[position] = value
+            row = tuple(row)
+        rows.append(row)
+    return rows, [(batch[index], reason) for index, reason in sorted(rejected.items())]
+
+
+def validated(table, rows, batch_size=VALIDATE_BATCH):
+    """
+    Pass rows through, type-checked and coerced batch_size rows at a time.
+    Rows that do not fit are skipped, with a count once rows are exhausted.
+    """
+    rows = iter(rows)
+    skipped = 0
+    first_reason = None
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        batch, rejected = check_rows(table, batch)
+        if rejected:
+            skipped += len(rejected)
+            first_reason = first_reason or rejected[0][1]
+        yield from batch
+
+    if skipped:
+        print(f'  ⚠️  Skipped {skipped} {table} rows that do not fit the schema ({first_reason})')
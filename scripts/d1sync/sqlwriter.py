@@ -0,0 +1,362 @@
+"""
+Multi-row SQL batch writer for D1
+
+Rows are plain tuples in the column order declared in TABLES. Each chunk of
+rows becomes one compact `INSERT ... VALUES (...),(...);` statement, kept
+under D1's per-statement size limit. Every value goes through sql_literal(),
+so quotes and other special characters in any column are escaped.
+
+bound_statements() turns such a statement back into (sql, params) pairs
+for executors that bind values rather than send them inline (the D1 HTTP
+API).
+"""
+
+import json
+import math
+import re
+
+# Column order per table, matching migrations/d1-schema.sql and the
+# ensureTables() definitions in worker-cron.ts
+TABLES = {
+    'sync_runs': ('job', 'last_run'),
+    'leaderboard_cache': (
+        'model_id', 'num_trades', 'sharpe', 'win_dollars', 'num_losses',
+        'lose_dollars', 'return_pct', 'equity', 'num_wins', 'rank', 'cached_at'
+    ),
+    'recent_trades_cache': (
+        'id', 'model_id', 'symbol', 'side', 'entry_time', 'exit_time',
+        'realized_net_pnl', 'trade_data', 'cached_at'
+    ),
+    'trades_detailed': (
+        'id', 'model_id', 'symbol', 'side', 'trade_type', 'leverage', 'quantity', 'confidence',
+        'entry_time', 'entry_human_time', 'entry_price', 'entry_sz', 'entry_oid', 'entry_tid',
+        'entry_commission_dollars', 'entry_closed_pnl', 'entry_crossed',
+        'exit_time', 'exit_human_time', 'exit_price', 'exit_sz', 'exit_oid', 'exit_tid',
+        'exit_commission_dollars', 'exit_closed_pnl', 'exit_crossed',
+        'realized_net_pnl', 'realized_gross_pnl', 'total_commission_dollars',
+        'trade_id', 'cached_at'
+    ),
+    'model_performance_cache': (
+        'model_id', 'today_trades', 'today_pnl', 'today_win_rate',
+        'week_trades', 'week_pnl', 'week_win_rate',
+        'total_trades', 'total_pnl', 'overall_win_rate', 'sharpe_ratio', 'max_drawdown', 'cached_at'
+    ),
+    'daily_stats_cache': (
+        'date', 'total_trades', 'total_pnl', 'best_performer', 'best_performer_return',
+        'worst_performer', 'worst_performer_return', 'total_volume', 'avg_trade_duration', 'cached_at'
+    ),
+    'model_analytics': (
+        'model_id', 'updated_at', 'last_trade_exit_time',
+        'overall_pnl_with_fees', 'overall_pnl_without_fees', 'total_fees_paid',
+        'avg_net_pnl', 'avg_gross_pnl', 'std_net_pnl', 'std_gross_pnl',
+        'biggest_net_gain', 'biggest_net_loss',
+        'win_rate', 'avg_winners_net_pnl', 'avg_losers_net_pnl',
+        'total_trades', 'num_long_trades', 'num_short_trades',
+        'avg_holding_period_mins', 'median_holding_period_mins',
+        'avg_size_of_trade_notional', 'median_size_of_trade_notional',
+        'total_signals', 'num_long_signals', 'num_short_signals',
+        'avg_confidence', 'median_confidence', 'avg_leverage',
+        'sharpe_ratio', 'cached_at'
+    ),
+    'since_inception_values': (
+        'id', 'model_id', 'nav_since_inception', 'inception_date', 'num_invocations', 'cached_at'
+    ),
+    'crypto_prices_realtime': (
+        'symbol', 'price', 'timestamp', 'cached_at'
+    ),
+    'account_totals': (
+        'id', 'model_id', 'timestamp', 'realized_pnl', 'unrealized_pnl', 'total_equity',
+        'positions_data', 'cached_at'
+    ),
+    'account_positions': (
+        'id', 'account_total_id', 'model_id', 'symbol', 'quantity',
+        'entry_price', 'current_price', 'unrealized_pnl', 'closed_pnl',
+        'leverage', 'margin', 'liquidation_price', 'entry_time',
+        'confidence', 'risk_usd', 'exit_plan', 'cached_at'
+    ),
+    'leaderboard_history': (
+        'id', 'model_id', 'timestamp', 'rank', 'equity', 'return_pct',
+        'sharpe', 'num_trades', 'win_rate', 'cached_at'
+    ),
+    'position_marks': (
+        'model_id', 'symbol', 'timestamp', 'current_price', 'unrealized_pnl', 'margin'
+    ),
+    'ai_conversations': (
+        'id', 'model_id', 'conversation_time', 'decision', 'confidence',
+        'symbol', 'action_taken', 'raw_data', 'cached_at'
+    ),
+    'model_equity_curves': (
+        'model_id', 'resolution', 'points', 'num_points', 'first_ts', 'last_ts',
+        'last_equity', 'cached_at'
+    ),
+    'leaderboard_deltas': (
+        'model_id', 'timestamp', 'rank', 'previous_rank', 'rank_change', 'equity',
+        'equity_change', 'return_pct', 'return_pct_change', 'previous_timestamp', 'cached_at'
+    ),
+    'model_symbol_pnl': (
+        'model_id', 'symbol', 'trades', 'wins', 'losses', 'win_rate',
+        'realized_net_pnl', 'realized_gross_pnl', 'total_commission',
+        'best_trade_pnl', 'worst_trade_pnl', 'last_exit_time', 'cached_at'
+    ),
+    'crypto_price_candles': (
+        'symbol', 'resolution', 'slot', 'bucket', 'open', 'high', 'low', 'close',
+        'ticks', 'first_ts', 'last_ts', 'cached_at'
+    ),
+    'model_registry': (
+        'model_id', 'first_seen', 'last_seen', 'last_trade_exit_time', 'equity',
+        'analytics_exit_time', 'analytics_equity', 'analytics_synced_at', 'cached_at'
+    )
+}
+
+# Tables that keep the first write of a row instead of replacing it
+# (matches the worker's INSERT OR IGNORE)
+INSERT_VERBS = {
+    'ai_conversations': 'INSERT OR IGNORE',
+    'crypto_price_candles': 'INSERT',
+    'model_registry': 'INSERT'
+}
+
+# Tables whose rows are folded into the stored row instead of replacing it:
+# an ON CONFLICT clause appended to each statement. A candle ring slot
+# restarts for a newer bucket, folds a tick of the same bucket (see
+# d1sync.candles) and ignores older ones. A model_registry row keeps the
+# earliest first_seen, the latest last_seen and the most recent analytics
+# sync of whichever writer (d1sync.models); a missing equity keeps the
+# stored one. worker-cron.ts uses the same clauses.
+UPSERT_CLAUSES = {
+    'crypto_price_candles': (
+        ' ON CONFLICT(symbol,resolution,slot) DO UPDATE SET'
+        ' open=CASE WHEN excluded.bucket>bucket OR excluded.first_ts<first_ts THEN excluded.open ELSE open END,'
+        'high=CASE WHEN excluded.bucket>bucket THEN excluded.high ELSE MAX(high,excluded.high) END,'
+        'low=CASE WHEN excluded.bucket>bucket THEN excluded.low ELSE MIN(low,excluded.low) END,'
+        'close=CASE WHEN excluded.bucket>bucket OR excluded.last_ts>=last_ts THEN excluded.close ELSE close END,'
+        'ticks=CASE WHEN excluded.bucket>bucket THEN excluded.ticks'
+        ' WHEN excluded.first_ts<first_ts OR excluded.last_ts>last_ts THEN ticks+excluded.ticks ELSE ticks END,'
+        'first_ts=CASE WHEN excluded.bucket>bucket THEN excluded.first_ts ELSE MIN(first_ts,excluded.first_ts) END,'
+        'last_ts=CASE WHEN excluded.bucket>bucket THEN excluded.last_ts ELSE MAX(last_ts,excluded.last_ts) END,'
+        'bucket=excluded.bucket,cached_at=excluded.cached_at'
+        ' WHERE excluded.bucket>=bucket'
+    ),
+    'model_registry': (
+        ' ON CONFLICT(model_id) DO UPDATE SET'
+        ' first_seen=MIN(first_seen,excluded.first_seen),'
+        'last_seen=MAX(last_seen,excluded.last_seen),'
+        'last_trade_exit_time=COALESCE(excluded.last_trade_exit_time,last_trade_exit_time),'
+        'equity=CASE WHEN excluded.last_seen>=last_seen AND excluded.equity IS NOT NULL THEN excluded.equity ELSE equity END,'
+        'analytics_exit_time=CASE WHEN analytics_synced_at IS NULL OR excluded.analytics_synced_at>=analytics_synced_at'
+        ' THEN excluded.analytics_exit_time ELSE analytics_exit_time END,'
+        'analytics_equity=CASE WHEN analytics_synced_at IS NULL OR excluded.analytics_synced_at>=analytics_synced_at'
+        ' THEN excluded.analytics_equity ELSE analytics_equity END,'
+        'analytics_synced_at=CASE WHEN analytics_synced_at IS NULL OR excluded.analytics_synced_at>=analytics_synced_at'
+        ' THEN excluded.analytics_synced_at ELSE analytics_synced_at END,'
+        'cached_at=excluded.cached_at'
+    )
+}
+
+# D1 rejects statements longer than 100 KB; stay well below it so a
+# single oversized row still fits after the header.
+MAX_STATEMENT_BYTES = 90_000
+MAX_ROWS_PER_STATEMENT = 500
+
+# Buffer size for the generated .sql file handle
+WRITE_BUFFER_BYTES = 1 << 20
+
+# Bound parameters D1 accepts in one statement
+MAX_BOUND_PARAMS = 100
+
+# Integers beyond this lose precision as JSON numbers in the D1 API
+_MAX_SAFE_INTEGER = 2 ** 53 - 1
+
+
+def _quote(value):
+    return "'" + value.replace("'", "''").replace('\x00', '') + "'"
+
+
+def _float_literal(value):
+    return repr(value) if math.isfinite(value) else 'NULL'
+
+
+# Exact-type fast paths; anything else falls through to sql_literal()'s checks
+_LITERALS = {
+    type(None): lambda value: 'NULL',
+    bool: lambda value: '1' if value else '0',
+    int: int.__repr__,
+    float: _float_literal,
+    str: _quote,
+    dict: lambda value: _quote(json.dumps(value)),
+    list: lambda value: _quote(json.dumps(value)),
+    bytes: lambda value: f"X'{value.hex()}'"
+}
+
+
+def sql_literal(value):
+    """Render a Python value as a SQLite literal"""
+    render = _LITERALS.get(type(value))
+    if render is not None:
+        return render(value)
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(int(value))
+    if isinstance(value, float):
+        return _float_literal(float(value))
+    return _quote(str(value))
+
+
+def insert_header(table, verb='INSERT OR REPLACE'):
+    """`INSERT OR REPLACE INTO table (cols) VALUES ` prefix for a table"""
+    return f'{verb} INTO {table} ({",".join(TABLES[table])}) VALUES '
+
+
+def render_rows(table, rows):
+    """Yield (rendered VALUES tuple, its size in bytes incl. separator) per row"""
+    width = len(TABLES[table])
+    for row in rows:
+        if len(row) != width:
+            raise ValueError(f'{table}: expected {width} values, got {len(row)}')
+
+        rendered = '(' + ','.join(map(sql_literal, row)) + ')'
+        yield rendered, len(rendered.encode('utf-8')) + 1
+
+
+def pack_statements(table, rendered_rows, verb=None,
+                    max_bytes=MAX_STATEMENT_BYTES, max_rows=MAX_ROWS_PER_STATEMENT):
+    """
+    Yield multi-row INSERT statements for render_rows() output.
+
+    Statement boundaries depend only on the sequence of rendered rows, so
+    rows rendered in separate pieces (see d1sync.parallel) pack into the
+    same statements as rows rendered in one pass. The table's
+    UPSERT_CLAUSES entry, if any, ends each statement.
+    """
+    if verb is None:
+        verb = INSERT_VERBS.get(table, 'INSERT OR REPLACE')
+    header = insert_header(table, verb)
+    footer = UPSERT_CLAUSES.get(table, '') + ';'
+    values = []
+    # D1's limit is on the encoded statement, so sizes are UTF-8 bytes
+    base = len(header.encode('utf-8')) + len(footer.encode('utf-8')) - 1
+    size = base
+
+    for rendered, row_bytes in rendered_rows:
+        if values and (size + row_bytes > max_bytes or len(values) >= max_rows):
+            yield header + ','.join(values) + footer
+            values = []
+            size = base
+
+        values.append(rendered)
+        size += row_bytes
+
+    if values:
+        yield header + ','.join(values) + footer
+
+
+def insert_statements(table, rows, verb=None,
+                      max_bytes=MAX_STATEMENT_BYTES, max_rows=MAX_ROWS_PER_STATEMENT):
+    """
+    Yield multi-row INSERT statements for an iterable of row tuples.
+
+    Each statement holds at most max_rows rows and, unless a single row is
+    bigger than that on its own, at most max_bytes bytes of SQL. verb
+    defaults to the table's INSERT_VERBS entry, else INSERT OR REPLACE.
+    """
+    return pack_statements(table, render_rows(table, rows), verb, max_bytes, max_rows)
+
+
+_VALUES = ' VALUES '
+# The literals sql_literal() renders, except blobs
+_LITERAL = re.compile(r"'(?:[^']|'')*'|NULL|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_INTEGER = re.compile(r'-?\d+')
+
+
+class _Unbindable(Exception):
+    pass
+
+
+def _literal_value(text):
+    if text == 'NULL':
+        return None
+    if text[0] == "'":
+        return text[1:-1].replace("''", "'")
+    if _INTEGER.fullmatch(text):
+        value = int(text)
+        if abs(value) > _MAX_SAFE_INTEGER:
+            raise _Unbindable(text)
+        return value
+    return float(text)
+
+
+def _values_rows(statement, position):
+    """Rows of values of a VALUES list starting at position, and where the list ends"""
+    rows = []
+    while True:
+        if not statement.startswith('(', position):
+            raise _Unbindable(position)
+        position += 1
+        row = []
+        while True:
+            match = _LITERAL.match(statement, position)
+            if match is None:
+                raise _Unbindable(position)
+            row.append(_literal_value(match.group()))
+            position = match.end()
+            separator = statement[position:position + 1]
+            position += 1
+            if separator == ')':
+                break
+            if separator != ',':
+                raise _Unbindable(position)
+        rows.append(row)
+        if not statement.startswith(',(', position):
+            return rows, position
+        position += 1
+
+
+def bound_statements(statement, max_params=MAX_BOUND_PARAMS):
+    """
+    (sql, params) pairs running statement with its values bound instead of
+    inlined. A multi-row INSERT from pack_statements() becomes one INSERT
+    per max_params values' worth of rows, with the same header and upsert
+    clause; any other statement, or one holding values that do not bind
+    losslessly (blobs, integers beyond 2**53), is passed on as it is.
+    """
+    start = statement.find(_VALUES)
+    if not statement.startswith('INSERT') or start == -1:
+        return [(statement, ())]
+    header = statement[:start + len(_VALUES)]
+    try:
+        rows, end = _values_rows(statement, len(header))
+    except _Unbindable:
+        return [(statement, ())]
+    footer = statement[end:]
+    width = len(rows[0])
+    # Upsert clauses hold no literals; a header or footer that does is not ours
+    if "'" in header or "'" in footer or '?' in footer or width > max_params \
+            or any(len(row) != width for row in rows):
+        return [(statement, ())]
+
+    placeholders = '(' + ','.join('?' * width) + ')'
+    per_statement = max_params // width
+    return [
+        (
+            header + ','.join([placeholders] * len(rows[i:i + per_statement])) + footer,
+            tuple(value for row in rows[i:i + per_statement] for value in row)
+        )
+        for i in range(0, len(rows), per_statement)
+    ]
+
+
+def write_statements(f, statements):
+    """
+    Stream statements into an open text file, one per line.
+
+    Returns (statement count, bytes written).
+    """
+    count = 0
+    size = 0
+    for statement in statements:
+        f.write(statement)
+        f.write('\n')
+        count += 1
+        size += len(statement.encode('utf-8')) + 1
+    return count, size
@@ -0,0 +1,46 @@
+"""
+Local sync state (watermarks, journals, indexes) persisted as JSON files
+
+Files live under SYNC_STATE_DIR (default: ./.sync-state) and are written
+atomically so an interrupted run never leaves a half-written state file.
+"""
+
+import json
+import os
+import tempfile
+
+STATE_DIR = os.environ.get('SYNC_STATE_DIR', '.sync-state')
+
+
+def state_path(name):
+    """Absolute path of a state file, creating the state dir if needed"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.abspath(os.path.join(STATE_DIR, name))
+
+
+def load_state(name, default=None):
+    """Load a JSON state file, returning default when it does not exist"""
+    try:
+        with open(state_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except json.JSONDecodeError:
+        print(f'⚠️  Ignoring corrupt state file {name}')
+        return default
+
+
+def save_state(name, value):
+    """Atomically write a JSON state file"""
+    path = state_path(name)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f, separators=(',', ':'))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
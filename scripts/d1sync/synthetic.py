@@ -0,0 +1,214 @@
+"""
+Synthetic NOF1 payloads shaped like the recorded API responses
+
+Used by benchmark-sync.py to scale the sync pipeline far beyond what the
+live API currently returns (10k / 100k / 1M trades, thousands of positions).
+The output has the same layout as complete-sync-all.py's fetch_all_data().
+"""
+
+import random
+
+MODELS = [
+    'qwen3-max',
+    'deepseek-chat-v3.1',
+    'claude-sonnet-4-5',
+    'grok-4',
+    'gemini-2.5-pro',
+    'gpt-5'
+]
+
+BASE_SYMBOLS = ['BTC', 'ETH', 'SOL', 'BNB', 'DOGE', 'XRP']
+
+START_TIME = 1760000000
+
+
+def _symbols(count):
+    symbols = list(BASE_SYMBOLS)
+    while len(symbols) < count:
+        symbols.append(f'ALT{len(symbols)}')
+    return symbols[:count]
+
+
+def synthetic_trade(rng, index, model_id, symbol, entry_time):
+    exit_time = entry_time + rng.randint(60, 6 * 3600)
+    side = rng.choice(('long', 'short'))
+    entry_price = rng.uniform(0.1, 100000)
+    exit_price = entry_price * rng.uniform(0.95, 1.05)
+    entry_sz = rng.uniform(0.001, 50)
+    gross = (exit_price - entry_price) * entry_sz * (1 if side == 'long' else -1)
+    commission = entry_price * entry_sz * 0.0004
+
+    return {
+        'id': f'{model_id}_{index}',
+        'model_id': model_id,
+        'symbol': symbol,
+        'side': side,
+        'trade_type': side,
+        'leverage': rng.choice((5, 10, 15, 20)),
+        'quantity': entry_sz,
+        'confidence': round(rng.random(), 2),
+        'entry_time': entry_time,
+        'entry_human_time': '2025-10-20 12:00:00.000000',
+        'entry_price': entry_price,
+        'entry_sz': entry_sz,
+        'entry_oid': rng.randint(10**10, 10**11),
+        'entry_tid': rng.randint(10**14, 10**15),
+        'entry_commission_dollars': commission / 2,
+        'entry_closed_pnl': 0,
+        'entry_crossed': True,
+        'exit_time': exit_time,
+        'exit_human_time': '2025-10-20 13:00:00.000000',
+        'exit_price': exit_price,
+        'exit_sz': entry_sz,
+        'exit_oid': rng.randint(10**10, 10**11),
+        'exit_tid': rng.randint(10**14, 10**15),
+        'exit_commission_dollars': commission / 2,
+        'exit_closed_pnl': gross,
+        'exit_crossed': False,
+        'realized_net_pnl': gross - commission,
+        'realized_gross_pnl': gross,
+        'total_commission_dollars': commission,
+        'exit_plan': {
+            'profit_target': exit_price * 1.02,
+            'stop_loss': exit_price * 0.98,
+            'invalidation_condition': "If the 4h close breaks the EMA, the thesis isn't valid"
+        }
+    }
+
+
+def synthetic_position(rng, symbol, timestamp):
+    entry_price = rng.uniform(0.1, 100000)
+    current_price = entry_price * rng.uniform(0.97, 1.03)
+    quantity = rng.uniform(-50, 50)
+    return {
+        'symbol': symbol,
+        'quantity': quantity,
+        'entry_price': entry_price,
+        'current_price': current_price,
+        'unrealized_pnl': (current_price - entry_price) * quantity,
+        'closed_pnl': 0,
+        'leverage': rng.choice((5, 10, 20)),
+        'margin': abs(quantity) * entry_price / 10,
+        'liquidation_price': entry_price * 0.9,
+        'entry_time': timestamp - rng.randint(60, 86400),
+        'confidence': round(rng.random(), 2),
+        'risk_usd': rng.uniform(10, 500),
+        'exit_plan': {
+            'profit_target': current_price * 1.02,
+            'stop_loss': current_price * 0.98,
+            'invalidation_condition': 'Close below support'
+        }
+    }
+
+
+def synthetic_conversation(rng, index, model_id, symbol, timestamp):
+    return {
+        'id': f'{model_id}-conversation-{index}',
+        'model_id': model_id,
+        'timestamp': timestamp,
+        'decision_type': rng.choice(('hold', 'buy', 'sell', 'close')),
+        'confidence': round(rng.random(), 2),
+        'symbol': symbol,
+        'action_taken': rng.choice(('none', 'open_long', 'open_short', 'close_position')),
+        'cot_trace': 'Price is holding above the 20-period EMA with rising volume. ' * 8,
+        'user_prompt': 'It has been 3 minutes since you started trading. ' * 4
+    }
+
+
+def synthetic_payload(num_trades, num_positions=36, models=MODELS, seed=0, num_conversations=None):
+    """
+    Build a fetch_all_data()-shaped dict with the requested volume.
+
+    num_conversations defaults to one per ten trades.
+    """
+    rng = random.Random(seed)
+    timestamp = START_TIME + num_trades * 60
+    symbols = _symbols(max(len(BASE_SYMBOLS), -(-num_positions // len(models))))
+
+    # The API returns newest trades first
+    trades = [
+        synthetic_trade(rng, index, rng.choice(models), rng.choice(symbols), START_TIME + index * 60)
+        for index in range(num_trades)
+    ]
+    trades.reverse()
+
+    per_account = num_positions // len(models)
+    extra = num_positions % len(models)
+    account_totals = []
+    for i, model in enumerate(models):
+        count = per_account + (1 if i < extra else 0)
+        positions = {
+            symbol: synthetic_position(rng, symbol, timestamp)
+            for symbol in rng.sample(symbols, count)
+        }
+        account_totals.append({
+            'id': f'{model}_{timestamp}',
+            'model_id': model,
+            'timestamp': timestamp,
+            'realized_pnl': rng.uniform(-5000, 5000),
+            'positions': positions
+        })
+
+    leaderboard = []
+    for model in models:
+        wins = rng.randint(0, 200)
+        losses = rng.randint(0, 200)
+        leaderboard.append({
+            'id': model,
+            'num_trades': wins + losses,
+            'sharpe': rng.uniform(-1, 1),
+            'win_dollars': rng.uniform(0, 20000),
+            'num_losses': losses,
+            'lose_dollars': -rng.uniform(0, 20000),
+            'return_pct': rng.uniform(-80, 80),
+            'equity': rng.uniform(1000, 20000),
+            'num_wins': wins
+        })
+
+    analytics = [
+        {
+            'model_id': model,
+            'updated_at': timestamp,
+            'last_trade_exit_time': timestamp - rng.randint(0, 3600),
+            'fee_pnl_moves_breakdown_table': {
+                'overall_pnl_with_fees': rng.uniform(-5000, 5000),
+                'total_fees_paid': rng.uniform(0, 500)
+            },
+            'winners_losers_breakdown_table': {'win_rate': rng.uniform(20, 70)},
+            'signals_breakdown_table': {'total_signals': rng.randint(100, 5000)},
+            'overall_trades_overview_table': {'total_trades': rng.randint(10, 500)},
+            'longs_shorts_breakdown_table': {'num_long_trades': rng.randint(5, 250)}
+        }
+        for model in models
+    ]
+
+    if num_conversations is None:
+        num_conversations = num_trades // 10
+    conversations = [
+        synthetic_conversation(rng, index, rng.choice(models), rng.choice(symbols), START_TIME + index * 180)
+        for index in range(num_conversations)
+    ]
+    conversations.reverse()
+
+    return {
+        'leaderboard': {'leaderboard': leaderboard},
+        'trades': {'trades': trades},
+        'analytics': {'analytics': analytics},
+        'conversations': {'conversations': conversations},
+        'account_totals': {'accountTotals': account_totals},
+        'since_inception': {'sinceInceptionValues': [
+            {
+                'id': f'{model}-since',
+                'model_id': model,
+                'nav_since_inception': rng.uniform(0.2, 2),
+                'inception_date': START_TIME,
+                'num_invocations': rng.randint(100, 10000)
+            }
+            for model in models
+        ]},
+        'crypto_prices': {'prices': {
+            symbol: {'symbol': symbol, 'price': rng.uniform(0.1, 100000), 'timestamp': timestamp}
+            for symbol in BASE_SYMBOLS
+        }},
+        'model_analytics': {item['model_id']: {'analytics': [item]} for item in analytics}
+    }
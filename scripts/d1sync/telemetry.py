@@ -0,0 +1,312 @@
+"""
+Spans and metrics for sync runs
+
+Each unit of work (an endpoint fetch, a generate_sql() section, an
+execution chunk, a whole stage) runs inside span(), which records its wall
+time plus the bytes, rows and retries it reports and any error that
+escaped it. Spans go to the current Recorder, which is reset at the start
+of every run (or daemon tick) and exported at the end:
+
+    sync-metrics.jsonl   one line per span, then one 'result' line shaped
+                         like the SyncResult performSync() returns in
+                         worker-cron.ts, so both sync paths can be compared
+    sync.prom            Prometheus textfile with the last run's numbers
+
+Files go to SYNC_METRICS_DIR (default: the sync state directory).
+profiled() wraps a run in cProfile or tracemalloc for --profile.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from d1sync.state import STATE_DIR
+
+METRICS_DIR = os.environ.get('SYNC_METRICS_DIR', STATE_DIR)
+METRICS_FILE = 'sync-metrics.jsonl'
+PROM_FILE = 'sync.prom'
+PROFILE_FILE = 'sync-profile.pstats'
+
+PROFILE_MODES = ('cpu', 'memory')
+
+# Lines of cProfile / tracemalloc output printed after a profiled run
+PROFILE_TOP = 25
+
+# SyncResult count fields and the tables that feed them
+RESULT_TABLES = {
+    'leaderboard': 'leaderboard_cache',
+    'tradesRecent': 'recent_trades_cache',
+    'tradesDetailed': 'trades_detailed',
+    'analyticsSummary': 'model_analytics',
+    'conversations': 'ai_conversations',
+    'accountTotals': 'account_totals',
+    'accountPositions': 'account_positions',
+    'sinceInception': 'since_inception_values',
+    'cryptoPrices': 'crypto_prices_realtime'
+}
+
+# Job whose payload each of those tables is built from (model_analytics is
+# built from every analytics:<model> job)
+TABLE_JOBS = {
+    'leaderboard_cache': 'leaderboard',
+    'recent_trades_cache': 'trades',
+    'trades_detailed': 'trades',
+    'ai_conversations': 'conversations',
+    'account_totals': 'account_totals',
+    'account_positions': 'account_totals',
+    'since_inception_values': 'since_inception',
+    'crypto_prices_realtime': 'crypto_prices'
+}
+
+
+class Span:
+    """One timed unit of work"""
+
+    def __init__(self, kind, name, **attrs):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.bytes = 0
+        self.rows = 0
+        self.retries = 0
+        self.error = None
+        self.started = time.time()
+        self.seconds = 0.0
+
+    def add(self, bytes=0, rows=0, retries=0):
+        self.bytes += bytes
+        self.rows += rows
+        self.retries += retries
+
+    def count(self, rows):
+        """Pass an iterable through, counting its items as rows"""
+        for row in rows:
+            self.rows += 1
+            yield row
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'started': round(self.started, 3),
+            'seconds': round(self.seconds, 6),
+            'bytes': self.bytes,
+            'rows': self.rows,
+            'retries': self.retries,
+            'error': self.error,
+            **self.attrs
+        }
+
+
+class Recorder:
+    """Spans of one sync run"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, kind, name, **attrs):
+        span = Span(kind, name, **attrs)
+        started = time.perf_counter()
+        try:
+            yield span
+        except GeneratorExit:
+            # A section generator closed early by its consumer did not fail
+            raise
+        except BaseException as e:
+            if span.error is None:
+                span.error = str(e) or type(e).__name__
+            raise
+        finally:
+            span.seconds = time.perf_counter() - started
+            with self._lock:
+                self.spans.append(span)
+
+    def of_kind(self, kind):
+        with self._lock:
+            return [span for span in self.spans if span.kind == kind]
+
+    def sync_result(self, skipped=None, errors=()):
+        """
+        The run as a SyncResult. A count is null, like the worker's, when the
+        job behind it did not run: not requested or not due, failed, or
+        skipped by the cache. Runs without fetches (fixtures) report every
+        section. skipped defaults to the jobs the cache skipped.
+        """
+        finished = time.time()
+        fetches = {span.name: span for span in self.of_kind('fetch')}
+        rows = {}
+        for span in self.of_kind('section'):
+            rows[span.name] = rows.get(span.name, 0) + span.rows
+
+        def ran(job):
+            if not fetches:
+                return True
+            spans = [span for name, span in fetches.items() if name == job or (job is None and name.startswith('analytics:'))]
+            return any(span.error is None and not span.attrs.get('cache') for span in spans)
+
+        result = {}
+        for field, table in RESULT_TABLES.items():
+            result[field] = rows[table] if table in rows and ran(TABLE_JOBS.get(table)) else None
+        details = sum(1 for name in fetches if name.startswith('analytics:') and ran(name))
+        result['analyticsDetails'] = details or None
+
+        if skipped is None:
+            skipped = [name for name, span in fetches.items() if span.attrs.get('cache')]
+        errors = list(errors) + [
+            f'{span.name}: {span.error}' for span in self.spans if span.error and span.kind in ('fetch', 'stage')
+        ]
+        result.update({
+            'errors': errors,
+            'skipped': sorted(skipped),
+            'timestamp': int(self.started),
+            'startedAt': int(self.started * 1000),
+            'finishedAt': int(finished * 1000),
+            'durationMs': int((finished - self.started) * 1000)
+        })
+        return result
+
+    def export(self, result, metrics_dir=None):
+        """Append the spans and result to the JSON lines log and rewrite the textfile"""
+        metrics_dir = metrics_dir or METRICS_DIR
+        os.makedirs(metrics_dir, exist_ok=True)
+        run = result['startedAt']
+        with open(os.path.join(metrics_dir, METRICS_FILE), 'a', encoding='utf-8') as f:
+            for span in self.spans:
+                f.write(json.dumps({'run': run, **span.to_dict()}, separators=(',', ':')) + '\n')
+            f.write(json.dumps({'run': run, 'kind': 'result', **result}, separators=(',', ':')) + '\n')
+        _write_atomic(os.path.join(metrics_dir, PROM_FILE), self.prometheus(result))
+
+    def prometheus(self, result):
+        """Prometheus text exposition of the spans and result of this run"""
+        lines = []
+
+        def family(name, help_text, samples):
+            lines.append(f'# HELP alphaarena_sync_{name} {help_text}')
+            lines.append(f'# TYPE alphaarena_sync_{name} gauge')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+                lines.append(f'alphaarena_sync_{name}{{{label_text}}} {value}' if label_text else f'alphaarena_sync_{name} {value}')
+
+        totals = {}
+        for span in self.spans:
+            key = (span.kind, span.name)
+            total = totals.setdefault(key, {'seconds': 0.0, 'bytes': 0, 'rows': 0, 'retries': 0, 'errors': 0, 'count': 0})
+            total['seconds'] += span.seconds
+            total['bytes'] += span.bytes
+            total['rows'] += span.rows
+            total['retries'] += span.retries
+            total['errors'] += span.error is not None
+            total['count'] += 1
+
+        for field, help_text in (
+            ('seconds', 'Wall time spent in spans of this kind and name during the last run'),
+            ('bytes', 'Bytes moved by the spans (response, SQL or chunk bytes)'),
+            ('rows', 'Rows produced by the spans'),
+            ('retries', 'Retries made inside the spans'),
+            ('errors', 'Spans that ended with an error'),
+            ('count', 'Number of spans')
+        ):
+            family(f'span_{field}', help_text, [
+                ({'kind': kind, 'name': name}, round(total[field], 6) if field == 'seconds' else total[field])
+                for (kind, name), total in sorted(totals.items())
+            ])
+
+        family('result_rows', 'SyncResult row counts of the last run (jobs that did not run are omitted)', [
+            ({'field': field}, value) for field, value in result.items()
+            if field in RESULT_TABLES and value is not None
+        ])
+        family('duration_seconds', 'Duration of the last run', [({}, result['durationMs'] / 1000)])
+        family('errors', 'Errors reported by the last run', [({}, len(result['errors']))])
+        family('finished_timestamp_seconds', 'When the last run finished', [({}, result['finishedAt'] / 1000)])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+_recorder = Recorder()
+
+
+def reset():
+    """Start a new run; spans recorded so far are dropped"""
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def recorder():
+    return _recorder
+
+
+def span(kind, name, **attrs):
+    """Context manager timing a unit of work in the current run"""
+    return _recorder.span(kind, name, **attrs)
+
+
+@contextmanager
+def profiled(mode, metrics_dir=None):
+    """
+    Profile the enclosed block: 'cpu' runs cProfile and saves the stats to
+    PROFILE_FILE, 'memory' traces allocations with tracemalloc. A summary
+    is printed either way; mode None profiles nothing.
+    """
+    if mode is None:
+        yield
+        return
+
+    if mode == 'cpu':
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            metrics_dir = metrics_dir or METRICS_DIR
+            os.makedirs(metrics_dir, exist_ok=True)
+            path = os.path.join(metrics_dir, PROFILE_FILE)
+            profile.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            print(f'\n🔬 CPU profile saved to {path}')
+            print(out.getvalue())
+        return
+
+    if mode == 'memory':
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'\n🔬 Peak traced memory: {peak / (1 << 20):.1f} MiB; largest live allocations:')
+            for stat in snapshot.statistics('lineno')[:PROFILE_TOP]:
+                print(f'  {stat}')
+        return
+
+    raise ValueError(f'unknown profile mode: {mode}')
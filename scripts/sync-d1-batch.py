@@ -4,169 +4,144 @@ Batch sync data from NOF1 API to Cloudflare D1 database
 This script generates a single SQL file with all INSERT statements
 """
 
-import requests
-import json
 import sys
 from datetime import datetime
-import subprocess
-import tempfile
-import os
+from itertools import islice
 
-def fetch_nof1_data():
-    """Fetch data from NOF1 API"""
-    print("📡 Fetching data from NOF1.ai...")
+from d1sync import telemetry
+from d1sync.backends import create_backend
+from d1sync.fetch import ENDPOINTS, fetch_endpoints, print_timings
+from d1sync.resilience import DEFAULT_DEADLINE, CircuitBreakers
+from d1sync.schema import extract_rows, validated
+from d1sync.sqlwriter import WRITE_BUFFER_BYTES, insert_statements, write_statements
 
-    try:
-        leaderboard = requests.get('https://nof1.ai/api/leaderboard', timeout=30).json()
-        trades = requests.get('https://nof1.ai/api/trades', timeout=30).json()
-        analytics = requests.get('https://nof1.ai/api/analytics', timeout=30).json()
-
-        return {
-            'leaderboard': leaderboard.get('leaderboard', []),
-            'trades': trades.get('trades', [])[:100],  # Recent 100 trades
-            'analytics': analytics.get('analytics', [])
-        }
-    except Exception as e:
-        print(f"❌ Error fetching data: {e}")
-        sys.exit(1)
+SQL_FILE = 'sync-d1.sql'
 
-def generate_sql(data):
-    """Generate SQL statements for all data"""
-    timestamp = int(datetime.now().timestamp())
-    sql_statements = []
+# Tables this script writes; verify_data() checks each of them. The first
+# column of each is its primary key. model_performance_cache is left to
+# complete-sync-all.py, which computes it from the full trade history
+# rather than the 100 trades fetched here.
+WRITTEN_TABLES = ('leaderboard_cache', 'recent_trades_cache')
+
+FETCHED_ENDPOINTS = ('leaderboard', 'trades', 'analytics')
 
+def fetch_nof1_data():
+    """
+    Fetch data from NOF1 API. Endpoints that still fail after their retries
+    come back empty, leaving their tables as they are; returns (data, the
+    names of the failed endpoints).
+    """
+    print("📡 Fetching data from NOF1.ai...")
+
+    payloads, timings = fetch_endpoints(
+        {name: ENDPOINTS[name] for name in FETCHED_ENDPOINTS},
+        breakers=CircuitBreakers(), deadline=DEFAULT_DEADLINE
+    )
+    print_timings(timings)
+
+    failed = [name for name in FETCHED_ENDPOINTS if timings[name]['error']]
+    for name in failed:
+        print(f"⚠️  Skipping {name}: {timings[name]['error']}")
+
+    data = {
+        'leaderboard': payloads['leaderboard'].get('leaderboard', []),
+        'trades': list(islice(payloads['trades'].get('trades', []), 100)),  # Recent 100 trades
+        'analytics': payloads['analytics'].get('analytics', [])
+    }
+    return data, failed
+
+def section(table, rows, written):
+    """
+    INSERT statements for one table, timed and counted as a telemetry
+    section; the primary keys written are collected in written[table]
+    """
+    keys = written.setdefault(table, set())
+
+    def collect(rows):
+        for row in rows:
+            keys.add(row[0])
+            yield row
+
+    with telemetry.span('section', table) as span:
+        for statement in insert_statements(table, span.count(collect(validated(table, rows)))):
+            span.add(bytes=len(statement))
+            yield statement
+
+def generate_sql(data, timestamp, written):
+    """Generate SQL statements for all data, yielding one statement at a time"""
     # Leaderboard Cache
     print(f"📊 Generating SQL for {len(data['leaderboard'])} leaderboard entries...")
-    for entry in data['leaderboard']:
-        sql = f"""INSERT OR REPLACE INTO leaderboard_cache (
-    model_id, num_trades, sharpe, win_dollars, num_losses,
-    lose_dollars, return_pct, equity, num_wins, rank, cached_at
-) VALUES (
-    '{entry.get("aiModelId", "")}',
-    {entry.get("totalTrades", 0)},
-    {entry.get("sharpeRatio", 0)},
-    {entry.get("winDollars", 0)},
-    {entry.get("numLosses", 0)},
-    {entry.get("loseDollars", 0)},
-    {entry.get("returnPct", 0)},
-    {entry.get("totalAssets", 0)},
-    {entry.get("numWins", 0)},
-    {entry.get("rank", 0)},
-    {timestamp}
-);"""
-        sql_statements.append(sql)
+    yield from section(
+        'leaderboard_cache', extract_rows('leaderboard', data['leaderboard'], timestamp=timestamp), written
+    )
 
     # Recent Trades Cache (limit to 50 most recent)
     print(f"💱 Generating SQL for {min(len(data['trades']), 50)} recent trades...")
-    for i, trade in enumerate(data['trades'][:50]):
-        trade_id = trade.get('id', f'trade-{int(datetime.now().timestamp() * 1000)}-{i}')
-        trade_json = json.dumps(trade).replace("'", "''")
-        pnl_value = trade.get('realizedNetPnl', trade.get('pnl'))
-        pnl_sql = pnl_value if pnl_value is not None else 'NULL'
-
-        sql = f"""INSERT OR REPLACE INTO recent_trades_cache (
-    id, model_id, symbol, side, entry_time, exit_time,
-    realized_net_pnl, trade_data, cached_at
-) VALUES (
-    '{trade_id}',
-    '{trade.get("aiModelId", "")}',
-    '{trade.get("symbol", "")}',
-    '{trade.get("side", "")}',
-    {trade.get("entryTime", timestamp)},
-    {trade.get("exitTime", "NULL") if trade.get("exitTime") else "NULL"},
-    {pnl_sql},
-    '{trade_json}',
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    # Model Performance Cache
-    print(f"📈 Generating SQL for {len(data['leaderboard'])} model performance entries...")
-    for entry in data['leaderboard']:
-        total_trades = entry.get("totalTrades", 0)
-        win_rate = entry.get("winRate", 0)
-
-        sql = f"""INSERT OR REPLACE INTO model_performance_cache (
-    model_id, today_trades, today_pnl, today_win_rate,
-    week_trades, week_pnl, week_win_rate,
-    total_trades, total_pnl, overall_win_rate, sharpe_ratio, cached_at
-) VALUES (
-    '{entry.get("aiModelId", "")}',
-    {total_trades},
-    {entry.get("totalPnL", 0)},
-    {win_rate},
-    {total_trades},
-    {entry.get("totalPnL", 0)},
-    {win_rate},
-    {total_trades},
-    {entry.get("totalPnL", 0)},
-    {win_rate},
-    {entry.get("sharpeRatio", 0)},
-    {timestamp}
-);"""
-        sql_statements.append(sql)
-
-    return "\n\n".join(sql_statements)
-
-def execute_sql_file(sql_content):
-    """Execute SQL file using wrangler"""
-    print("\n💾 Executing SQL in D1 database...")
-
-    # Create temporary SQL file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f:
-        f.write(sql_content)
-        sql_file = f.name
+    yield from section(
+        'recent_trades_cache', extract_rows('recent_trades', data['trades'][:50], timestamp=timestamp), written
+    )
 
-    try:
-        # Execute SQL file with wrangler
-        cmd = ['npx', 'wrangler', 'd1', 'execute', 'alphaarena-db', '--remote', '--file', sql_file]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+def execute_sql_file(backend, sql_file):
+    """Execute SQL file in D1 chunk by chunk, resuming after earlier failures"""
+    print(f"\n💾 Executing SQL in {backend.key}...")
 
-        if result.returncode == 0:
+    with telemetry.span('stage', 'execute', target=backend.key) as span:
+        if backend.execute_file(sql_file):
             print("✅ SQL executed successfully!")
-            print(result.stdout)
-        else:
-            print("❌ SQL execution failed!")
-            print(result.stderr)
-            return False
-
-    finally:
-        # Clean up temp file
-        try:
-            os.unlink(sql_file)
-        except:
-            pass
-
-    return True
-
-def verify_data():
-    """Verify data in D1"""
+            return True
+        span.error = 'execution failed'
+
+    print("❌ SQL execution failed!")
+    return False
+
+def verify_data(backend, timestamp, written):
+    """
+    Check in one round trip that every row this run wrote landed: each
+    written table must hold one row stamped with this run's cached_at per
+    primary key written. Returns True when all of them match.
+    """
     print("\n🔍 Verifying data...")
 
-    queries = [
-        ('snapshots', 'SELECT COUNT(*) as count FROM snapshots;'),
-        ('trades', 'SELECT COUNT(*) as count FROM trades;'),
-        ('analytics', 'SELECT COUNT(*) as count FROM analytics;'),
+    statements = [
+        (f'SELECT COUNT(*) AS total, COALESCE(SUM(cached_at = ?), 0) AS fresh FROM {table}', (timestamp,))
+        for table in WRITTEN_TABLES
     ]
-
-    for table, query in queries:
+    with telemetry.span('stage', 'verify', target=backend.key) as span:
         try:
-            cmd = ['npx', 'wrangler', 'd1', 'execute', 'alphaarena-db', '--remote', '--command', query]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-
-            if result.returncode == 0:
-                print(f"  {table}: {result.stdout.strip()}")
-            else:
-                print(f"  {table}: Error querying")
-
+            results = backend.batch(statements)
         except Exception as e:
-            print(f"  {table}: {e}")
+            span.error = str(e)
+            print(f"  ❌ Verification query failed: {e}")
+            return False
+
+        ok = True
+        for table, rows in zip(WRITTEN_TABLES, results):
+            total, fresh = rows[0]['total'], rows[0]['fresh']
+            expected = len(written.get(table, ()))
+            mark = '✓' if fresh == expected else '✗'
+            ok = ok and fresh == expected
+            print(f"  {mark} {table}: {fresh}/{expected} rows from this sync, {total} total")
+        if not ok:
+            span.error = 'rows missing after sync'
+    return ok
 
 def main():
+    recorder = telemetry.reset()
+    backend = create_backend('d1')
+    try:
+        sync(backend)
+    finally:
+        backend.close()
+        recorder.export(recorder.sync_result())
+
+def sync(backend):
     print("🚀 Starting D1 batch sync...\n")
 
     # Fetch data
-    data = fetch_nof1_data()
+    data, failed = fetch_nof1_data()
+    if len(failed) == len(FETCHED_ENDPOINTS):
+        print("\n❌ Every endpoint failed, nothing to sync!")
+        sys.exit(1)
 
     print(f"\n✅ Fetched:")
     print(f"  - {len(data['leaderboard'])} leaderboard entries")
@@ -175,20 +150,24 @@ def main():
 
     # Generate SQL
     print("\n📝 Generating SQL statements...")
-    sql = generate_sql(data)
-
-    # Save SQL to file for review
-    with open('sync-d1.sql', 'w') as f:
-        f.write(sql)
-    print(f"✅ SQL saved to sync-d1.sql ({len(sql)} bytes)")
+    timestamp = int(datetime.now().timestamp())
+    written = {}
+    # Save SQL to file for review; the same file is executed below
+    with open(SQL_FILE, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f:
+        count, size = write_statements(f, generate_sql(data, timestamp, written))
+    print(f"✅ {count} statements saved to {SQL_FILE} ({size} bytes)")
 
     # Execute SQL
-    if execute_sql_file(sql):
-        verify_data()
-        print("\n✅ Sync completed successfully!")
-    else:
+    if not execute_sql_file(backend, SQL_FILE):
         print("\n❌ Sync failed!")
         sys.exit(1)
+    if not verify_data(backend, timestamp, written):
+        print("\n❌ Sync finished but verification failed!")
+        sys.exit(1)
+    if failed:
+        print(f"\n⚠️  Sync completed without {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ Sync completed successfully!")
 
 if __name__ == '__main__':
     main()
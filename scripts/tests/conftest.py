@@ -0,0 +1,36 @@
+"""
+Shared fixtures of the d1sync tests
+
+Run from the repository root:
+
+    python -m pytest -q scripts/tests
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from d1sync import state  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Every test gets its own SYNC_STATE_DIR"""
+    directory = tmp_path / 'sync-state'
+    monkeypatch.setattr(state, 'STATE_DIR', str(directory))
+    return directory
+
+
+@pytest.fixture(scope='session')
+def complete_sync():
+    """scripts/complete-sync-all.py as a module"""
+    spec = importlib.util.spec_from_file_location('complete_sync_all', os.path.join(SCRIPTS_DIR, 'complete-sync-all.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
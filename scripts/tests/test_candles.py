@@ -0,0 +1,87 @@
+from d1sync.backends import SqliteBackend
+from d1sync.candles import RESOLUTIONS, candle_slot, tick_candles
+from d1sync.schema import extract_rows
+from d1sync.sqlwriter import insert_statements
+
+NOW = 1_760_000_000 // 3600 * 3600
+
+
+def apply(db, ticks):
+    rows = extract_rows('price_candles', tick_candles(ticks, NOW), timestamp=NOW)
+    for statement in insert_statements('crypto_price_candles', rows):
+        db.conn.execute(statement)
+
+
+def candle(db, resolution='1m'):
+    rows = db.query(
+        'SELECT bucket, open, high, low, close, ticks, first_ts, last_ts FROM crypto_price_candles '
+        "WHERE symbol = 'BTC' AND resolution = ?", (resolution,)
+    )
+    assert len(rows) == 1
+    return rows[0]
+
+
+def test_single_tick_fills_every_resolution(tmp_path):
+    db = SqliteBackend(str(tmp_path / 'local.db'))
+    apply(db, [('BTC', 100.0, NOW + 5)])
+
+    for resolution, (seconds, capacity) in RESOLUTIONS.items():
+        bucket, slot = candle_slot(NOW + 5, seconds, capacity)
+        stored = db.query(
+            'SELECT slot, bucket, open, close, ticks FROM crypto_price_candles WHERE resolution = ?', (resolution,)
+        )
+        assert stored == [{'slot': slot, 'bucket': bucket, 'open': 100.0, 'close': 100.0, 'ticks': 1}]
+
+
+def test_reapplying_a_batch_changes_nothing(tmp_path):
+    db = SqliteBackend(str(tmp_path / 'local.db'))
+    ticks = [('BTC', 100.0, NOW + 5), ('BTC', 104.0, NOW + 20), ('BTC', 98.0, NOW + 40)]
+    apply(db, ticks)
+    before = candle(db)
+
+    apply(db, ticks)
+    apply(db, ticks[1:2])
+    assert candle(db) == before == {
+        'bucket': NOW, 'open': 100.0, 'high': 104.0, 'low': 98.0, 'close': 98.0,
+        'ticks': 3, 'first_ts': NOW + 5, 'last_ts': NOW + 40
+    }
+
+
+def test_ticks_fold_in_any_order(tmp_path):
+    db = SqliteBackend(str(tmp_path / 'local.db'))
+    apply(db, [('BTC', 101.0, NOW + 30)])
+    apply(db, [('BTC', 99.0, NOW + 10)])
+    apply(db, [('BTC', 103.0, NOW + 50)])
+
+    assert candle(db) == {
+        'bucket': NOW, 'open': 99.0, 'high': 103.0, 'low': 99.0, 'close': 103.0,
+        'ticks': 3, 'first_ts': NOW + 10, 'last_ts': NOW + 50
+    }
+
+
+def test_newer_bucket_restarts_the_slot_and_older_is_ignored(tmp_path):
+    db = SqliteBackend(str(tmp_path / 'local.db'))
+    seconds, capacity = RESOLUTIONS['1m']
+    later = NOW + seconds * capacity  # same ring slot, one lap later
+    assert candle_slot(later, seconds, capacity)[1] == candle_slot(NOW, seconds, capacity)[1]
+
+    apply(db, [('BTC', 100.0, NOW + 5)])
+    apply(db, [('BTC', 200.0, later + 5)])
+    restarted = candle(db)
+    assert restarted == {
+        'bucket': later, 'open': 200.0, 'high': 200.0, 'low': 200.0, 'close': 200.0,
+        'ticks': 1, 'first_ts': later + 5, 'last_ts': later + 5
+    }
+
+    apply(db, [('BTC', 50.0, NOW + 30)])
+    assert candle(db) == restarted
+
+
+def test_ticks_without_a_positive_price_are_skipped(tmp_path):
+    db = SqliteBackend(str(tmp_path / 'local.db'))
+    apply(db, [('BTC', 0, NOW), ('BTC', -1.0, NOW), ('BTC', None, NOW), ('BTC', True, NOW), ('BTC', '100', NOW)])
+    assert db.query('SELECT COUNT(*) AS n FROM crypto_price_candles') == [{'n': 0}]
+
+    apply(db, [('BTC', 100.0, None)])
+    # A tick without a time falls back to the sync timestamp
+    assert candle(db)['first_ts'] == NOW
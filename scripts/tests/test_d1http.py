@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from d1sync import d1http
+from d1sync.backends import SqliteBackend, _inline
+from d1sync.execute import execute_in_chunks
+from d1sync.sqlwriter import MAX_BOUND_PARAMS, bound_statements, insert_statements, write_statements
+
+NOW = 1_760_000_000
+
+TRADES = [
+    ("it's; a (trade)", 'gpt-5', 'BTC', 'long', NOW, NOW + 60, -12.5, '{"note":"?, \'x\'"}', NOW),
+    ('t2', 'grok-4', 'ETH', 'short', NOW, None, 1e-07, 'naïve ✓', NOW),
+    ('t3', 'qwen3-max', 'SOL', '', -5, 2 ** 40, 0.0, '', NOW)
+] * 20
+
+
+def rows_of(conn, table):
+    return conn.execute(f'SELECT * FROM {table} ORDER BY rowid').fetchall()
+
+
+def test_bound_statements_insert_the_same_rows(tmp_path):
+    literal = SqliteBackend(str(tmp_path / 'literal.db'))
+    bound = SqliteBackend(str(tmp_path / 'bound.db'))
+    for statement in insert_statements('recent_trades_cache', TRADES):
+        literal.conn.execute(statement)
+        for sql, params in bound_statements(statement):
+            assert params and len(params) <= MAX_BOUND_PARAMS
+            bound.conn.execute(sql, params)
+
+    expected = rows_of(literal.conn, 'recent_trades_cache')
+    assert rows_of(bound.conn, 'recent_trades_cache') == expected
+    assert len(expected) == 3
+
+
+def test_upsert_clause_is_kept_and_rows_split_by_parameter_count():
+    rows = [('btc', float(i)) for i in range(120)]
+    statement = next(insert_statements('sync_runs', rows))
+    pairs = bound_statements(statement)
+
+    assert [len(params) for _, params in pairs] == [100, 100, 40]
+    assert all(sql.endswith(statement[statement.rindex(')') + 1:]) for sql, _ in pairs)
+    assert pairs[0][1][:4] == ('btc', 0.0, 'btc', 1.0)
+
+
+def test_statements_that_do_not_bind_are_passed_on():
+    for statement in (
+        'DELETE FROM sync_runs WHERE last_run < 5;',
+        "INSERT INTO t (a) VALUES (X'00ff');",
+        f'INSERT INTO t (a) VALUES ({2 ** 60});'
+    ):
+        assert bound_statements(statement) == [(statement, ())]
+    # Rows wider than the parameter limit
+    assert bound_statements("INSERT INTO t (a,b) VALUES (1,'x');", max_params=1) == [
+        ("INSERT INTO t (a,b) VALUES (1,'x');", ())
+    ]
+
+
+def test_inline_ignores_question_marks_inside_quotes():
+    assert _inline("SELECT '?', \"a?\" FROM t WHERE x = ? AND y = ?", (1, "it's")) == (
+        "SELECT '?', \"a?\" FROM t WHERE x = 1 AND y = 'it''s';"
+    )
+    with pytest.raises(ValueError):
+        _inline("SELECT '?' FROM t WHERE x = ?", ())
+
+
+def test_executor_binds_values_over_http(tmp_path, monkeypatch):
+    monkeypatch.setenv('D1_DATABASE_ID', 'local')
+    sql_file = tmp_path / 'sync.sql'
+    with open(sql_file, 'w', encoding='utf-8') as f:
+        write_statements(f, insert_statements('recent_trades_cache', TRADES, max_bytes=400))
+
+    sent = []
+    with d1http.serve_sqlite(str(tmp_path / 'served.db')) as url:
+        client = d1http.D1Client('alphaarena-db', account_id='x', api_token='x', api_url=url)
+        original = client._post
+        client._post = lambda body: sent.append(body) or original(body)
+        try:
+            assert execute_in_chunks(str(sql_file), client.executor(), 2000)
+        finally:
+            client.close()
+
+    statements = [item for body in sent for item in body['batch']]
+    assert statements and all(item['params'] for item in statements)
+    assert all("'" not in item['sql'] for item in statements)
+
+    conn = sqlite3.connect(tmp_path / 'served.db')
+    assert len(rows_of(conn, 'recent_trades_cache')) == 3
+    assert conn.execute("SELECT trade_data FROM recent_trades_cache WHERE id = 't2'").fetchone() == ('naïve ✓',)
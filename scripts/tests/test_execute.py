@@ -0,0 +1,84 @@
+import io
+import threading
+
+from d1sync.execute import SERIAL_BARRIER, execute_in_chunks, iter_statements, plan_chunks
+from d1sync.sqlwriter import write_statements
+
+STATEMENTS = [
+    "INSERT INTO t VALUES ('a;');",
+    "INSERT INTO t VALUES ('it''s;\nstill; the same');",
+    "INSERT INTO t VALUES ('line ending in a quote''\n;');",
+    'DELETE FROM t;'
+]
+
+
+def statements_of(text):
+    return [statement.decode('utf-8').rstrip('\n') for _, statement in iter_statements(io.BytesIO(text.encode('utf-8')))]
+
+
+def test_statements_split_only_outside_literals():
+    assert statements_of(''.join(statement + '\n' for statement in STATEMENTS)) == STATEMENTS
+
+
+def test_offsets_point_at_each_statement():
+    text = ''.join(statement + '\n' for statement in STATEMENTS).encode('utf-8')
+    for offset, statement in iter_statements(io.BytesIO(text)):
+        assert text[offset:offset + len(statement)] == statement
+
+
+def test_barrier_lines_are_skipped_unless_asked_for():
+    text = f'{STATEMENTS[0]}\n{SERIAL_BARRIER}\n{STATEMENTS[3]}\n'
+    assert statements_of(text) == [STATEMENTS[0], STATEMENTS[3]]
+    with_barriers = list(iter_statements(io.BytesIO(text.encode('utf-8')), barriers=True))
+    assert len(with_barriers) == 3
+
+
+def write_sql(path, data, serial=()):
+    with open(path, 'w', encoding='utf-8') as f:
+        write_statements(f, list(data) + ([SERIAL_BARRIER, *serial] if serial else []))
+    return str(path)
+
+
+def test_chunks_below_the_barrier_are_serial(tmp_path):
+    sql_file = write_sql(tmp_path / 'a.sql', [f'INSERT INTO t VALUES ({i});' for i in range(6)],
+                         ['INSERT INTO sync_runs VALUES (1);'])
+    _, chunks = plan_chunks(sql_file, max_bytes=60)
+    assert [serial for *_, serial in chunks] == [False, False, False, True]
+
+    with open(sql_file, 'rb') as f:
+        text = f.read()
+    _, offset, length, _ = chunks[-1]
+    assert text[offset:offset + length] == b'INSERT INTO sync_runs VALUES (1);\n'
+
+
+def test_serial_chunks_wait_for_every_parallel_chunk(tmp_path):
+    sql_file = write_sql(tmp_path / 'b.sql', [f'INSERT INTO t VALUES ({i});' for i in range(8)],
+                         ['STAMP first;', 'STAMP second;'])
+    applied = []
+    lock = threading.Lock()
+
+    def execute(sql):
+        with lock:
+            applied.append(sql)
+
+    assert execute_in_chunks(sql_file, execute, max_bytes=20, parallel=4)
+    assert len(applied) == 10
+    assert applied[-2:] == [b'STAMP first;\n', b'STAMP second;\n']
+
+
+def test_a_failed_data_chunk_holds_back_the_serial_chunks(tmp_path):
+    sql_file = write_sql(tmp_path / 'c.sql', [f'INSERT INTO t VALUES ({i});' for i in range(8)], ['STAMP;'])
+    applied = []
+
+    def failing(sql):
+        if b'(3)' in sql:
+            raise RuntimeError('boom')
+        applied.append(sql)
+
+    assert not execute_in_chunks(sql_file, failing, max_bytes=30, parallel=4)
+    assert b'STAMP;\n' not in applied
+
+    # The rerun only sends what is missing, then the stamp
+    retried = []
+    assert execute_in_chunks(sql_file, retried.append, max_bytes=30, parallel=4)
+    assert retried == [b'INSERT INTO t VALUES (3);\n', b'STAMP;\n']
@@ -0,0 +1,77 @@
+from d1sync.incremental import LOOKBACK_SECONDS, SeenIndex, TradeWatermark
+
+NOW = 1_760_000_000
+
+
+def trade(trade_id, exit_time, pnl=1.0):
+    return {'id': trade_id, 'exit_time': exit_time, 'realized_net_pnl': pnl}
+
+
+def watermark():
+    return TradeWatermark('watermark.json', seen=SeenIndex('trade-ids.db'))
+
+
+def ids(trades):
+    return sorted(item['id'] for item in trades)
+
+
+def test_first_run_writes_everything_then_nothing():
+    trades = [trade('a', NOW - 3 * LOOKBACK_SECONDS), trade('b', NOW - 60), trade('c', NOW)]
+    state = watermark()
+    assert ids(state.select(trades)) == ['a', 'b', 'c']
+    state.commit()
+
+    assert watermark().select(trades) == []
+
+
+def test_changed_trade_inside_the_lookback_window_is_rewritten():
+    state = watermark()
+    state.select([trade('a', NOW - 60), trade('b', NOW)])
+    state.commit()
+
+    assert ids(watermark().select([trade('a', NOW - 60, pnl=2.0), trade('b', NOW)])) == ['a']
+
+
+def test_settled_trade_is_not_rehashed():
+    old = trade('a', NOW - 3 * LOOKBACK_SECONDS)
+    state = watermark()
+    state.select([old, trade('b', NOW)])
+    state.commit()
+
+    # A correction below the window is settled: not written again
+    assert watermark().select([dict(old, realized_net_pnl=5.0), trade('b', NOW)]) == []
+
+
+def test_late_trade_below_the_window_is_still_written():
+    state = watermark()
+    state.select([trade('b', NOW)])
+    state.commit()
+
+    late = trade('late', NOW - 3 * LOOKBACK_SECONDS)
+    state = watermark()
+    assert ids(state.select([late, trade('b', NOW)])) == ['late']
+    state.commit()
+    assert watermark().select([late, trade('b', NOW)]) == []
+
+
+def test_uncommitted_select_is_forgotten():
+    state = watermark()
+    state.select([trade('a', NOW)])
+    assert ids(watermark().select([trade('a', NOW)])) == ['a']
+
+
+def test_full_returns_the_input_and_rebuilds_the_state():
+    trades = [trade('a', NOW - 3 * LOOKBACK_SECONDS), trade('b', NOW)]
+    state = watermark()
+    assert state.select(trades, full=True) is trades
+    state.commit()
+    assert watermark().select(trades) == []
+
+
+def test_seen_index_yields_each_id_once():
+    seen = SeenIndex('ids.db')
+    items = [{'id': 1}, {'id': 2}, {'id': 1}]
+    assert list(seen.select(items, key=lambda item: item['id'])) == [{'id': 1}, {'id': 2}]
+    seen.commit()
+    assert list(seen.select(items + [{'id': 3}], key=lambda item: item['id'])) == [{'id': 3}]
+    seen.close()
@@ -0,0 +1,76 @@
+import io
+import json
+
+import pytest
+
+from d1sync import jsonstream
+from d1sync.cache import body_hash
+from d1sync.jsonstream import JsonArray, iter_array_items, spool_response
+
+ITEMS = [
+    {'id': 't1', 'note': 'brackets ] and , inside', 'nested': [[1, 2], {'a': '}'}]},
+    {'id': 't2', 'note': 'naïve ✓ 币', 'escaped': 'quote \" and \\\\'},
+    [],
+    1.5e-07,
+    None,
+    'plain'
+]
+
+PAYLOAD = {
+    'meta': {'trades': ['not', 'this', 'one']},
+    'other': [1, 2, 3],
+    'trades': ITEMS,
+    'after': 'ignored'
+}
+
+
+def items(document, key=None, chunk_size=jsonstream.STREAM_CHUNK):
+    body = io.BytesIO(json.dumps(document, ensure_ascii=False, indent=1).encode('utf-8'))
+    return list(iter_array_items(body.read, key, chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64])
+def test_items_survive_any_chunk_boundary(chunk_size):
+    assert items(ITEMS, chunk_size=chunk_size) == ITEMS
+    assert items(PAYLOAD, 'trades', chunk_size) == ITEMS
+
+
+def test_missing_key_or_non_array_yields_nothing():
+    assert items(PAYLOAD, 'conversations') == []
+    assert items({'trades': {'id': 't1'}}, 'trades') == []
+    assert items({'trades': 'none'}, 'trades') == []
+    assert items([], None) == []
+    assert list(iter_array_items(io.BytesIO(b'').read)) == []
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+@pytest.mark.parametrize('spool_bytes', [jsonstream.SPOOL_BYTES, 16])
+def test_spooled_body_is_hashed_and_reiterable(monkeypatch, spool_bytes):
+    monkeypatch.setattr(jsonstream, 'SPOOL_BYTES', spool_bytes)
+    raw = json.dumps(PAYLOAD).encode('utf-8')
+
+    body, size, digest = spool_response(FakeResponse(raw), chunk_size=5)
+    assert size == len(raw) and digest == body_hash(raw)
+
+    array = JsonArray(body, 'trades')
+    assert bool(array)
+    assert list(array) == ITEMS
+    assert len(array) == len(ITEMS)
+    # Independent iterators over the same body
+    first, second = iter(array), iter(array)
+    assert next(first) == next(second) == ITEMS[0]
+    assert list(first) == list(second) == ITEMS[1:]
+
+
+def test_empty_array_is_falsy():
+    body, _, _ = spool_response(FakeResponse(b'{"trades": []}'))
+    assert not JsonArray(body, 'trades')
+    assert len(JsonArray(body, 'trades')) == 0
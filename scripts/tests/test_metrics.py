@@ -0,0 +1,89 @@
+import math
+import random
+import sqlite3
+
+import pytest
+
+from d1sync.backends import SqliteBackend, ensure_columns
+from d1sync.metrics import DAY, STARTING_EQUITY, TRADING_DAYS_PER_YEAR, TradeColumns, daily_stats, model_stats
+
+START = 1_760_000_000 // DAY * DAY
+
+
+def trade(model_id, day, pnl, hour=12):
+    exit_time = START + day * DAY + hour * 3600
+    return {'model_id': model_id, 'symbol': 'BTC', 'exit_time': exit_time, 'entry_time': exit_time - 600,
+            'realized_net_pnl': pnl, 'entry_price': 100, 'entry_sz': 1}
+
+
+def stats_of(trades, now=START + 10 * DAY):
+    return {row['model_id']: row for row in model_stats(TradeColumns(trades), now)}
+
+
+def naive_drawdown(pnls):
+    peak = cumulative = drawdown = 0.0
+    for pnl in pnls:
+        cumulative += pnl
+        peak = max(peak, cumulative)
+        drawdown = max(drawdown, peak - cumulative)
+    return drawdown
+
+
+def naive_sharpe(daily):
+    mean = sum(daily) / len(daily)
+    std = math.sqrt(sum((value - mean) ** 2 for value in daily) / (len(daily) - 1))
+    return mean / std * math.sqrt(TRADING_DAYS_PER_YEAR)
+
+
+def test_drawdown_matches_a_per_trade_loop():
+    rng = random.Random(7)
+    trades = [trade(f'm{rng.randrange(4)}', rng.randrange(20), rng.uniform(-50, 50), rng.randrange(24))
+              for _ in range(2000)]
+    stats = stats_of(trades)
+    for model_id, row in stats.items():
+        ordered = sorted((t for t in trades if t['model_id'] == model_id), key=lambda t: t['exit_time'])
+        assert row['max_drawdown'] == pytest.approx(naive_drawdown([t['realized_net_pnl'] for t in ordered]))
+
+
+def test_sharpe_starts_at_each_models_first_trade():
+    early = [trade('early', day, pnl) for day, pnl in enumerate([10, -5, 20, 5, -10, 15])]
+    # Starts on day 3: the three days before it must not count as zero days
+    late = [trade('late', day, pnl) for day, pnl in ((3, 10), (4, 30), (5, -5))]
+    stats = stats_of(early + late)
+
+    assert stats['early']['sharpe_ratio'] == pytest.approx(naive_sharpe([10, -5, 20, 5, -10, 15]))
+    assert stats['late']['sharpe_ratio'] == pytest.approx(naive_sharpe([10, 30, -5]))
+
+
+def test_idle_days_after_the_first_trade_still_count():
+    stats = stats_of([trade('m', 0, 10), trade('m', 2, 20)])
+    assert stats['m']['sharpe_ratio'] == pytest.approx(naive_sharpe([10, 0, 20]))
+
+
+def test_daily_performers_are_ranked_by_return():
+    trades = [
+        # Big on day 0, so day 1's 300 is a smaller return than small's 200
+        trade('big', 0, 10_000), trade('big', 1, 300),
+        trade('small', 0, -5_000), trade('small', 1, 200)
+    ]
+    day = daily_stats(TradeColumns(trades))[1]
+
+    assert day['best_performer'] == 'small'
+    assert day['best_performer_return'] == pytest.approx(200 * 100 / (STARTING_EQUITY - 5_000))
+    assert day['worst_performer'] == 'big'
+    assert day['worst_performer_return'] == pytest.approx(300 * 100 / (STARTING_EQUITY + 10_000))
+
+
+def test_ensure_columns_adds_max_drawdown_to_an_older_table(tmp_path):
+    path = str(tmp_path / 'old.db')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE model_performance_cache (model_id TEXT PRIMARY KEY, sharpe_ratio REAL, cached_at INTEGER)')
+    db.commit()
+    db.close()
+
+    backend = SqliteBackend(path)
+    ensure_columns(backend)
+    ensure_columns(backend)
+    columns = [row['name'] for row in backend.query('PRAGMA table_info(model_performance_cache)')]
+    backend.close()
+    assert columns.count('max_drawdown') == 1
@@ -0,0 +1,73 @@
+from d1sync.models import ACTIVE_SECONDS, EQUITY_TRIGGER, ModelRegistry
+
+NOW = 1_760_000_000
+
+
+def payloads(equity=None, exit_times=None):
+    equity = equity or {}
+    return {
+        'leaderboard': {'leaderboard': [{'id': model_id, 'equity': value} for model_id, value in equity.items()]},
+        'account_totals': {'accountTotals': [
+            {'id': f'{model_id}_1', 'timestamp': NOW, 'realized_pnl': value - 10_000, 'positions': {}}
+            for model_id, value in equity.items()
+        ]},
+        'analytics': {'analytics': [
+            {'model_id': model_id, 'last_trade_exit_time': exit_time}
+            for model_id, exit_time in (exit_times or {}).items()
+        ]}
+    }
+
+
+def synced_registry(equity, exit_times):
+    registry = ModelRegistry()
+    registry.observe(payloads(equity, exit_times), NOW)
+    for model_id in registry.due(NOW):
+        registry.synced(model_id, {}, NOW)
+    registry.commit()
+    return registry
+
+
+def test_new_models_are_due_once():
+    registry = synced_registry({'gpt-5': 10_500.0, 'grok-4': 9_800.0}, {'gpt-5': NOW - 60})
+
+    registry.observe(payloads({'gpt-5': 10_500.0, 'grok-4': 9_800.0}, {'gpt-5': NOW - 60}), NOW + 300)
+    assert registry.due(NOW + 300) == []
+    assert registry.due(NOW + 300, full=True) == ['gpt-5', 'grok-4']
+
+
+def test_a_closed_trade_makes_a_model_due():
+    registry = synced_registry({'gpt-5': 10_500.0}, {'gpt-5': NOW - 60})
+
+    registry.observe(payloads({'gpt-5': 10_500.0}, {'gpt-5': NOW + 100}), NOW + 300)
+    assert registry.due(NOW + 300) == ['gpt-5']
+
+
+def test_equity_drift_below_the_trigger_is_not_due():
+    registry = synced_registry({'gpt-5': 10_000.0}, {'gpt-5': NOW - 60})
+
+    drift = 10_000.0 + EQUITY_TRIGGER / 2
+    registry.observe(payloads({'gpt-5': drift}, {'gpt-5': NOW - 60}), NOW + 300)
+    assert registry.due(NOW + 300) == []
+
+    moved = 10_000.0 - EQUITY_TRIGGER
+    registry.observe(payloads({'gpt-5': moved}, {'gpt-5': NOW - 60}), NOW + 300)
+    assert registry.due(NOW + 300) == ['gpt-5']
+
+
+def test_models_not_seen_for_a_while_retire():
+    registry = synced_registry({'gpt-5': 10_000.0}, {})
+    registry.observe(payloads({'grok-4': 9_000.0}, {'gpt-5': NOW + 100}), NOW + ACTIVE_SECONDS)
+
+    assert registry.active(NOW + ACTIVE_SECONDS) == ['grok-4']
+    assert registry.due(NOW + ACTIVE_SECONDS) == ['grok-4']
+
+
+def test_registry_rows_only_for_changed_entries():
+    registry = synced_registry({'gpt-5': 10_000.0}, {'gpt-5': NOW - 60})
+    # account_totals equity is realized + unrealized PnL
+    assert ModelRegistry().models['gpt-5']['synced'] == [NOW - 60, 0.0]
+
+    registry.observe(payloads({'gpt-5': 10_000.0}, {'gpt-5': NOW - 60}), NOW)
+    assert registry.changes() == []
+    registry.observe(payloads({'gpt-5': 10_000.0}, {'gpt-5': NOW - 60}), NOW + 300)
+    assert [row['last_seen'] for row in registry.changes()] == [NOW + 300]
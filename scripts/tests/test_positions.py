@@ -0,0 +1,83 @@
+from d1sync.positions import CLOSED, MARKED, OPENED, RESIZED, PositionSnapshot, classify
+
+
+def position(quantity=1.0, current_price=100.0, unrealized_pnl=0.0, margin=10.0, **extra):
+    return dict(
+        symbol='BTC', quantity=quantity, entry_price=100.0, current_price=current_price,
+        unrealized_pnl=unrealized_pnl, margin=margin, leverage=10, **extra
+    )
+
+
+def account(account_id, **positions):
+    return {'id': account_id, 'positions': positions}
+
+
+def test_classify():
+    assert classify(None, position()) == OPENED
+    assert classify(position(), None) == CLOSED
+    assert classify(position(), position(quantity=2.0)) == RESIZED
+    assert classify(position(), position(exit_plan={'stop_loss': 90})) == RESIZED
+    assert classify(position(), position(current_price=101.0, unrealized_pnl=1.0, margin=10.1)) == MARKED
+    assert classify(position(), position()) is None
+
+
+def test_first_snapshot_opens_everything():
+    changes = PositionSnapshot().diff([account('gpt-5_1', BTC=position(), ETH=position())])
+
+    assert [(symbol, kind) for _, _, symbol, _, kind in changes.positions] == [('BTC', OPENED), ('ETH', OPENED)]
+    assert changes.marks == []
+    assert [changed for _, changed in changes.accounts] == [True]
+
+
+def test_mark_only_snapshot_writes_marks_without_positions_data():
+    snapshot = PositionSnapshot()
+    snapshot.diff([account('gpt-5_1', BTC=position(), ETH=position())])
+    snapshot.commit()
+
+    changes = snapshot.diff([account('gpt-5_2', BTC=position(current_price=105.0, unrealized_pnl=5.0), ETH=position())])
+
+    assert changes.positions == []
+    assert [(model_id, symbol) for model_id, symbol, _ in changes.marks] == [('gpt-5', 'BTC')]
+    assert [changed for _, changed in changes.accounts] == [False]
+
+
+def test_structural_changes_mark_the_account():
+    snapshot = PositionSnapshot()
+    snapshot.diff([account('gpt-5_1', BTC=position(), ETH=position())])
+    snapshot.commit()
+
+    changes = snapshot.diff([account('gpt-5_2', BTC=position(quantity=3.0), SOL=position())])
+
+    assert [(symbol, kind) for _, _, symbol, _, kind in changes.positions] == [
+        ('BTC', RESIZED), ('ETH', CLOSED), ('SOL', OPENED)
+    ]
+    assert changes.counts() == {OPENED: 1, CLOSED: 1, RESIZED: 1, MARKED: 0}
+    assert [changed for _, changed in changes.accounts] == [True]
+
+
+def test_snapshot_already_written_is_skipped():
+    snapshot = PositionSnapshot()
+    payload = [account('gpt-5_1', BTC=position())]
+    snapshot.diff(payload)
+    snapshot.commit()
+
+    changes = snapshot.diff(payload)
+    assert changes.accounts == [] and changes.positions == [] and changes.marks == []
+
+
+def test_snapshot_is_persisted_only_on_commit(state_dir):
+    first = PositionSnapshot()
+    first.diff([account('gpt-5_1', BTC=position())])
+
+    assert PositionSnapshot().accounts == {}
+    first.commit()
+    assert set(PositionSnapshot().accounts) == {'gpt-5'}
+
+
+def test_full_diff_ignores_the_stored_snapshot():
+    snapshot = PositionSnapshot()
+    snapshot.diff([account('gpt-5_1', BTC=position())])
+    snapshot.commit()
+
+    changes = snapshot.diff([account('gpt-5_1', BTC=position())], full=True)
+    assert [kind for *_, kind in changes.positions] == [OPENED]
@@ -0,0 +1,75 @@
+import json
+
+from d1sync.readmodels import ReadModels, fold_point
+
+NOW = 1_760_000_100 - 1_760_000_100 % 86400
+
+
+def payloads(accounts=(), leaderboard=(), trades=()):
+    return {
+        'account_totals': {'accountTotals': list(accounts)},
+        'leaderboard': {'leaderboard': list(leaderboard)},
+        'trades': {'trades': list(trades)}
+    }
+
+
+def account(model_id, timestamp, realized):
+    return {'id': f'{model_id}_{timestamp}', 'timestamp': timestamp, 'realized_pnl': realized, 'positions': {}}
+
+
+def standing(model_id, rank, equity):
+    return {'id': model_id, 'rank': rank, 'equity': equity, 'return_pct': equity / 100 - 100}
+
+
+def test_fold_point_keeps_the_last_sample_of_each_bucket():
+    points = []
+    assert fold_point(points, 10, 1.0, 60, 2)
+    assert fold_point(points, 50, 2.0, 60, 2)
+    assert not fold_point(points, 55, 2.0, 60, 2)
+    assert fold_point(points, 70, 3.0, 60, 2)
+    assert not fold_point(points, 5, 9.0, 60, 2)
+    assert fold_point(points, 130, 4.0, 60, 2)
+    assert points == [[60, 3.0], [120, 4.0]]
+
+
+def test_equity_curves_are_folded_and_only_changed_rows_written():
+    models = ReadModels()
+    changes = models.diff(payloads([account('gpt-5', NOW, 10.0), account('gpt-5', NOW + 60, 20.0)]), NOW + 60)
+    models.commit()
+
+    curves = {row['resolution']: row for row in changes.curves}
+    assert set(curves) == {'5m', '1h', '1d'}
+    assert json.loads(curves['1h']['points']) == [[NOW, 20.0]]
+    assert curves['1h']['last_ts'] == NOW + 60
+
+    # An old snapshot again is ignored; a later one in the same 5m bucket
+    # moves only the last point of every resolution
+    assert models.diff(payloads([account('gpt-5', NOW, 10.0)]), NOW + 120).curves == []
+    changes = models.diff(payloads([account('gpt-5', NOW + 120, 30.0)]), NOW + 120)
+    assert {row['resolution']: row['last_equity'] for row in changes.curves} == {'5m': 30.0, '1h': 30.0, '1d': 30.0}
+
+
+def test_leaderboard_deltas_compare_with_the_previous_snapshot():
+    models = ReadModels()
+    first = models.diff(payloads(leaderboard=[standing('a', 1, 10500), standing('b', 2, 9800)]), NOW)
+    models.commit()
+    assert [row['rank_change'] for row in first.deltas] == [None, None]
+
+    second = models.diff(payloads(leaderboard=[standing('b', 1, 10900), standing('a', 2, 10400)]), NOW + 300)
+    models.commit()
+    deltas = {row['model_id']: row for row in second.deltas}
+    assert deltas['b']['rank_change'] == 1 and deltas['a']['rank_change'] == -1
+    assert deltas['b']['equity_change'] == 1100
+    assert deltas['a']['previous_timestamp'] == NOW
+
+    # The same standings again change nothing
+    assert models.diff(payloads(leaderboard=[standing('b', 1, 10900), standing('a', 2, 10400)]), NOW + 600).deltas == []
+
+
+def test_state_is_persisted_only_on_commit():
+    models = ReadModels()
+    models.diff(payloads([account('gpt-5', NOW, 10.0)]), NOW)
+    assert ReadModels().curves == {}
+
+    models.commit()
+    assert ReadModels().curves['gpt-5']['last'] == NOW
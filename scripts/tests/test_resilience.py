@@ -0,0 +1,95 @@
+import pytest
+import requests
+
+from d1sync import resilience
+from d1sync.resilience import (
+    COOLDOWN, MAX_COOLDOWN, CircuitBreakers, CircuitOpen, Deadline, DeadlineExceeded, with_retries
+)
+
+NOW = 1_760_000_000.0
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(resilience.time, 'sleep', lambda seconds: None)
+
+
+def failing(*errors, result='ok'):
+    errors = list(errors)
+
+    def request():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return request
+
+
+def test_breaker_opens_after_threshold_and_probes_after_cooldown():
+    breakers = CircuitBreakers(threshold=3)
+    for _ in range(2):
+        breakers.record('trades', False, NOW)
+    assert breakers.check('trades', NOW) is False
+
+    breakers.record('trades', False, NOW)
+    assert breakers.open_endpoints() == ['trades']
+    with pytest.raises(CircuitOpen):
+        breakers.check('trades', NOW + COOLDOWN - 1)
+    assert breakers.check('trades', NOW + COOLDOWN) is True
+
+
+def test_failed_probe_doubles_the_cooldown_and_success_closes():
+    breakers = CircuitBreakers(threshold=1)
+    breakers.record('trades', False, NOW)
+    breakers.record('trades', False, NOW + COOLDOWN)
+
+    with pytest.raises(CircuitOpen):
+        breakers.check('trades', NOW + 2 * COOLDOWN)
+    assert breakers.check('trades', NOW + 3 * COOLDOWN) is True
+
+    for attempt in range(20):
+        breakers.record('trades', False, NOW)
+    assert breakers.endpoints['trades']['cooldown'] == MAX_COOLDOWN
+
+    breakers.record('trades', True, NOW)
+    assert breakers.open_endpoints() == []
+    assert breakers.check('trades', NOW) is False
+
+
+def test_breakers_are_persisted_on_save():
+    breakers = CircuitBreakers(threshold=1)
+    breakers.record('trades', False, NOW)
+    assert CircuitBreakers().endpoints == {}
+
+    breakers.save()
+    assert CircuitBreakers().open_endpoints() == ['trades']
+
+
+def test_transient_errors_are_retried():
+    request = failing(requests.ConnectionError(), requests.Timeout())
+    assert with_retries(request, Deadline(None)) == ('ok', 2)
+
+
+def test_permanent_errors_and_exhausted_attempts_raise_with_retries():
+    with pytest.raises(ValueError) as raised:
+        with_retries(failing(ValueError('bad body')), Deadline(None))
+    assert raised.value.retries == 0
+
+    with pytest.raises(requests.ConnectionError) as raised:
+        with_retries(failing(*[requests.ConnectionError()] * 3), Deadline(None), attempts=3)
+    assert raised.value.retries == 2
+
+
+def test_no_retry_without_time_left_for_the_backoff():
+    with pytest.raises(requests.ConnectionError) as raised:
+        with_retries(failing(requests.ConnectionError()), Deadline(0.5))
+    assert raised.value.retries == 0
+
+
+def test_deadline_caps_timeouts_then_refuses_to_start():
+    assert Deadline(None).timeout((5, 30)) == (5, 30)
+
+    connect, read = Deadline(10).timeout((5, 30))
+    assert connect == 5 and 9 < read <= 10
+
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0).timeout((5, 30))
@@ -0,0 +1,60 @@
+import os
+
+from d1sync.backends import SqliteBackend
+from d1sync.retention import COMPACT_SQL_FILE, DAY, HOUR, RAW_WINDOW, compact, compaction_statements
+
+NOW = 1_760_000_000 // DAY * DAY + 12 * HOUR
+OLD = NOW - RAW_WINDOW - 3 * HOUR
+
+
+def backend(tmp_path):
+    db = SqliteBackend(str(tmp_path / 'local.db'))
+    history = [
+        (f'gpt-5-{t}', 'gpt-5', t, 1, 10_000 + i, 1.0 + i, 0.5, i, 50.0, t)
+        for i, t in enumerate(range(OLD, OLD + HOUR, 600))
+    ] + [('gpt-5-recent', 'gpt-5', NOW - 60, 1, 20_000, 2.0, 0.5, 9, 50.0, NOW - 60)]
+    db.conn.executemany('INSERT INTO leaderboard_history VALUES (?,?,?,?,?,?,?,?,?,?)', history)
+    marks = [('gpt-5', 'BTC', t, 100.0 + i, float(i), 10.0) for i, t in enumerate(range(OLD, OLD + HOUR, 600))]
+    db.conn.executemany('INSERT INTO position_marks VALUES (?,?,?,?,?,?)', marks)
+    return db
+
+
+def test_rollup_runs_before_prune():
+    statements = list(compaction_statements(NOW - RAW_WINDOW, NOW - 30 * DAY, {'leaderboard_history': ('1', 1)}, NOW))
+    first_delete = next(i for i, statement in enumerate(statements) if statement.startswith('DELETE'))
+    assert all(not statement.startswith('DELETE') for statement in statements[:first_delete])
+    assert first_delete >= 6
+
+
+def test_compact_rolls_up_then_prunes(tmp_path, state_dir, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = backend(tmp_path)
+
+    deleted = compact(db, NOW)
+
+    assert deleted['leaderboard_history'] == 6
+    rollup = db.query(
+        "SELECT samples, first_ts, last_ts, equity_min, equity_max, equity_last FROM leaderboard_history_rollup "
+        "WHERE model_id = 'gpt-5' AND resolution = 'hour'"
+    )
+    assert rollup == [{
+        'samples': 6, 'first_ts': OLD, 'last_ts': OLD + 3000,
+        'equity_min': 10_000, 'equity_max': 10_005, 'equity_last': 10_005
+    }]
+    assert [row['id'] for row in db.query('SELECT id FROM leaderboard_history')] == ['gpt-5-recent']
+
+    # The latest mark of a position is its current state and stays
+    assert db.query('SELECT timestamp FROM position_marks') == [{'timestamp': OLD + 3000}]
+
+    # The generated SQL goes to the state dir, not the working directory
+    assert not os.path.exists(tmp_path / COMPACT_SQL_FILE)
+    assert os.path.exists(state_dir / f'{db.key}-{COMPACT_SQL_FILE}')
+
+
+def test_compacting_again_changes_nothing(tmp_path):
+    db = backend(tmp_path)
+    compact(db, NOW)
+    before = db.query('SELECT * FROM leaderboard_history_rollup ORDER BY bucket')
+
+    assert compact(db, NOW)['leaderboard_history'] == 0
+    assert db.query('SELECT * FROM leaderboard_history_rollup ORDER BY bucket') == before
@@ -0,0 +1,56 @@
+from d1sync.schema import check_rows, extract_rows, validated
+from d1sync.sqlwriter import TABLES
+
+NOW = 1_760_000_000
+
+COLUMNS = TABLES['leaderboard_cache']
+
+
+def standing(**fields):
+    entry = {
+        'id': 'gpt-5', 'num_trades': 10, 'sharpe': 0.5, 'win_dollars': 100.0, 'num_losses': 4,
+        'lose_dollars': -50.0, 'return_pct': 5.0, 'equity': 10500.0, 'num_wins': 6, 'rank': 1
+    }
+    entry.update(fields)
+    return entry
+
+
+def row(**fields):
+    return dict(zip(COLUMNS, next(iter(extract_rows('leaderboard', [standing(**fields)], timestamp=NOW)))))
+
+
+def test_aliases_and_defaults_match_the_fast_path():
+    legacy = {'aiModelId': 'gpt-5', 'totalTrades': 10, 'sharpeRatio': 0.5, 'totalAssets': 10500.0}
+    extracted = dict(zip(COLUMNS, next(iter(extract_rows('leaderboard', [legacy], timestamp=NOW)))))
+
+    assert extracted['model_id'] == 'gpt-5'
+    assert extracted['num_trades'] == 10 and extracted['equity'] == 10500.0
+    assert extracted['rank'] == 0 and extracted['cached_at'] == NOW
+    assert row()['num_wins'] == 6
+
+
+def test_fitting_rows_pass_through_unchanged():
+    rows = list(extract_rows('leaderboard', [standing(), standing(id='grok-4', rank=2)], timestamp=NOW))
+    assert check_rows('leaderboard_cache', rows) == (rows, [])
+    assert list(validated('leaderboard_cache', rows)) == rows
+
+
+def test_values_are_coerced_when_nothing_is_lost():
+    rows = list(extract_rows('leaderboard', [standing(id=42, equity='10500.5')], timestamp=NOW))
+    checked, rejected = check_rows('leaderboard_cache', rows)
+
+    assert rejected == []
+    values = dict(zip(COLUMNS, checked[0]))
+    assert values['model_id'] == '42'
+    # Numeric text is left for SQLite to convert
+    assert values['equity'] == '10500.5'
+
+
+def test_rows_that_do_not_fit_are_skipped_and_counted(capsys):
+    entries = [standing(), standing(id='grok-4', equity='n/a'), standing(id='qwen3-max', rank={'x': 1})]
+    rows = list(validated('leaderboard_cache', extract_rows('leaderboard', entries, timestamp=NOW), batch_size=2))
+
+    assert [values[0] for values in rows] == ['gpt-5']
+    output = capsys.readouterr().out
+    assert 'Skipped 2 leaderboard_cache rows' in output
+    assert 'leaderboard_cache.equity' in output
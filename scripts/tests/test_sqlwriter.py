@@ -0,0 +1,39 @@
+import sqlite3
+
+from d1sync.sqlwriter import TABLES, insert_statements, sql_literal
+
+
+def conversation(index, text):
+    return (f'c{index}', 'gpt-5', 1_760_000_000 + index, text, None, None, None, None, 1_760_000_000)
+
+
+def test_statements_stay_under_the_limit_in_utf8_bytes():
+    # Three bytes per character: the character count is a third of the size
+    rows = [conversation(index, '推理' * 400) for index in range(200)]
+    statements = list(insert_statements('ai_conversations', rows, max_bytes=20_000))
+
+    assert len(statements) > 1
+    assert all(len(statement.encode('utf-8')) <= 20_000 for statement in statements)
+
+
+def test_oversized_row_gets_a_statement_of_its_own():
+    rows = [conversation(0, 'x' * 50_000), conversation(1, 'y')]
+    statements = list(insert_statements('ai_conversations', rows, max_bytes=20_000))
+    assert len(statements) == 2
+
+
+def test_statements_round_trip_through_sqlite():
+    rows = [conversation(0, "it's a \"quote\"; DROP TABLE x; --"), conversation(1, 'ünïcödé\n二行')]
+    db = sqlite3.connect(':memory:')
+    db.execute(f'CREATE TABLE ai_conversations ({", ".join(TABLES["ai_conversations"])}, PRIMARY KEY (id))')
+    for statement in insert_statements('ai_conversations', rows):
+        db.execute(statement)
+    assert db.execute('SELECT * FROM ai_conversations ORDER BY id').fetchall() == rows
+
+
+def test_literals():
+    assert sql_literal(None) == 'NULL'
+    assert sql_literal(True) == '1'
+    assert sql_literal(float('nan')) == 'NULL'
+    assert sql_literal({'a': 1}) == '\'{"a": 1}\''
+    assert sql_literal(b'\x01\xff') == "X'01ff'"
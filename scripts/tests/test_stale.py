@@ -0,0 +1,34 @@
+NOW = 1_760_000_000
+
+
+def payloads(stale=()):
+    return {
+        'leaderboard': {'leaderboard': [{'id': 'gpt-5', 'rank': 1, 'equity': 10500.0}]},
+        'trades': {'trades': [{'id': 't1', 'model_id': 'gpt-5', 'symbol': 'BTC', 'exit_time': NOW}]},
+        'analytics': {},
+        'conversations': {},
+        'account_totals': {'accountTotals': [{'id': 'gpt-5_1', 'realized_pnl': 500.0, 'positions': {}}]},
+        'since_inception': {},
+        'crypto_prices': {'prices': {'BTC': {'price': 100000.0, 'timestamp': NOW}}},
+        'model_analytics': {'gpt-5': {'analytics': [{'model_id': 'gpt-5'}]}},
+        'stale': sorted(stale)
+    }
+
+
+def written(complete_sync, data):
+    return {
+        table for _, table, rows in complete_sync.sql_sections(data, timestamp=NOW) if list(rows)
+    }
+
+
+def test_stale_endpoints_write_nothing(complete_sync):
+    fresh = written(complete_sync, payloads())
+    assert {'leaderboard_cache', 'leaderboard_history', 'account_totals', 'crypto_prices_realtime',
+            'model_analytics'} <= fresh
+
+    stale = written(complete_sync, payloads({'leaderboard', 'account_totals', 'crypto_prices', 'analytics:gpt-5'}))
+    assert stale == fresh - {
+        'leaderboard_cache', 'leaderboard_history', 'account_totals', 'account_positions',
+        'crypto_prices_realtime', 'crypto_price_candles', 'model_analytics'
+    }
+    assert 'recent_trades_cache' in stale
@@ -6,6 +6,44 @@ export const dynamic = 'force-dynamic'
 const ANALYTICS_API = 'https://nof1.ai/api/analytics'
 const API_TIMEOUT = 30000 // 30 seconds
 
+/**
+ * Realized PnL of a model per symbol, from the model_symbol_pnl read model
+ * the sync keeps (scripts/d1sync/readmodels.py). Empty without a D1 binding
+ * or before the sync created the table.
+ */
+async function readSymbolPnl(db: any, modelId: string) {
+  if (!db) return []
+
+  try {
+    const { results } = await db.prepare(`
+      SELECT
+        symbol, trades, wins, losses, win_rate, realized_net_pnl, realized_gross_pnl,
+        total_commission, best_trade_pnl, worst_trade_pnl, last_exit_time
+      FROM model_symbol_pnl
+      WHERE model_id = ?
+      ORDER BY realized_net_pnl DESC
+    `).bind(modelId).all()
+    return (results || []).map((row: any) => ({
+      symbol: row.symbol,
+      trades: row.trades,
+      wins: row.wins,
+      losses: row.losses,
+      winRate: Number(row.win_rate || 0),
+      netPnl: Number(row.realized_net_pnl || 0),
+      grossPnl: Number(row.realized_gross_pnl || 0),
+      commission: Number(row.total_commission || 0),
+      bestTradePnl: Number(row.best_trade_pnl || 0),
+      worstTradePnl: Number(row.worst_trade_pnl || 0),
+      lastExitTime: row.last_exit_time
+        ? new Date(Number(row.last_exit_time) * 1000).toISOString()
+        : null,
+    }))
+  } catch (error) {
+    console.error('model_symbol_pnl unavailable:', error)
+    return []
+  }
+}
+
 /**
  * Model Analytics API - Fetches data directly from NOF1 API
  *
@@ -17,6 +55,7 @@ const API_TIMEOUT = 30000 // 30 seconds
  * - Leverage usage
  * - Sharpe ratio
  * - And 50+ other metrics
+ * - Realized PnL per symbol (model_symbol_pnl in D1, when bound)
  */
 export async function GET(
   request: NextRequest,
@@ -82,6 +121,8 @@ export async function GET(
       )
     }
 
+    const bySymbol = await readSymbolPnl((request as any).env?.DB, modelAnalytics.model_id)
+
     // Extract data from the different breakdown tables
     const feeData = modelAnalytics.fee_pnl_moves_breakdown_table || {}
     const winnersLosers = modelAnalytics.winners_losers_breakdown_table || {}
@@ -200,6 +241,9 @@ export async function GET(
         maxBreakMins: modelAnalytics.max_invocation_break_mins || 0,
       },
 
+      // Realized PnL per symbol
+      bySymbol,
+
       // Raw data for debugging
       rawData: modelAnalytics,
     }
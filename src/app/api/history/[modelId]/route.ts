@@ -1,8 +1,164 @@
 import { NextRequest, NextResponse } from 'next/server'
+import { decodePositions } from '@/lib/database/blobs'
 
 export const runtime = 'nodejs'
 export const dynamic = 'force-dynamic'
 
+const LEADERBOARD_HISTORY_SELECT = `
+  SELECT
+    id,
+    model_id,
+    timestamp,
+    rank,
+    equity,
+    return_pct,
+    sharpe,
+    num_trades,
+    win_rate,
+    cached_at
+  FROM leaderboard_history
+  WHERE model_id = ? AND timestamp >= ?
+`
+
+const LEADERBOARD_ROLLUP_SELECT = `
+  SELECT
+    model_id || '-' || resolution || '-' || bucket AS id,
+    model_id,
+    last_ts AS timestamp,
+    rank_last AS rank,
+    equity_last AS equity,
+    return_pct_last AS return_pct,
+    sharpe_last AS sharpe,
+    num_trades_last AS num_trades,
+    win_rate_last AS win_rate,
+    cached_at
+  FROM leaderboard_history_rollup
+  WHERE model_id = ? AND last_ts >= ?
+`
+
+function isMissingTable(error: unknown, table: string) {
+  const message = error instanceof Error ? error.message : String(error)
+  return message.includes(`no such table: ${table}`)
+}
+
+// Downsampled curves in model_equity_curves (RESOLUTIONS in scripts/d1sync/readmodels.py)
+const EQUITY_CURVE_RESOLUTIONS = ['5m', '1h', '1d']
+
+/**
+ * Equity curve of a model from its model_equity_curves row, the points
+ * since startTime; null when the sync has not materialized that row.
+ */
+async function readEquityCurve(db: any, modelId: string, resolution: string, startTime: number) {
+  let row
+  try {
+    row = await db.prepare(`
+      SELECT points FROM model_equity_curves WHERE model_id = ? AND resolution = ?
+    `).bind(modelId, resolution).first()
+  } catch (error) {
+    if (!isMissingTable(error, 'model_equity_curves')) {
+      throw error
+    }
+    return null
+  }
+  if (!row?.points) return null
+
+  const points: [number, number][] = JSON.parse(row.points)
+  return points
+    .filter(([bucket]) => bucket >= startTime)
+    .map(([bucket, equity]) => ({
+      timestamp: Number(bucket),
+      date: new Date(Number(bucket) * 1000).toISOString(),
+      totalEquity: Number(equity || 0),
+    }))
+}
+
+// Position fields that move with the price alone (MARK_FIELDS in scripts/d1sync/positions.py)
+const POSITION_MARK_FIELDS = ['current_price', 'unrealized_pnl', 'margin']
+
+async function decodeOrNull(text: string | null | undefined) {
+  try {
+    return await decodePositions(text)
+  } catch (e) {
+    // Ignore parse errors
+    return null
+  }
+}
+
+/**
+ * Positions of every account_totals row, in the order given (ascending).
+ *
+ * The delta sync only stores positions_data when an account's positions
+ * changed structurally; the snapshots in between carry NULL and their
+ * price moves live in position_marks, keyed by the sync time (the row's
+ * cached_at). Those rows get the last structural snapshot - from earlier
+ * in the range, or the last one before it - with the marks up to their
+ * own sync applied.
+ */
+async function rebuildPositions(db: any, modelId: string, rows: any[]) {
+  const decoded = await Promise.all(rows.map((entry) => decodeOrNull(entry.positions_data)))
+  if (!rows.length || decoded.every((positions) => positions !== null)) {
+    return decoded
+  }
+
+  let current: any = null
+  let since = Number(rows[0].cached_at)
+  if (decoded[0] === null) {
+    const baseline = await db.prepare(`
+      SELECT positions_data, cached_at
+      FROM account_totals
+      WHERE model_id = ? AND timestamp < ? AND positions_data IS NOT NULL
+      ORDER BY timestamp DESC
+      LIMIT 1
+    `).bind(modelId, Number(rows[0].timestamp)).first()
+    if (baseline) {
+      current = await decodeOrNull(baseline.positions_data)
+      since = Number(baseline.cached_at)
+    }
+  }
+
+  let marks: any[] = []
+  try {
+    const marksQuery = await db.prepare(`
+      SELECT symbol, timestamp, current_price, unrealized_pnl, margin
+      FROM position_marks
+      WHERE model_id = ? AND timestamp > ? AND timestamp <= ?
+      ORDER BY timestamp ASC
+    `).bind(modelId, since, Number(rows[rows.length - 1].cached_at)).all()
+    marks = marksQuery.results || []
+  } catch (error) {
+    if (!isMissingTable(error, 'position_marks')) {
+      throw error
+    }
+  }
+
+  let next = 0
+  return rows.map((entry, index) => {
+    const syncedAt = Number(entry.cached_at)
+    if (decoded[index] !== null) {
+      // A structural snapshot already holds the marks of its own sync
+      while (next < marks.length && Number(marks[next].timestamp) <= syncedAt) next++
+      current = decoded[index]
+      return current
+    }
+    if (current === null || typeof current !== 'object' || Array.isArray(current)) {
+      return current
+    }
+
+    current = Object.fromEntries(
+      Object.entries<any>(current).map(([symbol, position]) => [symbol, { ...position }])
+    )
+    for (; next < marks.length && Number(marks[next].timestamp) <= syncedAt; next++) {
+      const mark = marks[next]
+      const position = current[mark.symbol]
+      if (!position) continue
+      for (const field of POSITION_MARK_FIELDS) {
+        if (mark[field] != null) position[field] = Number(mark[field])
+      }
+    }
+    return current
+  })
+}
+
 /**
  * Historical Performance API - Provides historical trends data
  *
@@ -10,6 +166,9 @@ export const dynamic = 'force-dynamic'
  * - leaderboard_history - Ranking changes
  * - daily_snapshots - Daily snapshots
  * - account_totals - Account history (1,939 records)
+ * - model_equity_curves - Downsampled equity curve, read instead of
+ *   account_totals when `resolution` (5m, 1h or 1d) is given; those points
+ *   carry the equity only, without PnL split or positions
  *
  * Returns:
  * - Equity history curve data
@@ -27,6 +186,13 @@ export async function GET(
     // Time range parameters
     const days = parseInt(searchParams.get('days') || '30')
     const limit = parseInt(searchParams.get('limit') || '100')
+    const resolution = searchParams.get('resolution')
+    if (resolution !== null && !EQUITY_CURVE_RESOLUTIONS.includes(resolution)) {
+      return NextResponse.json(
+        { error: `resolution must be one of ${EQUITY_CURVE_RESOLUTIONS.join(', ')}` },
+        { status: 400 }
+      )
+    }
 
     // Get D1 database binding
     const env = (request as any).env
@@ -43,24 +209,30 @@ export async function GET(
     const currentTime = Math.floor(Date.now() / 1000)
     const startTime = currentTime - (days * 24 * 60 * 60)
 
-    // Query leaderboard history
-    const leaderboardHistoryQuery = await db.prepare(`
-      SELECT
-        id,
-        model_id,
-        timestamp,
-        rank,
-        equity,
-        return_pct,
-        sharpe,
-        num_trades,
-        win_rate,
-        cached_at
-      FROM leaderboard_history
-      WHERE model_id = ? AND timestamp >= ?
-      ORDER BY timestamp DESC
-      LIMIT ?
-    `).bind(modelId, startTime, limit).all()
+    // Query leaderboard history. Older snapshots are compacted into hourly/daily
+    // buckets (leaderboard_history_rollup), which stand in for the raw rows; a
+    // database the rollup table was never created in is read from the raw rows only.
+    let leaderboardHistoryQuery
+    try {
+      leaderboardHistoryQuery = await db.prepare(`
+        SELECT * FROM (
+          ${LEADERBOARD_HISTORY_SELECT}
+          UNION ALL
+          ${LEADERBOARD_ROLLUP_SELECT}
+        )
+        ORDER BY timestamp DESC
+        LIMIT ?
+      `).bind(modelId, startTime, modelId, startTime, limit).all()
+    } catch (error) {
+      if (!isMissingTable(error, 'leaderboard_history_rollup')) {
+        throw error
+      }
+      leaderboardHistoryQuery = await db.prepare(`
+        ${LEADERBOARD_HISTORY_SELECT}
+        ORDER BY timestamp DESC
+        LIMIT ?
+      `).bind(modelId, startTime, limit).all()
+    }
 
     // Query daily snapshots
     const dailySnapshotsQuery = await db.prepare(`
@@ -83,23 +255,6 @@ export async function GET(
       LIMIT ?
     `).bind(modelId, limit).all()
 
-    // Query account totals (equity history)
-    const accountTotalsQuery = await db.prepare(`
-      SELECT
-        id,
-        model_id,
-        timestamp,
-        realized_pnl,
-        unrealized_pnl,
-        total_equity,
-        positions_data,
-        cached_at
-      FROM account_totals
-      WHERE model_id = ? AND timestamp >= ?
-      ORDER BY timestamp ASC
-      LIMIT ?
-    `).bind(modelId, startTime, limit).all()
-
     // Transform leaderboard history
     const rankingHistory = (leaderboardHistoryQuery.results || []).map((entry: any) => ({
       timestamp: Number(entry.timestamp),
@@ -125,26 +280,41 @@ export async function GET(
       positionsOpen: snapshot.positions_open,
     }))
 
-    // Transform account totals (equity curve)
-    const equityCurve = (accountTotalsQuery.results || []).map((entry: any) => {
-      let positionsData = null
-      try {
-        if (entry.positions_data) {
-          positionsData = JSON.parse(entry.positions_data)
-        }
-      } catch (e) {
-        // Ignore parse errors
-      }
+    // Equity curve: the materialized read model when a resolution is asked
+    // for, else (or when the sync has not written it yet) account_totals
+    let equityCurve: any[] | null = resolution
+      ? await readEquityCurve(db, modelId, resolution, startTime)
+      : null
+    if (equityCurve === null) {
+      // Query account totals (equity history)
+      const accountTotalsQuery = await db.prepare(`
+        SELECT
+          id,
+          model_id,
+          timestamp,
+          realized_pnl,
+          unrealized_pnl,
+          total_equity,
+          positions_data,
+          cached_at
+        FROM account_totals
+        WHERE model_id = ? AND timestamp >= ?
+        ORDER BY timestamp ASC
+        LIMIT ?
+      `).bind(modelId, startTime, limit).all()
 
-      return {
+      // Transform account totals (equity curve)
+      const accountTotals = accountTotalsQuery.results || []
+      const positions = await rebuildPositions(db, modelId, accountTotals)
+      equityCurve = accountTotals.map((entry: any, index: number) => ({
         timestamp: Number(entry.timestamp),
         date: new Date(Number(entry.timestamp) * 1000).toISOString(),
         realizedPnl: Number(entry.realized_pnl || 0),
         unrealizedPnl: Number(entry.unrealized_pnl || 0),
         totalEquity: Number(entry.total_equity || 0),
-        positions: positionsData,
-      }
-    })
+        positions: positions[index],
+      }))
+    }
 
     // Calculate statistics
     const stats = {
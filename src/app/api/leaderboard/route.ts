@@ -60,8 +60,32 @@ const AI_MODELS = {
   }
 }
 
+/**
+ * Rank change of every model since the previous leaderboard snapshot, from
+ * the leaderboard_deltas read model the sync keeps (scripts/d1sync/readmodels.py).
+ * Empty without a D1 binding or before the sync created the table.
+ */
+async function readRankChanges(db: any): Promise<Map<string, number>> {
+  const changes = new Map<string, number>()
+  if (!db) return changes
+
+  try {
+    const { results } = await db.prepare(`
+      SELECT model_id, rank_change FROM leaderboard_deltas
+    `).all()
+    for (const row of results || []) {
+      if (row.rank_change != null) changes.set(row.model_id, Number(row.rank_change))
+    }
+  } catch (error) {
+    console.error('leaderboard_deltas unavailable:', error)
+  }
+  return changes
+}
+
 export async function GET(request: NextRequest) {
   try {
+    const rankChangesPromise = readRankChanges((request as any).env?.DB)
+
     // Fetch leaderboard from NOF1 API
     const controller = new AbortController()
     const timeoutId = setTimeout(() => controller.abort(), API_TIMEOUT)
@@ -82,6 +106,7 @@ export async function GET(request: NextRequest) {
 
     const data = await response.json() as { leaderboard: any[] }
     const leaderboard = data.leaderboard || []
+    const rankChanges = await rankChangesPromise
 
     // Transform to frontend format
     const enrichedSnapshots = leaderboard.map((entry: any, index: number) => {
@@ -110,7 +135,7 @@ export async function GET(request: NextRequest) {
         totalTrades: totalTrades,
         winRate: winRate,
         rank: entry.rank || (index + 1),
-        rankChange: 0,
+        rankChange: rankChanges.get(modelId) ?? 0,
         timestamp: timestamp,
         aiModel: {
           id: modelInfo.id,
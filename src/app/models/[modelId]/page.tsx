@@ -40,8 +40,9 @@ interface ModelHistory {
     timestamp: number
     date: string
     totalEquity: number
-    realizedPnl: number
-    unrealizedPnl: number
+    // Only on curves read from account_totals, not the downsampled ones
+    realizedPnl?: number
+    unrealizedPnl?: number
   }>
   statistics: {
     totalDataPoints: number
@@ -113,7 +114,7 @@ export default function ModelDetailPage() {
           fetch('/api/leaderboard'),
           fetch(`/api/analytics/${modelId}`),
           fetch(`/api/trades/complete?model_id=${modelId}&limit=10&sort_by=entry_time&sort_order=DESC`),
-          fetch(`/api/history/${modelId}?days=30`)
+          fetch(`/api/history/${modelId}?days=30&resolution=1h`)
         ])
 
         const leaderboardData = await leaderboardRes.json() as { data?: any[] }
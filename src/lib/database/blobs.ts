@@ -0,0 +1,67 @@
+/**
+ * Decoders for the JSON documents the sync stores next to broken-out columns
+ * (recent_trades_cache.trade_data, account_totals.positions_data).
+ *
+ * Rows may hold plain JSON, compact JSON without the keys already stored as
+ * columns, or a deflated document ('z:' + base64), see scripts/d1sync/blobs.py.
+ */
+
+const COMPRESSED_PREFIX = 'z:'
+
+async function inflate(encoded: string): Promise<string> {
+  const bytes = Uint8Array.from(atob(encoded), (char) => char.charCodeAt(0))
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'))
+  return new Response(stream).text()
+}
+
+async function parseBlob(text: string): Promise<any> {
+  if (text.startsWith(COMPRESSED_PREFIX)) {
+    text = await inflate(text.slice(COMPRESSED_PREFIX.length))
+  }
+  return JSON.parse(text)
+}
+
+/**
+ * Decode a stored document; keys left out because they equal a column are
+ * restored from `columns` (column name -> row value).
+ */
+export async function decodeBlob(
+  text: string | null | undefined,
+  columns: Record<string, unknown> = {}
+): Promise<any> {
+  if (text == null || text === '') return null
+  const value = await parseBlob(text)
+  if (value && typeof value === 'object' && !Array.isArray(value)) {
+    for (const [key, column] of Object.entries(columns)) {
+      if (!(key in value) && column != null) value[key] = column
+    }
+  }
+  return value
+}
+
+/**
+ * Decode a stored positions_data map, restoring each position's symbol from
+ * the key it is stored under.
+ */
+export async function decodePositions(text: string | null | undefined): Promise<any> {
+  const positions = await decodeBlob(text)
+  if (positions && typeof positions === 'object' && !Array.isArray(positions)) {
+    for (const [symbol, position] of Object.entries<any>(positions)) {
+      if (position && typeof position === 'object' && !('symbol' in position)) position.symbol = symbol
+    }
+  }
+  return positions
+}
+
+/** trade_data of a recent_trades_cache row, with its column values restored */
+export function decodeTradeData(row: Record<string, any>): Promise<any> {
+  return decodeBlob(row.trade_data, {
+    id: row.id,
+    model_id: row.model_id,
+    symbol: row.symbol,
+    side: row.side,
+    entry_time: row.entry_time,
+    exit_time: row.exit_time,
+    realized_net_pnl: row.realized_net_pnl,
+  })
+}
@@ -9,15 +9,69 @@ const FIVE_MINUTES = 5
 const ONE_HOUR = 60
 const ONE_DAY = 60 * 24
 
-const MODELS = [
-  'qwen3-max',
-  'deepseek-chat-v3.1',
-  'claude-sonnet-4-5',
-  'grok-4',
-  'gemini-2.5-pro',
-  'gpt-5'
+// Crypto price candles: [resolution, bucket seconds, ring slots kept], as
+// RESOLUTIONS in scripts/d1sync/candles.py
+const CANDLE_RESOLUTIONS: Array<[string, number, number]> = [
+  ['1m', 60, 1440],
+  ['5m', 5 * 60, 2016],
+  ['1h', 60 * 60, 2160],
+  ['1d', 24 * 60 * 60, 1825]
 ]
 
+// Folds a tick into its candle's ring slot (UPSERT_CLAUSES in scripts/d1sync/sqlwriter.py):
+// a newer bucket restarts the slot, the same bucket widens it, an older one is ignored
+const CANDLE_UPSERT = `
+  INSERT INTO crypto_price_candles (
+    symbol, resolution, slot, bucket, open, high, low, close, ticks, first_ts, last_ts, cached_at
+  ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+  ON CONFLICT(symbol, resolution, slot) DO UPDATE SET
+    open = CASE WHEN excluded.bucket > bucket OR excluded.first_ts < first_ts THEN excluded.open ELSE open END,
+    high = CASE WHEN excluded.bucket > bucket THEN excluded.high ELSE MAX(high, excluded.high) END,
+    low = CASE WHEN excluded.bucket > bucket THEN excluded.low ELSE MIN(low, excluded.low) END,
+    close = CASE WHEN excluded.bucket > bucket OR excluded.last_ts >= last_ts THEN excluded.close ELSE close END,
+    ticks = CASE WHEN excluded.bucket > bucket THEN excluded.ticks
+      WHEN excluded.first_ts < first_ts OR excluded.last_ts > last_ts THEN ticks + excluded.ticks ELSE ticks END,
+    first_ts = CASE WHEN excluded.bucket > bucket THEN excluded.first_ts ELSE MIN(first_ts, excluded.first_ts) END,
+    last_ts = CASE WHEN excluded.bucket > bucket THEN excluded.last_ts ELSE MAX(last_ts, excluded.last_ts) END,
+    bucket = excluded.bucket,
+    cached_at = excluded.cached_at
+  WHERE excluded.bucket >= bucket
+`
+
+const ADDED_COLUMNS: [string, string, string][] = [['model_performance_cache', 'max_drawdown', 'REAL']]
+
+// Models are discovered from the leaderboard and account totals (ModelRegistry in
+// scripts/d1sync/models.py); one missing from both this long is no longer fanned out
+const MODEL_ACTIVE_SECONDS = 3 * 24 * 60 * 60
+
+// Equity move in dollars since a model's analytics landed that makes it due
+// without a new closed trade: 1% of the $10,000 starting equity
+// (EQUITY_TRIGGER in scripts/d1sync/models.py)
+const EQUITY_TRIGGER = 100
+
+// Registers a model seen in a payload (UPSERT_CLAUSES in scripts/d1sync/sqlwriter.py).
+// A model's equity is that of its latest account snapshot; the leaderboard
+// equity only fills it in while the model has none (signals() in models.py)
+const MODEL_SEEN_UPSERT = `
+  INSERT INTO model_registry (model_id, first_seen, last_seen, equity, cached_at)
+  VALUES (?, ?, ?, ?, ?)
+  ON CONFLICT(model_id) DO UPDATE SET
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen),
+    equity = CASE WHEN excluded.last_seen >= last_seen AND excluded.equity IS NOT NULL THEN excluded.equity ELSE equity END,
+    cached_at = excluded.cached_at
+`
+
+const MODEL_LISTED_UPSERT = `
+  INSERT INTO model_registry (model_id, first_seen, last_seen, equity, cached_at)
+  VALUES (?, ?, ?, ?, ?)
+  ON CONFLICT(model_id) DO UPDATE SET
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen),
+    equity = COALESCE(equity, excluded.equity),
+    cached_at = excluded.cached_at
+`
+
 type JsonValue = string | number | boolean | null | JsonValue[] | { [x: string]: JsonValue }
 
 export interface Env {
@@ -261,6 +315,245 @@ async function ensureTables(db: D1Database) {
       cached_at INTEGER
     )
   `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS leaderboard_history (
+      id TEXT PRIMARY KEY,
+      model_id TEXT,
+      timestamp INTEGER,
+      rank INTEGER,
+      equity REAL,
+      return_pct REAL,
+      sharpe REAL,
+      num_trades INTEGER,
+      win_rate REAL,
+      cached_at INTEGER
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS daily_snapshots (
+      id TEXT PRIMARY KEY,
+      model_id TEXT,
+      snapshot_date TEXT,
+      trades_count INTEGER,
+      total_pnl REAL,
+      total_fees REAL,
+      win_rate REAL,
+      best_trade_pnl REAL,
+      worst_trade_pnl REAL,
+      equity_eod REAL,
+      positions_open INTEGER,
+      cached_at INTEGER
+    )
+  `).run()
+
+  // Hourly/daily rollups written by scripts/d1sync/retention.py
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS leaderboard_history_rollup (
+      model_id TEXT NOT NULL,
+      resolution TEXT NOT NULL,
+      bucket INTEGER NOT NULL,
+      samples INTEGER NOT NULL,
+      first_ts INTEGER,
+      last_ts INTEGER,
+      equity_last REAL,
+      equity_min REAL,
+      equity_max REAL,
+      return_pct_last REAL,
+      return_pct_min REAL,
+      return_pct_max REAL,
+      sharpe_last REAL,
+      sharpe_min REAL,
+      sharpe_max REAL,
+      rank_last INTEGER,
+      num_trades_last INTEGER,
+      win_rate_last REAL,
+      cached_at INTEGER,
+      PRIMARY KEY (model_id, resolution, bucket)
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS account_positions_rollup (
+      model_id TEXT NOT NULL,
+      symbol TEXT NOT NULL,
+      resolution TEXT NOT NULL,
+      bucket INTEGER NOT NULL,
+      samples INTEGER NOT NULL,
+      first_ts INTEGER,
+      last_ts INTEGER,
+      quantity_last REAL,
+      current_price_last REAL,
+      current_price_min REAL,
+      current_price_max REAL,
+      unrealized_pnl_last REAL,
+      unrealized_pnl_min REAL,
+      unrealized_pnl_max REAL,
+      leverage_last REAL,
+      cached_at INTEGER,
+      PRIMARY KEY (model_id, symbol, resolution, bucket)
+    )
+  `).run()
+
+  // Mark-only position ticks (scripts/d1sync/positions.py) and their rollups
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS position_marks (
+      model_id TEXT NOT NULL,
+      symbol TEXT NOT NULL,
+      timestamp INTEGER NOT NULL,
+      current_price REAL,
+      unrealized_pnl REAL,
+      margin REAL,
+      PRIMARY KEY (model_id, symbol, timestamp)
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS position_marks_rollup (
+      model_id TEXT NOT NULL,
+      symbol TEXT NOT NULL,
+      resolution TEXT NOT NULL,
+      bucket INTEGER NOT NULL,
+      samples INTEGER NOT NULL,
+      first_ts INTEGER,
+      last_ts INTEGER,
+      current_price_last REAL,
+      current_price_min REAL,
+      current_price_max REAL,
+      unrealized_pnl_last REAL,
+      unrealized_pnl_min REAL,
+      unrealized_pnl_max REAL,
+      margin_last REAL,
+      cached_at INTEGER,
+      PRIMARY KEY (model_id, symbol, resolution, bucket)
+    )
+  `).run()
+
+  // Read models maintained by the sync scripts (scripts/d1sync/readmodels.py)
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS model_equity_curves (
+      model_id TEXT NOT NULL,
+      resolution TEXT NOT NULL,
+      points TEXT,
+      num_points INTEGER,
+      first_ts INTEGER,
+      last_ts INTEGER,
+      last_equity REAL,
+      cached_at INTEGER,
+      PRIMARY KEY (model_id, resolution)
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS leaderboard_deltas (
+      model_id TEXT PRIMARY KEY,
+      timestamp INTEGER,
+      rank INTEGER,
+      previous_rank INTEGER,
+      rank_change INTEGER,
+      equity REAL,
+      equity_change REAL,
+      return_pct REAL,
+      return_pct_change REAL,
+      previous_timestamp INTEGER,
+      cached_at INTEGER
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS model_symbol_pnl (
+      model_id TEXT NOT NULL,
+      symbol TEXT NOT NULL,
+      trades INTEGER,
+      wins INTEGER,
+      losses INTEGER,
+      win_rate REAL,
+      realized_net_pnl REAL,
+      realized_gross_pnl REAL,
+      total_commission REAL,
+      best_trade_pnl REAL,
+      worst_trade_pnl REAL,
+      last_exit_time INTEGER,
+      cached_at INTEGER,
+      PRIMARY KEY (model_id, symbol)
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS crypto_price_candles (
+      symbol TEXT NOT NULL,
+      resolution TEXT NOT NULL,
+      slot INTEGER NOT NULL,
+      bucket INTEGER NOT NULL,
+      open REAL,
+      high REAL,
+      low REAL,
+      close REAL,
+      ticks INTEGER,
+      first_ts INTEGER,
+      last_ts INTEGER,
+      cached_at INTEGER,
+      PRIMARY KEY (symbol, resolution, slot)
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS model_registry (
+      model_id TEXT PRIMARY KEY,
+      first_seen INTEGER NOT NULL,
+      last_seen INTEGER NOT NULL,
+      last_trade_exit_time INTEGER,
+      equity REAL,
+      analytics_exit_time INTEGER,
+      analytics_equity REAL,
+      analytics_synced_at INTEGER,
+      cached_at INTEGER
+    )
+  `).run()
+
+  await db.prepare(`
+    CREATE TABLE IF NOT EXISTS model_performance_cache (
+      model_id TEXT PRIMARY KEY,
+      today_trades INTEGER DEFAULT 0,
+      today_pnl REAL DEFAULT 0,
+      today_win_rate REAL,
+      week_trades INTEGER DEFAULT 0,
+      week_pnl REAL DEFAULT 0,
+      week_win_rate REAL,
+      total_trades INTEGER DEFAULT 0,
+      total_pnl REAL DEFAULT 0,
+      overall_win_rate REAL,
+      sharpe_ratio REAL,
+      max_drawdown REAL,
+      cached_at INTEGER NOT NULL
+    )
+  `).run()
+
+  // Columns added after their table was first created (ADDED_COLUMNS in
+  // scripts/d1sync/backends.py); CREATE TABLE IF NOT EXISTS leaves older
+  // databases without them
+  for (const [table, column, kind] of ADDED_COLUMNS) {
+    const info = await db.prepare(`PRAGMA table_info(${table})`).all<{ name: string }>()
+    const existing = (info.results ?? []).map((row) => row.name)
+    if (existing.length && !existing.includes(column)) {
+      await db.prepare(`ALTER TABLE ${table} ADD COLUMN ${column} ${kind}`).run()
+    }
+  }
+
+  // Read-path indexes, as in migrations/d1-read-indexes.sql
+  await db.batch([
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_trades_detailed_model_exit ON trades_detailed(model_id, exit_time)`),
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_ai_conversations_model_time ON ai_conversations(model_id, conversation_time)`),
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_account_totals_model_time ON account_totals(model_id, timestamp)`),
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_account_positions_account ON account_positions(account_total_id)`),
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_crypto_price_candles_range ON crypto_price_candles(symbol, resolution, bucket)`),
+    // Range scans and batched deletes of the retention compaction
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_leaderboard_history_time ON leaderboard_history(timestamp)`),
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_account_positions_cached ON account_positions(cached_at)`),
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_account_positions_symbol_cached ON account_positions(model_id, symbol, cached_at)`),
+    db.prepare(`CREATE INDEX IF NOT EXISTS idx_position_marks_time ON position_marks(timestamp)`)
+  ])
 }
 
 async function shouldRun(db: D1Database, job: string, intervalMinutes: number, now: number) {
@@ -308,6 +601,71 @@ function toTimestampSeconds(value: unknown, fallback: number): number {
   return fallback
 }
 
+// recent_trades_cache columns also present, under the same name, in trade_data
+const TRADE_DATA_COLUMNS = ['id', 'model_id', 'symbol', 'side', 'entry_time', 'exit_time', 'realized_net_pnl']
+
+// Compact trade_data / positions_data, as scripts/d1sync/blobs.py writes them
+// (src/lib/database/blobs.ts decodes both): keys equal to their column are left out
+function compactTradeData(trade: any, columns: unknown[]): string {
+  const compact: Record<string, unknown> = { ...trade }
+  TRADE_DATA_COLUMNS.forEach((key, index) => {
+    if (key in compact && compact[key] === columns[index]) delete compact[key]
+  })
+  return JSON.stringify(compact)
+}
+
+function compactPositions(positions: any): string {
+  if (!positions || typeof positions !== 'object' || Array.isArray(positions)) {
+    return JSON.stringify(positions ?? {})
+  }
+  const compact: Record<string, unknown> = {}
+  for (const [symbol, position] of Object.entries<any>(positions)) {
+    if (position && typeof position === 'object' && position.symbol === symbol) {
+      const { symbol: _symbol, ...rest } = position
+      compact[symbol] = rest
+    } else {
+      compact[symbol] = position
+    }
+  }
+  return JSON.stringify(compact)
+}
+
+// Equity is stored to the cent in the model registry
+function roundEquity(value: unknown): number | null {
+  const equity = Number(value)
+  return Number.isFinite(equity) ? Math.round(equity * 100) / 100 : null
+}
+
+function registerModels(
+  db: D1Database,
+  equity: Map<string, number | null>,
+  timestamp: number,
+  fallback = false
+) {
+  const stmt = db.prepare(fallback ? MODEL_LISTED_UPSERT : MODEL_SEEN_UPSERT)
+  return [...equity]
+    .filter(([modelId]) => modelId)
+    .map(([modelId, value]) => stmt.bind(modelId, timestamp, timestamp, value, timestamp))
+}
+
+// Active models that closed a trade since their /analytics/{model} payload
+// last landed, or whose equity moved by EQUITY_TRIGGER dollars since then
+async function modelsDueForAnalytics(db: D1Database, timestamp: number) {
+  const query = await db
+    .prepare(`
+      SELECT model_id, last_trade_exit_time, equity FROM model_registry
+      WHERE last_seen > ?
+        AND (analytics_synced_at IS NULL
+          OR analytics_exit_time IS NOT last_trade_exit_time
+          OR (analytics_equity IS NULL AND equity IS NOT NULL)
+          OR ABS(equity - analytics_equity) >= ?)
+      ORDER BY model_id
+    `)
+    .bind(timestamp - MODEL_ACTIVE_SECONDS, EQUITY_TRIGGER)
+    .all<{ model_id: string; last_trade_exit_time: number | null; equity: number | null }>()
+  return query.results ?? []
+}
+
 async function syncLeaderboard(db: D1Database, payload: any, timestamp: number) {
   const leaderboard = Array.isArray(payload?.leaderboard) ? payload.leaderboard : []
   if (!leaderboard.length) return 0
@@ -334,7 +692,12 @@ async function syncLeaderboard(db: D1Database, payload: any, timestamp: number)
         entry.rank ?? index + 1,
         timestamp
       )
-    )
+    ).concat(registerModels(
+      db,
+      new Map(leaderboard.map((entry: any) => [entry.id ?? entry.model_id ?? '', roundEquity(entry.equity ?? 0)])),
+      timestamp,
+      true
+    ))
   )
 
   return leaderboard.length
@@ -357,18 +720,17 @@ async function syncTrades(db: D1Database, payload: any, timestamp: number) {
       const entryTime = toTimestampSeconds(trade.entry_time, timestamp)
       const exitTime = trade.exit_time != null ? toTimestampSeconds(trade.exit_time, timestamp) : null
       const realized = trade.realized_net_pnl ?? trade.pnl ?? null
-
-      return recentStmt.bind(
+      const columns = [
         trade.id ?? `recent-${timestamp}-${index}`,
         trade.model_id ?? '',
         trade.symbol ?? '',
         trade.side ?? '',
         entryTime,
         exitTime,
-        realized,
-        JSON.stringify(trade),
-        timestamp
-      )
+        realized
+      ]
+
+      return recentStmt.bind(...columns, compactTradeData(trade, columns), timestamp)
     })
   )
 
@@ -446,6 +808,9 @@ async function syncAnalyticsSummary(db: D1Database, payload: any, timestamp: num
   if (!analytics.length) return 0
 
   const serverTime = toTimestampSeconds(payload?.serverTime, timestamp)
+  const exitTimeStmt = db.prepare(`
+    UPDATE model_registry SET last_trade_exit_time = MAX(COALESCE(last_trade_exit_time, ?1), ?1) WHERE model_id = ?2
+  `)
 
   const stmt = db.prepare(`
     INSERT OR REPLACE INTO model_analytics (
@@ -547,20 +912,44 @@ async function syncAnalyticsSummary(db: D1Database, payload: any, timestamp: num
         invocation.max_invocation_break_mins ?? item.max_invocation_break_mins ?? 0,
         timestamp
       )
-    })
+    }).concat(
+      // Exit times of registered models, one of the signals that gate /analytics/{model}
+      analytics
+        .filter((item: any) => item.model_id && item.last_trade_exit_time != null)
+        .map((item: any) => exitTimeStmt.bind(item.last_trade_exit_time, item.model_id))
+    )
   )
 
   return analytics.length
 }
 
-async function syncModelAnalyticsDetails(db: D1Database, modelId: string, payload: any, timestamp: number) {
-  await db
-    .prepare(`
-      INSERT OR REPLACE INTO model_analytics_details (model_id, raw_data, updated_at)
-      VALUES (?, ?, ?)
-    `)
-    .bind(modelId, JSON.stringify(payload), timestamp)
-    .run()
+async function syncModelAnalyticsDetails(
+  db: D1Database,
+  model: { model_id: string; last_trade_exit_time: number | null; equity: number | null },
+  payload: any,
+  timestamp: number
+) {
+  // The payload's own exit time counts when it is later than the summary's
+  const ownExitTime = payload?.analytics?.[0]?.last_trade_exit_time ?? null
+  const exitTime =
+    ownExitTime != null && (model.last_trade_exit_time == null || ownExitTime > model.last_trade_exit_time)
+      ? ownExitTime
+      : model.last_trade_exit_time
+  await db.batch([
+    db
+      .prepare(`
+        INSERT OR REPLACE INTO model_analytics_details (model_id, raw_data, updated_at)
+        VALUES (?, ?, ?)
+      `)
+      .bind(model.model_id, JSON.stringify(payload), timestamp),
+    db
+      .prepare(`
+        UPDATE model_registry
+        SET last_trade_exit_time = ?, analytics_exit_time = ?, analytics_equity = ?, analytics_synced_at = ?
+        WHERE model_id = ?
+      `)
+      .bind(exitTime, exitTime, model.equity, timestamp, model.model_id)
+  ])
 
   return 1
 }
@@ -614,17 +1003,12 @@ async function syncAccountTotals(db: D1Database, payload: any, timestamp: number
     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
   `)
 
-  const positionStmt = db.prepare(`
-    INSERT OR REPLACE INTO account_positions (
-      id, account_total_id, model_id, symbol, quantity,
-      entry_price, current_price, unrealized_pnl, closed_pnl,
-      leverage, margin, liquidation_price, entry_time,
-      confidence, risk_usd, exit_plan, cached_at
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-  `)
-
+  // account_positions is a change log written by scripts/d1sync/positions.py
+  // (opened/resized/closed rows only); the worker keeps every snapshot's full
+  // positions in account_totals.positions_data and leaves that table alone.
   const totalStatements: D1PreparedStatement[] = []
-  const positionStatements: D1PreparedStatement[] = []
+  // Equity of each model's latest snapshot, for the model registry
+  const latestEquity = new Map<string, [number, number | null]>()
   let positionCount = 0
 
   for (const [index, account] of totalsSource.entries()) {
@@ -636,7 +1020,10 @@ async function syncAccountTotals(db: D1Database, payload: any, timestamp: number
     const unrealized = Number(account?.unrealized_pnl ?? account?.unrealized ?? 0)
     const totalEquity = Number(account?.total_equity ?? account?.equity ?? realized + unrealized)
     const accountTimestamp = toTimestampSeconds(account?.timestamp, timestamp)
-    const positionsJson = JSON.stringify(positionsRaw ?? {})
+    const positionsJson = compactPositions(positionsRaw)
+    if (accountTimestamp >= (latestEquity.get(modelId)?.[0] ?? -Infinity)) {
+      latestEquity.set(modelId, [accountTimestamp, roundEquity(totalEquity)])
+    }
 
     totalStatements.push(
       totalStmt.bind(
@@ -651,46 +1038,14 @@ async function syncAccountTotals(db: D1Database, payload: any, timestamp: number
       )
     )
 
-    // Clear previous snapshot for this account before inserting the fresh positions
-    await db.prepare(`DELETE FROM account_positions WHERE account_total_id = ?`).bind(accountId).run()
-
-    const entries = Array.isArray(positionsRaw)
-      ? positionsRaw.map((pos: any, posIndex: number) => [pos.symbol ?? `asset-${posIndex}`, pos] as [string, any])
-      : Object.entries(positionsRaw ?? {})
-
-    entries.forEach(([symbolKey, pos]: [string, any], posIndex: number) => {
-      const symbol = pos?.symbol ?? symbolKey
-      const exitPlan = pos?.exit_plan ? JSON.stringify(pos.exit_plan) : null
-      positionStatements.push(
-        positionStmt.bind(
-          `${accountId}_${symbol}_${timestamp}_${posIndex}`,
-          accountId,
-          modelId,
-          symbol,
-          pos?.quantity ?? pos?.size ?? 0,
-          pos?.entry_price ?? 0,
-          pos?.current_price ?? 0,
-          pos?.unrealized_pnl ?? 0,
-          pos?.closed_pnl ?? 0,
-          pos?.leverage ?? 0,
-          pos?.margin ?? 0,
-          pos?.liquidation_price ?? 0,
-          toTimestampSeconds(pos?.entry_time ?? pos?.timestamp, timestamp),
-          pos?.confidence ?? 0,
-          pos?.risk_usd ?? 0,
-          exitPlan,
-          timestamp
-        )
-      )
-      positionCount++
-    })
+    positionCount += Array.isArray(positionsRaw)
+      ? positionsRaw.length
+      : Object.keys(positionsRaw ?? {}).length
   }
 
   if (totalStatements.length) {
-    await db.batch(totalStatements)
-  }
-  if (positionStatements.length) {
-    await db.batch(positionStatements)
+    const equity = new Map([...latestEquity].map(([modelId, [, value]]): [string, number | null] => [modelId, value]))
+    await db.batch(totalStatements.concat(registerModels(db, equity, timestamp)))
   }
 
   return { totals: totalStatements.length, positions: positionCount }
@@ -753,16 +1108,37 @@ async function syncCryptoPrices(db: D1Database, payload: any, timestamp: number)
     ) VALUES (?, ?, ?, ?)
   `)
 
-  await db.batch(
-    entries.map((entry, index) =>
-      stmt.bind(
-        entry.symbol ?? `asset-${index}`,
-        entry.price,
-        toTimestampSeconds(entry.timestamp, timestamp),
-        timestamp
+  const candle = db.prepare(CANDLE_UPSERT)
+  const statements: D1PreparedStatement[] = []
+
+  entries.forEach((entry, index) => {
+    const symbol = entry.symbol ?? `asset-${index}`
+    const tickTime = toTimestampSeconds(entry.timestamp, timestamp)
+    statements.push(stmt.bind(symbol, entry.price, tickTime, timestamp))
+
+    // Every tick is also folded into its candle at each resolution
+    if (!(entry.price > 0)) return
+    for (const [resolution, seconds, slots] of CANDLE_RESOLUTIONS) {
+      const bucket = tickTime - (tickTime % seconds)
+      statements.push(
+        candle.bind(
+          symbol,
+          resolution,
+          (bucket / seconds) % slots,
+          bucket,
+          entry.price,
+          entry.price,
+          entry.price,
+          entry.price,
+          tickTime,
+          tickTime,
+          timestamp
+        )
       )
-    )
-  )
+    }
+  })
+
+  await db.batch(statements)
 
   return entries.length
 }
@@ -835,10 +1211,11 @@ async function performSync(env: Env): Promise<SyncResult> {
     result.analyticsSummary = await syncAnalyticsSummary(db, payload, timestamp)
   })
 
+  // Per-model analytics only for the models whose exit time or equity moved
   let analyticsDetailsCount = 0
-  for (const model of MODELS) {
-    const executed = await runJob(`analytics:${model}`, ONE_HOUR, async () => {
-      const payload = await fetchJson(`${NOF1_BASE}/analytics/${encodeURIComponent(model)}`)
+  for (const model of await modelsDueForAnalytics(db, timestamp)) {
+    const executed = await runJob(`analytics:${model.model_id}`, ONE_HOUR, async () => {
+      const payload = await fetchJson(`${NOF1_BASE}/analytics/${encodeURIComponent(model.model_id)}`)
       await syncModelAnalyticsDetails(db, model, payload, timestamp)
     })
     if (executed) analyticsDetailsCount++